@@ -0,0 +1,89 @@
+from model.aircraft.storage import DataStorage
+
+from collections import OrderedDict
+from typing import List, Hashable, Optional
+
+import hashlib
+
+
+class FitnessCache:
+    """Cache LRU des fitnesses deja calculees, indexe par une empreinte canonique des commandes.
+
+    Les commandes de chaque avion sont triees par temps puis quantifiees (temps, vitesse, cap) avant
+    d'etre hachees: deux individus egaux a la resolution pres partagent la meme entree, quel que soit
+    l'ordre de leurs commandes ou l'identite des objets DataStorage. L'empreinte est associee a un
+    contexte (fonction objective, etat de la flotte) fourni par l'algorithme: un meme cache peut
+    etre partage entre plusieurs algorithmes (ex: layers de OptimizedGeneticAlgorithm).
+    Au dela de <maxsize> entrees, la moins recemment utilisee est supprimee (maxsize <= 0: cache desactive).
+    """
+    def __init__(self, maxsize: int = 1024, time_resolution: float = 1e-2,
+                 speed_resolution: float = 1e-9, heading_resolution: float = 1e-6):
+        if time_resolution <= 0 or speed_resolution <= 0 or heading_resolution <= 0:
+            error = f"{self.__class__.__name__} resolutions must be strictly positive, got " \
+                    f"time={time_resolution}, speed={speed_resolution}, heading={heading_resolution}"
+            raise ValueError(error)
+        self.__maxsize            = maxsize
+        self.__time_resolution    = time_resolution
+        self.__speed_resolution   = speed_resolution
+        self.__heading_resolution = heading_resolution
+        self.__entries: OrderedDict[bytes, float] = OrderedDict()
+        self.__hits      = 0
+        self.__misses    = 0
+        self.__evictions = 0
+
+    def get_maxsize(self) -> int: return self.__maxsize
+    def get_hits(self) -> int: return self.__hits
+    def get_misses(self) -> int: return self.__misses
+    def get_evictions(self) -> int: return self.__evictions
+    def is_enabled(self) -> bool: return self.__maxsize > 0
+    def __len__(self) -> int: return len(self.__entries)
+
+    def get_hit_rate(self) -> float:
+        """Proportion des recherches trouvees dans le cache (0 si aucune recherche)"""
+        lookups = self.__hits + self.__misses
+        return self.__hits / lookups if lookups else 0.
+
+    def get_stats(self) -> dict:
+        """Statistiques du cache"""
+        return {"size": len(self), "maxsize": self.__maxsize, "hits": self.__hits, "misses": self.__misses,
+                "evictions": self.__evictions, "hit_rate": round(self.get_hit_rate(), 4)}
+
+    def key(self, context: Hashable, individual: List[List[DataStorage]]) -> bytes:
+        """Empreinte canonique de l'individu (une liste de commandes par avion) dans le contexte donne"""
+        def quantise(value: Optional[float], resolution: float) -> Optional[int]:
+            return None if value is None else round(value / resolution)
+
+        canonical = tuple(tuple((command.id,
+                                 quantise(command.time, self.__time_resolution),
+                                 quantise(command.speed, self.__speed_resolution),
+                                 quantise(command.heading, self.__heading_resolution))
+                                for command in sorted(trajectory, key=lambda c: c.time))
+                          for trajectory in individual)
+        return hashlib.blake2b(repr((context, canonical)).encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[float]:
+        """Renvoie la fitness en cache (None si absente) et marque l'entree comme recemment utilisee"""
+        if key in self.__entries:
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return self.__entries[key]
+        self.__misses += 1
+        return None
+
+    def put(self, key: bytes, fitness: float) -> None:
+        """Ajoute une fitness, en supprimant la moins recemment utilisee si le cache est plein"""
+        if not self.is_enabled():
+            return
+        self.__entries[key] = fitness
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__maxsize:
+            self.__entries.popitem(last=False)
+            self.__evictions += 1
+
+    def clear(self) -> None:
+        """Vide le cache et remet les statistiques a zero"""
+        self.__entries.clear()
+        self.__hits = self.__misses = self.__evictions = 0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.get_stats()})"
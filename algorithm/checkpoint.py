@@ -0,0 +1,84 @@
+from logging_config import setup_logging
+
+from typing import Any, Dict, Optional
+
+import os
+import pickle
+import threading
+
+
+# Version du format des points de reprise, verifiee au chargement
+CHECKPOINT_VERSION = 2
+
+
+class CheckpointWriter:
+    """Ecriture des points de reprise d'un algorithme sur un thread dedie.
+
+    submit() ne fait que deposer le point de reprise: la serialisation (pickle) et l'ecriture ont lieu
+    sur le thread d'ecriture, sans bloquer l'algorithme. Si plusieurs points de reprise sont deposes
+    pendant une ecriture, seul le plus recent est ecrit. Le fichier est d'abord ecrit a cote puis
+    renomme: un arret pendant l'ecriture laisse le point de reprise precedent intact.
+    Les points de reprise deposes ne doivent plus etre modifies par l'algorithme.
+    """
+    def __init__(self, path: str):
+        self.__path      = path
+        self.__pending: Optional[Dict[str, Any]] = None
+        self.__closed    = False
+        self.__written   = 0
+        self.__condition = threading.Condition()
+        self.logger = setup_logging(self.__class__.__name__)
+        self.__thread = threading.Thread(target=self.__loop, name=f"{self.__class__.__name__}({path})", daemon=True)
+        self.__thread.start()
+
+    def get_path(self) -> str: return self.__path
+    def get_written(self) -> int: return self.__written
+
+    def submit(self, snapshot: Dict[str, Any]) -> None:
+        """Depose un point de reprise, ecrit des que le thread d'ecriture est libre"""
+        with self.__condition:
+            if self.__closed:
+                error = f"{self.__class__.__name__} for {self.__path} is closed"
+                raise ValueError(error)
+            self.__pending = snapshot
+            self.__condition.notify()
+
+    def close(self) -> None:
+        """Ecrit le dernier point de reprise depose puis arrete le thread d'ecriture"""
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify()
+        self.__thread.join()
+
+    def __loop(self) -> None:
+        while True:
+            with self.__condition:
+                while self.__pending is None and not self.__closed:
+                    self.__condition.wait()
+                if self.__pending is None:
+                    return
+                snapshot, self.__pending = self.__pending, None
+            try:
+                self.write(self.__path, snapshot)
+                self.__written += 1
+            except Exception as e: # Le point de reprise est perdu, pas l'algorithme
+                self.logger.error(f"Checkpoint {self.__path} not written: {e}")
+
+    @staticmethod
+    def write(path: str, snapshot: Dict[str, Any]) -> None:
+        """Ecrit un point de reprise (remplacement atomique du fichier)"""
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    @staticmethod
+    def load(path: str) -> Dict[str, Any]:
+        """Charge un point de reprise ecrit par write
+        Exception: ValueError si le format n'est pas celui de CHECKPOINT_VERSION"""
+        with open(path, "rb") as file:
+            snapshot = pickle.load(file)
+        if not isinstance(snapshot, dict) or snapshot.get("version") != CHECKPOINT_VERSION:
+            version = snapshot.get("version") if isinstance(snapshot, dict) else None
+            error = f"{path} is not a checkpoint of version {CHECKPOINT_VERSION}, got version {version}"
+            raise ValueError(error)
+        return snapshot
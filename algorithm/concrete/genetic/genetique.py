@@ -2,11 +2,15 @@ import gc
 from algorithm.interface.IAlgorithm import AAlgorithm
 from algorithm.interface.ISimulatedObject import ASimulatedAircraft
 from model.aircraft.storage import DataStorage
+from algorithm.parallel import ParallelEvaluator
+from algorithm.cache import FitnessCache
+from algorithm.population import Population
+from model.aircraft.fleet import FleetTiming
 from logging_config import setup_logging
 
 from utils.controller.argument import method_control_type
 
-from typing import List
+from typing import List, Dict, Any, Tuple
 from typing_extensions import override
 from copy import deepcopy
 from datetime import time, datetime
@@ -24,6 +28,8 @@ class AlgorithmGeneticBase(AAlgorithm):
                  mutation_rate: float = 0.1, 
                  crossover_rate: float = 0.8,
                  early_stopping: int = 10,
+                 n_jobs: int = 1,
+                 cache_size: int = 1024,
                  **kwargs):
         
         # Attributs generaux
@@ -47,6 +53,14 @@ class AlgorithmGeneticBase(AAlgorithm):
         # Attribut pour evité de generer un population initial
         self.__initial_population: List[List[List[DataStorage]]] = None # setter
 
+        # Evaluation des fitnesses: sequentielle si n_jobs == 1, sinon sur n_jobs processus (tous les coeurs si <= 0)
+        self.__n_jobs = n_jobs
+        self.__evaluator: ParallelEvaluator = None
+
+        # Cache LRU des fitnesses (desactive si cache_size <= 0), utilise pendant run dans le contexte fige au demarrage
+        self.__cache = FitnessCache(maxsize=cache_size)
+        self.__fitness_context = None
+
         # Autres attributs
         self.logger = setup_logging(self.__class__.__name__)
 
@@ -143,6 +157,42 @@ class AlgorithmGeneticBase(AAlgorithm):
             raise TypeError(error)
         
 
+    def get_n_jobs(self) -> int:
+        """Renvoie le nombre de processus d'evaluation des fitnesses"""
+        return self.__n_jobs
+
+    def open_evaluator(self) -> None:
+        """Demarre le pool de processus d'evaluation sur le scenario courant (si n_jobs != 1, cf. update_scenario)"""
+        self.close_evaluator()
+        if self.__n_jobs != 1:
+            self.__evaluator = ParallelEvaluator(self.get_scenario(), self.get_objective_function(), self.__n_jobs)
+
+    def close_evaluator(self) -> None:
+        """Arrete le pool de processus d'evaluation"""
+        if self.__evaluator is not None:
+            self.__evaluator.close()
+            self.__evaluator = None
+
+    def get_cache(self) -> FitnessCache:
+        """Renvoie le cache des fitnesses"""
+        return self.__cache
+
+    def set_cache(self, cache: FitnessCache) -> None:
+        """Modifie le cache des fitnesses, ex: pour le partager entre plusieurs algorithmes"""
+        self.__cache = cache
+
+    def get_cache_stats(self) -> dict:
+        """Renvoie les statistiques du cache des fitnesses (taille, hits, misses, ...)"""
+        return self.__cache.get_stats()
+
+    def update_fitness_context(self) -> None:
+        """Fige le contexte des fitnesses en cache: fonction objective et etat de la flotte (cf. Scenario.fingerprint)"""
+        self.__fitness_context = (id(self.get_objective_function()), self.get_scenario().fingerprint())
+
+    def reset_fitness_context(self) -> None:
+        """Desactive le cache hors de run: l'etat de la flotte peut changer"""
+        self.__fitness_context = None
+
     def generate_individuals(self, data: List[ASimulatedAircraft]) -> List[List[DataStorage]]:
         """Generation d'un individu (commandes) pour chaque ASimulatedAircraft"""
         return list(map(lambda obj: obj.initialize(), data))
@@ -231,16 +281,67 @@ class AlgorithmGeneticBase(AAlgorithm):
             new_individual.append(new_trajectory)
         return new_individual
 
+    def apply_individual(self, individual: List[List[DataStorage]], data: List[ASimulatedAircraft] = None) -> None:
+        """Applique les commandes d'un individu a chaque ASimulatedAircraft de data (self.get_data() par defaut).
+        Les avions dont les commandes n'ont pas change (cf. has_commands) gardent leur plan de vol timé et leurs conflits.
+        Les temps de passage des autres sont calcules en une passe (FleetTiming),
+        puis chaque avion recoit ses commandes sans recalcul individuel et ses conflits sont mis a jour.
+        """
+        data = self.get_data() if data == None else data
+        changed = []
+        for i, aircraft_sim in enumerate(data):
+            if aircraft_sim.has_commands(individual[i]):
+                aircraft_sim.bind_commands(individual[i])
+            else:
+                changed.append(i)
+        if not changed:
+            return
+
+        FleetTiming.estimate_aircrafts([data[i].get_object() for i in changed], [individual[i] for i in changed])
+        for i in changed:
+            aircraft_sim, trajectory = data[i], individual[i]
+            # La liste de commandes est envoyer a l'avion et celui-ci met a jour son attribut et son TakeOffTime (premier element de la liste)
+            # Les elements de data sont modifies en place a travers la methode update_commands
+            # ca re-calcul les differents conflits
+            aircraft_sim.update_commands(trajectory, recalcul=False)
+
     def calculate_fitnesses(self, population: List[List[List[DataStorage]]]) -> List[float]:
-        """Calcul les differentes fitnesses pour chaque individu de la population"""
+        """Calcul les differentes fitnesses pour chaque individu de la population.
+        Pendant run, les individus deja evalues (ou en double dans la population) sont lus dans le cache,
+        seuls les autres sont evalues, sequentiellement ou sur le pool de processus.
+        Les avions ne portent aucun individu particulier apres l'evaluation: appliquer l'individu choisi
+        avec apply_individual.
+        """
+        if not population:
+            return []
+        use_cache = self.__cache.is_enabled() and self.__fitness_context is not None
+        keys = [self.__cache.key(self.__fitness_context, individual) for individual in population] if use_cache \
+               else list(range(len(population)))
+        first_index = {}
+        for i, key in enumerate(keys):
+            first_index.setdefault(key, i)
+
+        known = {key: self.__cache.get(key) if use_cache else None for key in first_index}
+        missing = [key for key, fitness in known.items() if fitness is None]
+        to_evaluate = [population[first_index[key]] for key in missing]
+        for key, fitness in zip(missing, self.__evaluate_population(to_evaluate)):
+            known[key] = fitness
+            if use_cache:
+                self.__cache.put(key, fitness)
+
+        return [known[key] for key in keys]
+
+    def __evaluate_population(self, population: List[List[List[DataStorage]]]) -> List[float]:
+        """Evalue chaque individu, sur le pool de processus s'il est demarre, sinon en l'appliquant aux avions"""
+        if self.__evaluator is not None:
+            for individual in population: # Commandes triees en place, comme par l'application aux avions
+                for trajectory in individual:
+                    trajectory.sort(key=lambda c: c.time)
+            return self.__evaluator.evaluate(population) if population else []
+
         fitnesses = []
         for individual in population:
-            for i, aircraft_sim in enumerate(self.get_data()):
-                trajectory = individual[i]
-                # La liste de commandes est envoyer a l'avion et celui-ci met a jour son attribut et son TakeOffTime (premier element de la liste)
-                # Les elements de self.get_data() sont modifies en place a travers la methode update_commands
-                # ca re-calcul les differents conflits
-                aircraft_sim.update_commands(trajectory)
+            self.apply_individual(individual)
 
             # A calculer apres avoir changer chaque avion 
             fitnesses.append(self.evaluate()) # Evaluation du critere avec la List[ASimulatedAircraft]
@@ -334,6 +435,29 @@ class AlgorithmGeneticBase(AAlgorithm):
 
 
 
+    def checkpoint_state(self, population: List[List[List[DataStorage]]], best_fitness: float) -> Dict[str, Any]:
+        """Etat de l'algorithme pour un point de reprise: population et meilleurs individus en tableaux (cf. Population)"""
+        aircraft_ids = [aircraft_sim.get_object().get_id_aircraft() for aircraft_sim in self.get_data()]
+        return {"population": Population.from_individuals(population, aircraft_ids),
+                "best_results": Population.from_individuals(self.get_best_results(), aircraft_ids),
+                "best_fitness": best_fitness,
+                "mutation_rate": self.__mutation_rate,
+                "generator": self.__generator.bit_generator.state}
+
+    def load_checkpoint_state(self) -> Tuple[List[List[List[DataStorage]]], int, float]:
+        """Population, premiere generation et meilleure fitness du point de reprise charge par resume,
+        sinon la population initiale (cf. set_initial_population, generee si elle n'est pas donnee), 0 et None"""
+        snapshot = self.pop_resume_snapshot()
+        if snapshot is None:
+            population = self.get_initial_population() if self.has_initial_population() else self.generate_initial_population(self.get_data())
+            return population, 0, None
+        state = snapshot["state"]
+        self.__mutation_rate = state["mutation_rate"]
+        self.__generator.bit_generator.state = state["generator"]
+        self.set_best_results(state["best_results"].to_individuals())
+        self.logger.info(f"Resume at generation {snapshot['step']} (best fitness {state['best_fitness']})")
+        return state["population"].to_individuals(), snapshot["step"], state["best_fitness"]
+
     @override
     def run(self) -> List[List[DataStorage]]:
         if self.is_verbose():
@@ -342,68 +466,83 @@ class AlgorithmGeneticBase(AAlgorithm):
         self.set_progress(0.)
         self.set_start_time(start=datetime.now().timestamp())
 
-        population      = self.generate_initial_population(self.get_data())
-        best_individual = None
-        best_fitness    = None
-
-        for generation in range(self.__generations):
-            if not self.is_running() or self.is_timeout():
-                break  
-
-            # Mutation rate evolutif
-            self.__mutation_rate = max(0.01, self.__mutation_rate * 0.99)  # Diminuer progressivement
-
-            # Calcul fitnesses
-            fitnesses = self.calculate_fitnesses(population)
-
-            if self.is_verbose():
-                self.logger.info(f"Generation {generation + 1} Fitnesses: {fitnesses}")
-
-            # Acceptation ou non du critere
-            if self.is_minimisation():
-                optimal_fitness = min(fitnesses)
-                if (generation <= 0) or (optimal_fitness < best_fitness) or (best_fitness == None):
-                    # Maj variable locale
-                    best_fitness   = optimal_fitness
-                    best_individual = population[fitnesses.index(optimal_fitness)]
-                    # Maj attribut
-                    best_results = [best_individual]
-                    self.set_best_results(best_results)
-                elif optimal_fitness == best_fitness : 
-                    self.add_best_results(population[fitnesses.index(optimal_fitness)])
-            else: # Maximisation
-                optimal_fitness = max(fitnesses)
-                if (generation <= 0) or (optimal_fitness > best_fitness) or (best_fitness == None):
-                    # Maj variable locale
-                    best_fitness   = optimal_fitness
-                    best_individual = population[fitnesses.index(optimal_fitness)]
-                    # Maj attribut
-                    best_results = [best_individual]
-                    self.set_best_results(best_results)
-                elif optimal_fitness == best_fitness : 
-                    self.add_best_results(population[fitnesses.index(optimal_fitness)])
-
-            # Maj du critiere
-            self.set_best_critere(best_fitness)
-
-            # Logger
-            if self.is_verbose():
-                self.logger.info(f"Generation {generation + 1}: Best Fitness = {best_fitness}, Best Individual = {best_individual}")
-
-            # Calcul de la Prochaine population
-            population = self.next_population_elitism_surprod(population, fitnesses)
-
-            # Force la récupération de la mémoire
-            gc.collect()
-
-            # Avancement du processus
-            self.set_progress(int(((generation + 1) / self.__generations) * 100))
-            self.set_process_time(process_time=datetime.now().timestamp() - self.get_start_time())
-
-            if self.is_verbose():
-                self.logger.info(f"Generation {generation + 1}: Progress = {self.get_progress()}%")
+        population, first_generation, best_fitness = self.load_checkpoint_state()
+        best_individual = self.get_best_results()[0] if first_generation > 0 and self.get_best_results() else None
+        next_generation = first_generation
+        self.update_scenario()
+        self.open_evaluator()
+        self.update_fitness_context()
+
+        try:
+            for generation in range(first_generation, self.__generations):
+                if not self.is_running() or self.is_timeout():
+                    break  
+
+                # Mutation rate evolutif
+                self.__mutation_rate = max(0.01, self.__mutation_rate * 0.99)  # Diminuer progressivement
+
+                # Calcul fitnesses
+                fitnesses = self.calculate_fitnesses(population)
+
+                if self.is_verbose():
+                    self.logger.info(f"Generation {generation + 1} Fitnesses: {fitnesses}")
+
+                # Acceptation ou non du critere
+                if self.is_minimisation():
+                    optimal_fitness = min(fitnesses)
+                    if (generation <= 0) or (optimal_fitness < best_fitness) or (best_fitness == None):
+                        # Maj variable locale
+                        best_fitness   = optimal_fitness
+                        best_individual = population[fitnesses.index(optimal_fitness)]
+                        # Maj attribut
+                        best_results = [best_individual]
+                        self.set_best_results(best_results)
+                    elif optimal_fitness == best_fitness : 
+                        self.add_best_results(population[fitnesses.index(optimal_fitness)])
+                else: # Maximisation
+                    optimal_fitness = max(fitnesses)
+                    if (generation <= 0) or (optimal_fitness > best_fitness) or (best_fitness == None):
+                        # Maj variable locale
+                        best_fitness   = optimal_fitness
+                        best_individual = population[fitnesses.index(optimal_fitness)]
+                        # Maj attribut
+                        best_results = [best_individual]
+                        self.set_best_results(best_results)
+                    elif optimal_fitness == best_fitness : 
+                        self.add_best_results(population[fitnesses.index(optimal_fitness)])
+
+                # Maj du critiere
+                self.set_best_critere(best_fitness)
+
+                # Logger
+                if self.is_verbose():
+                    self.logger.info(f"Generation {generation + 1}: Best Fitness = {best_fitness}, Best Individual = {best_individual}")
+
+                # Calcul de la Prochaine population
+                population = self.next_population_elitism_surprod(population, fitnesses)
+
+                # Force la récupération de la mémoire
+                gc.collect()
+
+                # Avancement du processus
+                self.set_progress(int(((generation + 1) / self.__generations) * 100))
+                self.set_process_time(process_time=datetime.now().timestamp() - self.get_start_time())
+
+                if self.is_verbose():
+                    self.logger.info(f"Generation {generation + 1}: Progress = {self.get_progress()}%")
+
+                # Point de reprise: prochaine generation et sa population
+                next_generation = generation + 1
+                self.checkpoint(next_generation, lambda: self.checkpoint_state(population, best_fitness))
+
+            # Dernier point de reprise (timeout, arret ou fin)
+            self.checkpoint(next_generation, lambda: self.checkpoint_state(population, best_fitness), force=True)
+        finally: # Le pool d'evaluation est arrete meme en cas d'exception
+            self.close_evaluator()
+            self.reset_fitness_context()
 
         self.stop()
+        self.logger.info(f"Cache des fitnesses: {self.__cache}")
         self.logger.info(f"Final Best Solution(fitness: {best_fitness}): {best_individual}")
         self.reinitialize_data()
         return best_individual
\ No newline at end of file
@@ -0,0 +1,167 @@
+from algorithm.interface.IAlgorithm import AAlgorithm
+from algorithm.concrete.genetic.genetique_vectorized import AlgorithmGeneticVectorized
+from algorithm.parallel import _initialize_worker, _evaluate_chunk
+from algorithm.population import Population
+from model.aircraft.storage import DataStorage
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import List, Optional, Tuple
+from typing_extensions import override
+from datetime import datetime
+
+import os
+import numpy as np
+
+
+@dataclass
+class IslandState:
+    """Etat d'une ile, envoye a un processus pour chaque epoque puis renvoye"""
+    population: Population
+    fitnesses: Optional[np.ndarray]   # None tant que la population initiale n'est pas evaluee
+    generator: np.random.Generator
+    mutation_rate: float
+
+    def get_best_index(self, is_minimise: bool) -> int:
+        return int(np.argmin(self.fitnesses) if is_minimise else np.argmax(self.fitnesses))
+
+    def get_emigrants(self, size: int, is_minimise: bool) -> Tuple[Population, np.ndarray]:
+        """Copie des <size> meilleurs individus et de leurs fitnesses"""
+        order = np.argsort(self.fitnesses if is_minimise else -self.fitnesses, kind='stable')[:size]
+        return self.population.take(order), self.fitnesses[order]
+
+
+def _evolve_island(state: IslandState, immigrants: Optional[Tuple[Population, np.ndarray]], generations: int,
+                   population_size: int, crossover_rate: float, possible_speeds: np.ndarray, is_minimise: bool) -> IslandState:
+    """Integre les immigrants a la place des pires individus puis fait evoluer l'ile pendant <generations> generations"""
+    if state.fitnesses is None:
+        state.fitnesses = _evaluate_chunk(state.population.to_individuals())
+    if immigrants is not None:
+        population, fitnesses = immigrants
+        kept = np.argsort(state.fitnesses if is_minimise else -state.fitnesses, kind='stable')[:max(len(state.population) - len(population), 0)]
+        state.population = state.population.take(kept).concatenate(population)
+        state.fitnesses  = np.concatenate([state.fitnesses[kept], fitnesses])
+
+    for _ in range(generations):
+        state.mutation_rate = max(0.01, state.mutation_rate * 0.99) # Mutation rate evolutif
+        state.population, state.fitnesses = state.population.next_generation(state.fitnesses, _evaluate_chunk, state.generator,
+                                                                             population_size=population_size,
+                                                                             crossover_rate=crossover_rate,
+                                                                             mutation_rate=state.mutation_rate,
+                                                                             possible_speeds=possible_speeds,
+                                                                             is_minimise=is_minimise)
+    return state
+
+
+@AAlgorithm.register_algorithm
+class AlgorithmGeneticIsland(AlgorithmGeneticVectorized):
+    """Algorithme genetique en modele d'iles: n_islands populations (de population_size individus chacune)
+    evoluent en parallele dans des processus distincts, sur le scenario fige de la flotte (cf. Scenario).
+
+    Toutes les <migration_interval> generations, les <migration_size> meilleurs individus de chaque ile
+    remplacent les pires d'une autre ile: la suivante (topologie 'ring') ou une ile tiree au hasard,
+    differente de l'ile d'origine (topologie 'random'). Entre deux migrations, les iles n'echangent rien:
+    chacune evolue sur un coeur. Le meilleur individu global, la progression (en generations)
+    et le meilleur critere sont mis a jour a chaque migration.
+    """
+    TOPOLOGIES = ("ring", "random")
+
+    def __init__(self, data, n_islands: int = 4, migration_interval: int = 5, migration_size: int = 2,
+                 topology: str = "ring", **kwargs):
+        super().__init__(data=data, **kwargs)
+        if topology not in self.TOPOLOGIES:
+            error = f"topology must be one of {self.TOPOLOGIES}, got {topology}"
+            raise ValueError(error)
+        if migration_interval <= 0 or migration_size < 0:
+            error = f"migration interval must be strictly positive and migration size positive, got {migration_interval} and {migration_size}"
+            raise ValueError(error)
+        self.__n_islands          = n_islands if n_islands > 0 else os.cpu_count()
+        self.__migration_interval = migration_interval
+        self.__migration_size     = migration_size
+        self.__topology           = topology
+
+    def get_n_islands(self) -> int: return self.__n_islands
+    def get_migration_interval(self) -> int: return self.__migration_interval
+    def get_migration_size(self) -> int: return self.__migration_size
+    def get_topology(self) -> str: return self.__topology
+
+    def migration_targets(self) -> List[int]:
+        """Ile de destination des emigrants de chaque ile"""
+        n = self.__n_islands
+        if n <= 1:
+            return []
+        if self.__topology == "ring":
+            return [(i + 1) % n for i in range(n)]
+        # Permutation sans point fixe: une ile n'envoie pas ses emigrants a elle-meme
+        while True:
+            targets = self.get_generator().permutation(n).tolist()
+            if all(i != target for i, target in enumerate(targets)):
+                return targets
+
+    @override
+    def run(self) -> List[List[DataStorage]]:
+        if self.is_verbose():
+            self.logger.info(f"Il y a {len(self.get_data())} ASimulatedAircraft, {self.__n_islands} iles")
+
+        self.set_progress(0.)
+        self.set_start_time(start=datetime.now().timestamp())
+
+        aircraft_ids = [aircraft_sim.get_object().get_id_aircraft() for aircraft_sim in self.get_data()]
+        seeds = np.random.SeedSequence(int(self.get_generator().integers(2**32))).spawn(self.__n_islands)
+        islands = [IslandState(population=Population.from_individuals(self.generate_initial_population(self.get_data()), aircraft_ids),
+                               fitnesses=None, generator=np.random.default_rng(seed), mutation_rate=self.get_mutation_rate())
+                   for seed in seeds]
+        immigrants: List[Optional[Tuple[Population, np.ndarray]]] = [None] * self.__n_islands
+        best_individual = None
+        best_fitness    = None
+        sign = 1 if self.is_minimisation() else -1
+        parameters = (self.get_population_size(), self.get_crossover_rate(), self.get_possible_speeds(), self.is_minimisation())
+
+        executor = ProcessPoolExecutor(max_workers=min(self.__n_islands, os.cpu_count()), mp_context=get_context("spawn"),
+                                       initializer=_initialize_worker,
+                                       initargs=(self.update_scenario(), self.get_objective_function()))
+        try:
+            generation = 0
+            while generation < self.get_generations():
+                if not self.is_running() or self.is_timeout():
+                    break
+                # La 1ere epoque evalue aussi les populations initiales (0 generation si generations == 0)
+                generations = min(self.__migration_interval, self.get_generations() - generation)
+                futures = [executor.submit(_evolve_island, island, immigrant, generations, *parameters)
+                           for island, immigrant in zip(islands, immigrants)]
+                islands = [future.result() for future in futures]
+                generation += generations
+
+                # Meilleur individu global
+                for island in islands:
+                    index = island.get_best_index(self.is_minimisation())
+                    optimal_fitness = float(island.fitnesses[index])
+                    if best_fitness is None or sign * optimal_fitness < sign * best_fitness:
+                        best_fitness    = optimal_fitness
+                        best_individual = island.population.to_individuals([index])[0]
+                        self.set_best_results([best_individual])
+                    elif optimal_fitness == best_fitness:
+                        self.add_best_results(island.population.to_individuals([index])[0])
+                self.set_best_critere(best_fitness)
+
+                # Migration
+                immigrants = [None] * self.__n_islands
+                for island, target in zip(islands, self.migration_targets()):
+                    if self.__migration_size > 0:
+                        immigrants[target] = island.get_emigrants(self.__migration_size, self.is_minimisation())
+
+                if self.is_verbose():
+                    self.logger.info(f"Generation {generation}: Best Fitness = {best_fitness}, "
+                                     f"best by island = {[float(island.fitnesses[island.get_best_index(self.is_minimisation())]) for island in islands]}")
+
+                # Avancement du processus
+                self.set_progress(int((generation / self.get_generations()) * 100))
+                self.set_process_time(process_time=datetime.now().timestamp() - self.get_start_time())
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        self.stop()
+        self.logger.info(f"Final Best Solution(fitness: {best_fitness}): {best_individual}")
+        self.reinitialize_data()
+        return best_individual
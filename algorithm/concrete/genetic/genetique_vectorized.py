@@ -0,0 +1,91 @@
+from algorithm.interface.IAlgorithm import AAlgorithm
+from algorithm.concrete.genetic.genetique import AlgorithmGeneticBase
+from algorithm.population import Population
+from model.aircraft.storage import DataStorage
+
+from typing import List, Tuple
+from typing_extensions import override
+from datetime import datetime
+
+import gc
+import numpy as np
+
+@AAlgorithm.register_algorithm
+class AlgorithmGeneticVectorized(AlgorithmGeneticBase):
+    """Algorithme genetique (memes parametres que AlgorithmGeneticBase) dont la population est un tableau
+    structure (cf. Population): selection, croisement et mutation sont vectorises sur toute la population.
+    Les DataStorage ne sont crees que pour l'evaluation des nouveaux individus et pour les meilleurs resultats.
+    Les fitnesses de la population retenue sont conservees d'une generation a l'autre: les elites ne sont pas reevaluees.
+
+    Selection, croisement et elitisme avec surproduction suivent AlgorithmGeneticBase, mais la mutation est
+    un operateur different (cf. Population.mutate): a parametres egaux, la recherche n'est pas la meme.
+    """
+
+    def get_possible_speeds(self) -> np.ndarray:
+        """Vitesses tirees lors des mutations, celles des ASimulatedAircraft de data"""
+        return self.get_data()[0].get_possible_speeds()
+
+    def next_population_arrays(self, population: Population, fitnesses: np.ndarray) -> Tuple[Population, np.ndarray]:
+        """Prochaine population avec elitisme et surproduction (cf. Population.next_generation), renvoie aussi ses fitnesses"""
+        return population.next_generation(fitnesses, self.calculate_fitnesses, self.get_generator(),
+                                          population_size=self.get_population_size(),
+                                          crossover_rate=self.get_crossover_rate(),
+                                          mutation_rate=self.get_mutation_rate(),
+                                          possible_speeds=self.get_possible_speeds(),
+                                          is_minimise=self.is_minimisation())
+
+    @override
+    def run(self) -> List[List[DataStorage]]:
+        if self.is_verbose():
+            self.logger.info(f"Il y a {len(self.get_data())} ASimulatedAircraft")
+
+        self.set_progress(0.)
+        self.set_start_time(start=datetime.now().timestamp())
+
+        aircraft_ids = [aircraft_sim.get_object().get_id_aircraft() for aircraft_sim in self.get_data()]
+        population   = Population.from_individuals(self.generate_initial_population(self.get_data()), aircraft_ids)
+        best_individual = None
+        best_fitness    = None
+        sign = 1 if self.is_minimisation() else -1
+        self.update_scenario()
+        self.open_evaluator()
+        self.update_fitness_context()
+        try:
+            fitnesses = np.array(self.calculate_fitnesses(population.to_individuals()), dtype=float)
+            for generation in range(self.get_generations()):
+                if not self.is_running() or self.is_timeout():
+                    break
+
+                # Mutation rate evolutif
+                self.set_mutation_rate(max(0.01, self.get_mutation_rate() * 0.99))
+
+                # Acceptation ou non du critere
+                index = int(np.argmin(sign * fitnesses))
+                optimal_fitness = float(fitnesses[index])
+                if best_fitness is None or sign * optimal_fitness < sign * best_fitness:
+                    best_fitness    = optimal_fitness
+                    best_individual = population.to_individuals([index])[0]
+                    self.set_best_results([best_individual])
+                elif optimal_fitness == best_fitness:
+                    self.add_best_results(population.to_individuals([index])[0])
+                self.set_best_critere(best_fitness)
+
+                if self.is_verbose():
+                    self.logger.info(f"Generation {generation + 1}: Best Fitness = {best_fitness}, Population = {population}")
+
+                # Calcul de la Prochaine population
+                population, fitnesses = self.next_population_arrays(population, fitnesses)
+                gc.collect()
+
+                # Avancement du processus
+                self.set_progress(int(((generation + 1) / self.get_generations()) * 100))
+                self.set_process_time(process_time=datetime.now().timestamp() - self.get_start_time())
+        finally: # Le pool d'evaluation est arrete meme en cas d'exception
+            self.close_evaluator()
+            self.reset_fitness_context()
+
+        self.stop()
+        self.logger.info(f"Cache des fitnesses: {self.get_cache()}")
+        self.logger.info(f"Final Best Solution(fitness: {best_fitness}): {best_individual}")
+        self.reinitialize_data()
+        return best_individual
@@ -5,17 +5,122 @@ import numpy as np
 from algorithm.interface.IAlgorithm import AAlgorithm
 from algorithm.concrete.genetic.genetique import AlgorithmGeneticBase
 from algorithm.interface.ISimulatedObject import ASimulatedAircraft
+from algorithm.population import Population
+from algorithm.interface.IObjective import AObjective
+from algorithm.evaluation import Scenario
 from model.aircraft.storage import DataStorage
 from logging_config import setup_logging
 from utils.conversion import time_to_sec
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Any, Optional
 from typing_extensions import override
 from copy import deepcopy
 from datetime import datetime, time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from multiprocessing import get_context
+from multiprocessing.synchronize import Event
+
+import os
+
+
+@dataclass
+class WindowLayer:
+    """Layer d'un intervalle lancee dans un processus: parametres de l'AlgorithmGeneticBase et population initiale
+    (celle de la premiere layer, les suivantes partent de la population de l'intervalle, cf. _run_window_layers)"""
+    population: Optional[Population]
+    generations: int
+    population_size: int
+    mutation_rate: float
+    crossover_rate: float
+    objective: AObjective
+    is_minimise: bool
+    generator: np.random.Generator
+
+def _partial_shuffle(solution: List[List[DataStorage]], dt: float, first_departure: float, last_departure: float,
+                     generator: np.random.Generator) -> List[List[DataStorage]]:
+    """Decale les commandes de chaque avion d'un meme temps tire dans [-dt, dt], borne a [first_departure, last_departure]
+    (cf. OptimizedGeneticAlgorithm.partial_shuffle)"""
+    shuffled_solution = []
+    for old_commands in solution:
+        delta_t = generator.uniform(-dt, dt)
+        shuffled_solution.append([DataStorage(id=old_command.id, speed=old_command.speed,
+                                              time=max(first_departure, min(old_command.time + delta_t, last_departure)))
+                                  for old_command in old_commands])
+    return shuffled_solution
+
+def _extend_population_layer(population_layer: Optional[List[List[List[DataStorage]]]], best_individuals: List[List[List[DataStorage]]],
+                             population_size: int, interval_value: int, generator: np.random.Generator) -> List[List[List[DataStorage]]]:
+    """Ajoute a la population de l'intervalle les meilleurs individus d'une layer, completes jusqu'a <population_size>
+    par des copies decalees de plus en plus (cf. OptimizedGeneticAlgorithm.extend_population_layer)"""
+    all_departure_times = [command.time for best in best_individuals for trajectory in best for command in trajectory]
+    first_departure = min(all_departure_times) if all_departure_times else float('inf')
+    last_departure = max(all_departure_times) if all_departure_times else float('inf')
+    dt_interval = last_departure - first_departure
+
+    population_layer = [] if population_layer is None else population_layer
+    if len(best_individuals) >= population_size:
+        population_layer.extend(best_individuals[:population_size]) # Prend uniquement le nécessaire
+    else:
+        population_layer.extend(best_individuals)
+        # Complétion avec un partial_shuffle progressif (dt croissant) de copies aléatoires des meilleurs individus
+        for i in range(population_size - len(population_layer)):
+            dt = (dt_interval / interval_value) * (i + 1)
+            population_layer.append(_partial_shuffle(generator.choice(best_individuals), dt, first_departure, last_departure, generator))
+    return population_layer
+
+# Etat d'un processus de layers, initialise une fois par _initialize_window_worker
+_worker_stop: Event = None
+
+def _initialize_window_worker(stop: Event) -> None:
+    global _worker_stop
+    _worker_stop = stop
+
+def _run_window_layers(scenario: Scenario, layers: List[WindowLayer], possible_speeds: np.ndarray, interval_value: int,
+                       generator: np.random.Generator, deadline: float = float('inf')) -> Tuple[List[List[List[DataStorage]]], List[float]]:
+    """Layers d'un intervalle, evaluees sur son scenario (reste de la flotte fige) avec les operateurs vectorises
+    (cf. AlgorithmGeneticVectorized), enchainees comme dans OptimizedGeneticAlgorithm.run_window_layers: chaque layer
+    part de la population de l'intervalle construite avec les meilleurs individus des layers precedentes
+    (cf. _extend_population_layer, copies decalees tirees avec <generator>).
+    Renvoie la population de l'intervalle et la meilleure fitness de chaque layer.
+
+    Ce n'est pas le run des AlgorithmGeneticBase des layers: la mutation est celle de Population.mutate, sans cache
+    des fitnesses ni methodes redefinies par une sous-classe de layer. Les generations s'arretent a l'arret demande
+    par le processus principal (cf. _initialize_window_worker) ou a <deadline> (timestamp)."""
+    def is_stopped() -> bool:
+        return (_worker_stop is not None and _worker_stop.is_set()) or datetime.now().timestamp() >= deadline
+
+    population_layer, best_fitnesses = None, []
+    for layer in layers:
+        if population_layer is not None and is_stopped():
+            break
+        def evaluate(individuals: List[List[List[DataStorage]]]) -> List[float]:
+            return [scenario.evaluate(individual, layer.objective).get_value() for individual in individuals]
+
+        population = layer.population if population_layer is None else Population.from_individuals(population_layer, scenario.aircraft_ids)
+        mutation_rate = layer.mutation_rate
+        fitnesses = np.asarray(evaluate(population.to_individuals()), dtype=float)
+        for _ in range(layer.generations):
+            if is_stopped():
+                break
+            mutation_rate = max(0.01, mutation_rate * 0.99) # Mutation rate evolutif
+            population, fitnesses = population.next_generation(fitnesses, evaluate, layer.generator,
+                                                               population_size=layer.population_size,
+                                                               crossover_rate=layer.crossover_rate,
+                                                               mutation_rate=mutation_rate,
+                                                               possible_speeds=possible_speeds,
+                                                               is_minimise=layer.is_minimise)
+        best_fitness = float(fitnesses.min() if layer.is_minimise else fitnesses.max())
+        best_fitnesses.append(best_fitness)
+        population_layer = _extend_population_layer(population_layer, population.to_individuals(np.flatnonzero(fitnesses == best_fitness).tolist()),
+                                                    layer.population_size, interval_value, generator)
+    return population_layer, best_fitnesses
+
 
 @AAlgorithm.register_algorithm
 class OptimizedGeneticAlgorithm(AlgorithmGeneticBase):
-    
+    # Intervalle (s) de verification de l'arret et du timeout pendant les layers en parallele
+    POLL_INTERVAL = 0.1
+
     def __init__(self, 
                  data: List['ASimulatedAircraft'],
                  is_minimise: bool = True,
@@ -26,6 +131,7 @@ class OptimizedGeneticAlgorithm(AlgorithmGeneticBase):
                  crossover_rate: float = 0.8,
                  interval_value: int = 5,
                  time_window: time = time(hour=0, minute=20, second=0),
+                 window_jobs: int = 1,
                  **kwargs):
         
         super().__init__(data=data, is_minimise=is_minimise, verbose=verbose, 
@@ -39,6 +145,9 @@ class OptimizedGeneticAlgorithm(AlgorithmGeneticBase):
 
         self.__interval_type: str = "group" # or'time'
         self.__interval_value = interval_value
+        # Processus pour les layers des intervalles (1: les layers elles-memes, une par une dans ce processus;
+        # sinon, <= 0 pour un par coeur: operateurs vectorises en parallele, cf. _run_window_layers)
+        self.__window_jobs = window_jobs if window_jobs > 0 else os.cpu_count()
     
     @override
     def set_layers(self, layers: List['AlgorithmGeneticBase']) -> None:
@@ -99,7 +208,8 @@ class OptimizedGeneticAlgorithm(AlgorithmGeneticBase):
         return self.aircraft_intervals
 
 
-    def partial_shuffle(self, solution: List[List[DataStorage]], dt: int, first_departure: float, last_departure: float) -> List[List[DataStorage]]:
+    def partial_shuffle(self, solution: List[List[DataStorage]], dt: int, first_departure: float, last_departure: float,
+                        generator: np.random.Generator = None) -> List[List[DataStorage]]:
         """
         Décale aléatoirement les temps des commandes de chaque avion dans la solution,
         en s'assurant que les temps restent dans l'intervalle [first_departure, last_departure].
@@ -108,46 +218,17 @@ class OptimizedGeneticAlgorithm(AlgorithmGeneticBase):
         :param dt: Valeur maximale de décalage (chaque commande est décalée entre -dt et +dt)
         :param first_departure: Temps minimum autorisé pour la première commande de chaque avion
         :param last_departure: Temps maximum autorisé pour la dernière commande de chaque avion
+        :param generator: Generateur des decalages (celui de l'algorithme par defaut)
         :return: Une nouvelle version de la solution avec les commandes ajustées
         """
-        shuffled_solution = []
-
-        for old_commands in solution:
-            delayed_aircraft = []
-
-            # Générer un décalage aléatoire entre -dt et +dt
-            delta_t = self.get_generator().uniform(-dt, dt)
-
-            for old_command in old_commands:
-                new_time = old_command.time + delta_t
-
-                # Assurer que le temps reste dans les bornes [first_departure, last_departure]
-                new_time = max(first_departure, min(new_time, last_departure))
-
-                new_command = DataStorage(
-                    id=old_command.id,
-                    speed=old_command.speed,
-                    time=new_time
-                )
-                delayed_aircraft.append(new_command)
-
-            shuffled_solution.append(delayed_aircraft)
-
-        return shuffled_solution
+        return _partial_shuffle(solution, dt, first_departure, last_departure, self.get_generator() if generator is None else generator)
     
     def calculate_fitnesses_individual(self, individual: List[List[DataStorage]], parsed_data :List['ASimulatedAircraft']) -> List[float]:
-        """Calcul les differentes fitnesses pour chaque individu de la population"""
-        fitnesses = []
-        for i, aircraft_sim in enumerate(parsed_data):
-            trajectory = individual[i]
-            # La liste de commandes est envoyer a l'avion et celui-ci met a jour son attribut et son TakeOffTime (premier element de la liste)
-            # Les elements de self.get_data() sont modifies en place a travers la methode update_commands
-            # ca re-calcul les differents conflits
-            aircraft_sim.update_commands(trajectory)
-
-        # A calculer apres avoir changer chaque avion 
-        fitnesses.append(self.evaluate()) # Evaluation du critere avec la List[ASimulatedAircraft]
-        return fitnesses
+        """Calcul la fitness d'un individu de l'intervalle parsed_data, evalue avec le reste de la flotte
+        (commandes courantes des autres avions), sans modifier les avions (cf. evaluate_commands)"""
+        trajectories = {id(aircraft_sim): trajectory for aircraft_sim, trajectory in zip(parsed_data, individual)}
+        commands = [trajectories.get(id(aircraft_sim), aircraft_sim.get_data_storages()) for aircraft_sim in self.get_data()]
+        return [self.evaluate_commands(commands).get_value()]
     
 
     def select_all_best_individuals(self, interval_populations: Dict[int, List[List[List[DataStorage]]]]) -> Dict[int, List[List[List[DataStorage]]]]:
@@ -233,60 +314,118 @@ class OptimizedGeneticAlgorithm(AlgorithmGeneticBase):
         return final_population
 
 
-    def create_population_with_layers(self) -> List[List[List[DataStorage]]]:
+    def extend_population_layer(self, population_layer: List[List[List[DataStorage]]], best_individuals: List[List[List[DataStorage]]],
+                                population_size: int, generator: np.random.Generator = None) -> List[List[List[DataStorage]]]:
+        """Ajoute a la population de l'intervalle les meilleurs individus d'une layer, completes jusqu'a <population_size>
+        par des copies decalees (partial_shuffle) tirees avec <generator> (celui de l'algorithme par defaut)"""
+        return _extend_population_layer(population_layer, best_individuals, population_size, self.__interval_value,
+                                        self.get_generator() if generator is None else generator)
+
+    def run_window_layers(self, parsed_data: List['ASimulatedAircraft']) -> List[List[List[DataStorage]]]:
+        """Lance les layers l'une apres l'autre sur l'intervalle parsed_data et renvoie sa population"""
+        population_layer : List[List[List[DataStorage]]] = None
+        for layer_num, layer_algo in enumerate(self.get_layers()):
+
+            self.set_process_time(process_time=datetime.now().timestamp() - self.get_start_time())
+
+            if not self.is_running():
+                break  
+            else :
+                layer_algo.set_data(parsed_data) #envoie des parsed data pour la layer consideré
+                layer_algo.set_background([d for d in self.get_data() if d not in parsed_data])
+                layer_algo.set_cache(self.get_cache()) # Fitnesses partagees entre les layers (contextes distincts)
+                # On recommence les algorithme avec un liste de dataStorage qui contient tout le meilleurs individus
+                # (population generee pour la premiere layer)
+                layer_algo.set_initial_population(None if population_layer is None else deepcopy(population_layer))
+
+                _ = layer_algo.start()
+                self.set_best_fitness(layer_algo.get_best_fitness())
+                population_layer = self.extend_population_layer(population_layer, layer_algo.get_best_results(),
+                                                                layer_algo.get_population_size())
+        return population_layer
+
+    def run_windows_parallel(self, windows: Dict[int, List['ASimulatedAircraft']], intervals: Dict[int, List['ASimulatedAircraft']],
+                             interval_populations: Dict[int, List[List[List[DataStorage]]]]) -> None:
+        """Lance les layers de chaque intervalle de <windows> sur le pool de processus (cf. _run_window_layers)
+        et ajoute la population de chaque intervalle a <interval_populations> des qu'elle arrive.
+        L'arret et le timeout sont transmis aux processus, qui s'arretent a la fin de leur generation en cours;
+        les intervalles pas encore commences sont annules."""
+        layers = self.get_layers()
+        seeds  = np.random.SeedSequence(int(self.get_generator().integers(2**32))).spawn(len(windows))
+        window_ids = {interval: {id(d) for d in parsed_data} for interval, parsed_data in windows.items()}
+        deadline = self.get_start_time() + self.get_timeout_value()
+        context  = get_context("spawn")
+        stop     = context.Event()
+        executor = ProcessPoolExecutor(max_workers=min(self.__window_jobs, len(windows)), mp_context=context,
+                                       initializer=_initialize_window_worker, initargs=(stop,))
+        try:
+            futures = {}
+            for (interval, parsed_data), seed in zip(windows.items(), seeds):
+                layer_seeds  = seed.spawn(len(layers) + 1) # Un generateur par layer + celui des copies decalees
+                aircraft_ids = [d.get_object().get_id_aircraft() for d in parsed_data]
+                # Population generee pour la premiere layer, les suivantes partent de la population de l'intervalle
+                tasks = [WindowLayer(population=Population.from_individuals(layer_algo.generate_initial_population(parsed_data), aircraft_ids)
+                                                if layer_num == 0 else None,
+                                     generations=layer_algo.get_generations(),
+                                     population_size=layer_algo.get_population_size(),
+                                     mutation_rate=layer_algo.get_mutation_rate(),
+                                     crossover_rate=layer_algo.get_crossover_rate(),
+                                     objective=layer_algo.get_objective_function(),
+                                     is_minimise=layer_algo.is_minimisation(),
+                                     generator=np.random.default_rng(layer_seed))
+                         for layer_num, (layer_algo, layer_seed) in enumerate(zip(layers, layer_seeds))]
+                scenario = Scenario.from_data(parsed_data, [d for d in self.get_data() if id(d) not in window_ids[interval]])
+                future = executor.submit(_run_window_layers, scenario, tasks, parsed_data[0].get_possible_speeds(),
+                                         self.__interval_value, np.random.default_rng(layer_seeds[-1]), deadline)
+                futures[future] = interval
+
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=self.POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                if not self.is_running() or self.is_timeout(): # Les layers terminees ont pu etre interrompues
+                    break
+                for future in sorted(done, key=lambda future: futures[future]):
+                    self.__add_window_result(*future.result(), futures[future], intervals, interval_populations)
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def __add_window_result(self, population_layer: List[List[List[DataStorage]]], best_fitnesses: List[float], interval: int,
+                            intervals: Dict[int, List['ASimulatedAircraft']],
+                            interval_populations: Dict[int, List[List[List[DataStorage]]]]) -> None:
+        """Population de l'intervalle construite par ses layers (cf. _run_window_layers), puis point de reprise"""
+        for best_fitness in best_fitnesses:
+            self.set_best_fitness(best_fitness)
+        interval_populations[interval] = population_layer
+
+        progress = 100 * len(interval_populations) / len(intervals)
+        self.set_progress(round(progress, 2))
+        self.set_process_time(process_time=datetime.now().timestamp() - self.get_start_time())
+        self.logger.info(f"Progress in creat_population_with_layers {progress} (interval {interval} done)")
+        self.checkpoint(len(interval_populations), lambda: self.checkpoint_layers_state(interval_populations, intervals), force=True)
+
+    def create_population_with_layers(self, interval_populations: Dict[int, List[List[List[DataStorage]]]] = None) -> List[List[List[DataStorage]]]:
+        """Population initiale issue des layers sur chaque intervalle.
+        Les intervalles de <interval_populations> (ex: d'un point de reprise) ne sont pas recalcules.
+        Avec plusieurs processus (window_jobs), les intervalles sont independants et traites en parallele."""
          # Commencer les layer sur chaque intervalles
-        interval_populations = {}
+        interval_populations = dict(interval_populations or {})
         # Parser les données
         intervals = self.split_intervals()
-        for j, (interval, parsed_data) in enumerate(intervals.items()):
-            population_layer : List[List[List[DataStorage]]] = None
-            
-            progress = 100 * (j + 1 )/len(intervals)
-            self.set_progress(round(progress  , 2))
-            self.logger.info(f"Progress in creat_population_with_layers {progress} ({self.get_progress()})")
-            for layer_num, layer_algo in enumerate(self.get_layers()):
-
-                self.set_process_time(process_time=datetime.now().timestamp() - self.get_start_time())
-
-                if not self.is_running():
-                    break  
-                else :
-                    layer_algo.set_data(parsed_data) #envoie des parsed data pour la layer consideré
-                    # On recommence les algorithme avec un liste de dataStorage qui contient tout le meilleurs individus  
-                    if not layer_algo.has_initial_population(): 
-                        layer_algo.set_initial_population(population_layer)
-
-                    _ = layer_algo.start()
-                    best_individuals = layer_algo.get_best_results()
-                    number_of_aircraft_per_window = self.__interval_value
-
-                    self.set_best_fitness(layer_algo.get_best_fitness())
-
-                    # Création de la prochaine population           
-                    all_departure_times = [command.time for best in best_individuals for trajectory in best for command in trajectory]  
-                    first_departure = min(all_departure_times) if all_departure_times else float('inf')
-                    last_departure = max(all_departure_times) if all_departure_times else float('inf')  
-                    dt_interval = last_departure - first_departure
-                    max_iter = layer_algo.get_population_size()
-
-                    # Pour la diversité 
-                    if population_layer == None:
-                        population_layer = []
-                    if len(best_individuals) >= max_iter:
-                        population_layer.extend(best_individuals[:max_iter])  # Prend uniquement le nécessaire
-                    else:
-                        population_layer.extend(best_individuals)  # Ajouter tous les meilleurs disponibles
-
-                        # Complétion avec un `partial_shuffle` progressif
-                        remaining_slots = max_iter - len(population_layer)
-                        for i in range(remaining_slots):
-                            dt = (dt_interval / number_of_aircraft_per_window) * (i + 1)  # Augmentation progressive de dt
-                            modified_solution = self.get_generator().choice(best_individuals) # Copie aléatoire d'un meilleur individu
-                            # Application du partial_shuffle avec dt croissant
-                            modified_solution = self.partial_shuffle(modified_solution, dt, first_departure, last_departure)
-                            population_layer.append(modified_solution)
-
-            interval_populations[interval] = population_layer 
+        windows = {interval: parsed_data for interval, parsed_data in intervals.items() if interval not in interval_populations}
+        if self.__window_jobs > 1 and len(windows) > 1:
+            self.run_windows_parallel(windows, intervals, interval_populations)
+        else:
+            for j, (interval, parsed_data) in enumerate(intervals.items()):
+                progress = 100 * (j + 1 )/len(intervals)
+                self.set_progress(round(progress  , 2))
+                self.logger.info(f"Progress in creat_population_with_layers {progress} ({self.get_progress()})")
+                if interval in interval_populations:
+                    continue
+
+                interval_populations[interval] = self.run_window_layers(parsed_data)
+                if self.is_running(): # Point de reprise des intervalles termines
+                    self.checkpoint(j + 1, lambda: self.checkpoint_layers_state(interval_populations, intervals), force=True)
             
         #Pour chaque intervalle recuperer les meilleurs elements 
         best_individuals_per_interval = self.select_all_best_individuals(interval_populations) 
@@ -295,6 +434,13 @@ class OptimizedGeneticAlgorithm(AlgorithmGeneticBase):
         return final_population
 
     
+    def checkpoint_layers_state(self, interval_populations: Dict[int, List[List[List[DataStorage]]]],
+                                intervals: Dict[int, List['ASimulatedAircraft']]) -> Dict[str, Any]:
+        """Etat d'un point de reprise pendant les layers: populations des intervalles termines (cf. Population)"""
+        return {"interval_populations": {interval: Population.from_individuals(population,
+                                                                               [d.get_object().get_id_aircraft() for d in intervals[interval]])
+                                         for interval, population in interval_populations.items()}}
+
     @override
     def run(self) -> List[List[DataStorage]]:
         try : 
@@ -304,12 +450,22 @@ class OptimizedGeneticAlgorithm(AlgorithmGeneticBase):
 
             self.set_progress(0.)
             self.set_start_time(start=datetime.now().timestamp())
-
-            # Récuperer la population final après les differente layers 
-            final_population = self.create_population_with_layers()
-            
-            # algo genetique generale
-            self.set_initial_population(final_population)
+            self.update_scenario() # Etat de la flotte au demarrage pour calculate_fitnesses_individual
+
+            # Point de reprise pendant les layers, sinon pendant l'algorithme genetique general (les layers sont faites)
+            snapshot = self.get_resume_snapshot()
+            if snapshot is None or "interval_populations" in snapshot["state"]:
+                interval_populations = {}
+                if snapshot is not None:
+                    interval_populations = {interval: population.to_individuals()
+                                            for interval, population in self.pop_resume_snapshot()["state"]["interval_populations"].items()}
+                    self.logger.info(f"Resume layers with intervals {list(interval_populations)} done")
+
+                # Récuperer la population final après les differente layers 
+                final_population = self.create_population_with_layers(interval_populations)
+
+                # algo genetique generale
+                self.set_initial_population(final_population)
             #best_individual = self.run_algo_genetic(final_population)
 
             best_individual = super().run()
@@ -1,24 +1,127 @@
-from ray import tune
-from ray.tune.schedulers import ASHAScheduler
-from typing import Dict, Any, List
+from algorithm.interface.IAlgorithm import AAlgorithm
+from algorithm.interface.ISimulatedObject import ASimulatedAircraft
+from algorithm.interface.IObjective import AObjective
+from algorithm.concrete.genetic.genetique import AlgorithmGeneticBase
+from model.aircraft.aircraft import Aircraft
+from model.conflict_manager import ConflictManager
 
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from multiprocessing import get_context
+from multiprocessing.synchronize import Event
+from typing import Dict, Any, List, Optional, Tuple
 from typing_extensions import override
 
-from algorithm.interface.IAlgorithm import AAlgorithm
-from algorithm.concrete.genetic.genetique import AlgorithmGeneticBase
-from algorithm.interface.ISimulatedObject import ASimulatedAircraft
-import ray
+import os
+import tempfile
+import threading
 import time
-from ray.air import session
+import numpy as np
+
+
+@dataclass
+class Trial:
+    """Essai d'une configuration d'hyperparametres. Son point de reprise (cf. AAlgorithm.checkpoint) est ecrit a la fin
+    de chaque palier: une promotion au palier suivant reprend les generations au lieu de recommencer,
+    dans n'importe quel processus."""
+    trial_id: int
+    config: Dict[str, Any]
+    checkpoint: str                 # Fichier du point de reprise de l'AlgorithmGeneticBase de l'essai
+    seed: np.random.SeedSequence    # Graine des generateurs de l'essai (algorithme et avions), a sa creation
+    generations: int = 0            # Generations deja faites
+    rung: int = -1                  # Dernier palier atteint
+    fitness: Optional[float] = None # Meilleure fitness au dernier palier
+
+
+# Etat d'un processus d'essais, initialise une fois par _initialize_trial_worker
+_worker_data: List[ASimulatedAircraft] = None
+_worker_objective: AObjective = None
+_worker_manager: ConflictManager = None
+_worker_stop: Event = None
+
+def _initialize_trial_worker(data: List[ASimulatedAircraft], objective: AObjective, time_threshold: float, stop: Event) -> None:
+    """Copie de la flotte (avions, balises et generateurs) et son ConflictManager, propres au processus"""
+    global _worker_data, _worker_objective, _worker_manager, _worker_stop
+    _worker_data, _worker_objective, _worker_stop = data, objective, stop
+    aircrafts = [aircraft_sim.get_object() for aircraft_sim in data]
+    balises = {balise.get_name(): balise for aircraft in aircrafts for balise in aircraft.get_flight_plan()}
+    _worker_manager = ConflictManager(time_threshold=time_threshold)
+    _worker_manager.register_fleet(aircrafts=aircrafts, balises=list(balises.values()))
+    Aircraft.register_observer(_worker_manager)
+
+def _stop_when_requested(algorithm: AAlgorithm, finished: threading.Event) -> None:
+    """Arrete l'algorithme de l'essai quand le processus principal demande l'arret"""
+    while not finished.is_set():
+        if _worker_stop.wait(timeout=0.1):
+            algorithm.stop()
+            return
+
+def _run_trial(trial: Trial, generations: int, is_minimise: bool, simulation_duration: float, deadline: float) -> Tuple[Optional[float], bool]:
+    """Fait tourner l'AlgorithmGeneticBase de l'essai jusqu'a <generations> generations (cumulees), a partir de
+    son point de reprise s'il a deja atteint un palier, et ecrit le point de reprise final.
+    Renvoie la meilleure fitness et False si le run est interrompu (arret, timeout)"""
+    algorithm = AlgorithmGeneticBase(data=_worker_data, is_minimise=is_minimise,
+                                     population_size=trial.config["population_size"], generations=generations,
+                                     mutation_rate=trial.config["mutation_rate"],
+                                     crossover_rate=trial.config["crossover_rate"])
+    algorithm.set_objective_function(_worker_objective)
+    algorithm.set_simulation_duration(simulation_duration)
+    algorithm.set_timeout_value(max(deadline - time.time(), 0.))
+    if trial.rung >= 0:
+        algorithm.resume(trial.checkpoint)
+    else: # Generateurs propres a l'essai: algorithme et avions
+        seeds = trial.seed.spawn(len(_worker_data) + 1)
+        algorithm.get_generator().bit_generator.state = np.random.default_rng(seeds[0]).bit_generator.state
+        for aircraft_sim, seed in zip(_worker_data, seeds[1:]):
+            aircraft_sim.get_object().get_random_generator().bit_generator.state = np.random.default_rng(seed).bit_generator.state
+    algorithm.set_checkpoint(trial.checkpoint, interval=float('inf')) # Seul le point de reprise final est ecrit
+    if _worker_stop.is_set():
+        return None, False
+
+    finished = threading.Event()
+    watcher  = threading.Thread(target=_stop_when_requested, args=(algorithm, finished), daemon=True)
+    watcher.start()
+    try:
+        result = algorithm.start()
+    finally:
+        finished.set()
+        watcher.join()
+    if isinstance(result, Exception):
+        raise result
+    return algorithm.get_best_fitness(), algorithm.get_progress() >= 100 # Sinon arret ou timeout avant le palier
+
 
 @AAlgorithm.register_algorithm
 class HyperbandOptimizer(AAlgorithm):
+    """Optimisation des hyperparametres de l'algorithme genetique par successive halving asynchrone (ASHA).
+
+    Le budget d'un essai est son nombre de generations. Les paliers sont grace_period * reduction_factor**k
+    (<= max_epochs). Des qu'un processus est libre, un essai ayant atteint un palier est promu au suivant s'il est
+    dans le meilleur 1/reduction_factor des essais termines a ce palier; sinon un nouvel essai est tire
+    (num_samples au plus). Chaque palier d'un essai est un run de AlgorithmGeneticBase jusqu'au nombre de generations
+    du palier, dans un pool de n_jobs processus (0: un par coeur) ayant chacun une copie de la flotte.
+    Le point de reprise de l'essai (population, meilleurs individus, generateurs, cf. checkpoint_state) est
+    ecrit a la fin du palier: un essai promu le reprend, quel que soit le processus.
+    Renvoie la meilleure configuration (meilleure fitness au dernier palier atteint par chaque essai).
+    """
+    # Liste: choix uniforme, tuple: loi uniforme sur l'intervalle
+    SEARCH_SPACE = {
+        "population_size": [10, 20, 30, 40],
+        "mutation_rate": (0.01, 0.3),
+        "crossover_rate": (0.5, 1.0),
+    }
+    # Intervalle (s) de verification de l'arret et du timeout pendant les essais
+    POLL_INTERVAL = 0.1
+
     def __init__(self,
                  data: List['ASimulatedAircraft'],
                  is_minimise: bool = True,
                  verbose: bool = False,
                  num_samples: int = 20,
                  max_epochs: int = 100,
+                 grace_period: int = 10,
+                 reduction_factor: int = 3,
+                 n_jobs: int = 0,
                  **kwargs):
         """
         Initialise l'optimiseur Hyperband.
@@ -29,75 +132,137 @@ class HyperbandOptimizer(AAlgorithm):
         :param timeout: Temps maximum d'exécution en secondes.
         :param num_samples: Nombre d'expériences à tester.
         :param max_epochs: Nombre max de générations pour l'optimisation.
-        :param algorithm_class: Classe de l'algorithme génétique à optimiser.
+        :param grace_period: Nombre de générations du premier palier.
+        :param reduction_factor: Un essai sur reduction_factor est promu au palier suivant.
+        :param n_jobs: Nombre de processus, donc d'essais en parallèle (0: un par coeur).
         """
         super().__init__(data=data, is_minimise=is_minimise, verbose=verbose, **kwargs)
-        
-        self.num_samples = num_samples
-        self.max_epochs = max_epochs
-        self.search_space = {
-            "population_size": tune.choice([10, 20, 30, 40]),
-            "generations": tune.choice([10, 20, 30]),
-            "mutation_rate": tune.uniform(0.01, 0.3),
-            "crossover_rate": tune.uniform(0.5, 1.0),
-        }
-        
-        ray.init(local_mode=True)  # Mode mono-thread
-        self.progress = 0
-
-    def evaluate(self, config: Dict[str, Any]):
-        """
-        Exécute l'algorithme génétique avec les hyperparamètres donnés et retourne sa performance.
-        """
-        self.progress += 1
-        #self.set_process(round(self.progress * 100 / self.num_samples, 2))
-        #self.set_process_time(time.time())
-        
-        algo = AlgorithmGeneticBase(
-            data=self.get_data(),
-            population_size=config["population_size"],
-            generations=config["generations"],
-            mutation_rate=config["mutation_rate"],
-            crossover_rate=config["crossover_rate"],
-            is_minimise=True,
-            verbose = True,
-        )
-
-        algo.set_objective_function(self.get_objective_function())
-        algo.start()
-        best_fitness = algo.get_best_fitness()
-        print(best_fitness)
-        
-        session.report({"fitness": float(best_fitness)})
-
-    def optimize(self):
+        if not 0 < grace_period <= max_epochs or reduction_factor < 2:
+            error = f"expected 0 < grace_period <= max_epochs and reduction_factor >= 2, " \
+                    f"got grace_period={grace_period}, max_epochs={max_epochs}, reduction_factor={reduction_factor}"
+            raise ValueError(error)
+
+        self.num_samples      = num_samples
+        self.max_epochs       = max_epochs
+        self.grace_period     = grace_period
+        self.reduction_factor = reduction_factor
+        self.n_jobs           = n_jobs if n_jobs > 0 else os.cpu_count()
+        self.__trials: List[Trial] = []
+        self.__best_trial: Trial = None
+
+    def get_rungs(self) -> List[int]:
+        """Nombre de generations cumulees de chaque palier"""
+        rungs = [self.grace_period]
+        while rungs[-1] * self.reduction_factor <= self.max_epochs:
+            rungs.append(rungs[-1] * self.reduction_factor)
+        return rungs
+
+    def get_trials(self) -> List[Trial]: return self.__trials
+    def get_best_config(self) -> Dict[str, Any]:
+        return None if self.__best_trial is None else self.__best_trial.config
+
+    def sample_config(self) -> Dict[str, Any]:
+        """Tire une configuration dans SEARCH_SPACE"""
+        config = {}
+        for name, domain in self.SEARCH_SPACE.items():
+            if isinstance(domain, tuple):
+                config[name] = float(self.get_generator().uniform(*domain))
+            else:
+                config[name] = domain[int(self.get_generator().integers(len(domain)))]
+        return config
+
+    def __new_trial(self, seed: np.random.SeedSequence, directory: str) -> Trial:
+        trial_id = len(self.__trials)
+        trial = Trial(trial_id=trial_id, config=self.sample_config(), seed=seed,
+                      checkpoint=os.path.join(directory, f"trial_{trial_id}.ckpt"))
+        self.__trials.append(trial)
+        return trial
+
+    def __next_job(self, results: List[Dict[int, float]], promoted: List[set], seeds: List[np.random.SeedSequence],
+                   directory: str) -> Optional[Tuple[Trial, int]]:
+        """Prochain (essai, palier): promotion depuis le palier le plus haut possible, sinon nouvel essai"""
+        sign = 1 if self.is_minimisation() else -1
+        for k in reversed(range(len(results) - 1)):
+            completed = results[k]
+            top = sorted(completed, key=lambda trial_id: sign * completed[trial_id])[:len(completed) // self.reduction_factor]
+            for trial_id in top:
+                if trial_id not in promoted[k]:
+                    promoted[k].add(trial_id)
+                    return self.__trials[trial_id], k + 1
+        if len(self.__trials) < self.num_samples:
+            return self.__new_trial(seeds[len(self.__trials)], directory), 0
+        return None
+
+    def optimize(self) -> Dict[str, Any]:
         """
         Lance l'optimisation Hyperband sur les hyperparamètres de l'algorithme génétique.
         """
-        scheduler = ASHAScheduler(
-            metric="fitness",
-            mode="min" if True else "max",
-            max_t=self.max_epochs,
-            grace_period=10,
-            reduction_factor=3
-        )
-        
-        analysis = tune.run(
-            self.evaluate,
-            config=self.search_space,
-            num_samples=self.num_samples,
-            scheduler=scheduler,
-            max_concurrent_trials=1,
-        )
-        
-        best_config = analysis.get_best_config(metric="fitness", mode="min" if True else "max")
-        print("Meilleurs hyperparamètres trouvés :", best_config)
+        rungs    = self.get_rungs()
+        results  = [{} for _ in rungs]     # Fitness de chaque essai ayant atteint le palier
+        promoted = [set() for _ in rungs]  # Essais deja promus depuis le palier
+        seeds    = np.random.SeedSequence(int(self.get_generator().integers(2**32))).spawn(self.num_samples)
+        budget   = self.num_samples * self.grace_period * len(rungs) # Ordre de grandeur du budget total d'ASHA
+        spent    = 0
+        sign     = 1 if self.is_minimisation() else -1
+        deadline = self.get_start_time() + self.get_timeout_value()
+        running: Dict[Future, Tuple[Trial, int]] = {}
+
+        context  = get_context("spawn")
+        stop     = context.Event()
+        with tempfile.TemporaryDirectory(prefix="hyperband_") as directory:
+            executor = ProcessPoolExecutor(max_workers=self.n_jobs, mp_context=context, initializer=_initialize_trial_worker,
+                                           initargs=(self.get_data(), self.get_objective_function(),
+                                                     self.get_scenario().time_threshold, stop))
+            try:
+                while True:
+                    while len(running) < self.n_jobs and self.is_running() and not self.is_timeout():
+                        job = self.__next_job(results, promoted, seeds, directory)
+                        if job is None:
+                            break
+                        trial, rung = job
+                        future = executor.submit(_run_trial, trial, rungs[rung], self.is_minimisation(),
+                                                 self.get_simulation_duration(), deadline)
+                        running[future] = (trial, rung)
+                    if not running:
+                        break
+
+                    done, _ = wait(running, timeout=self.POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    if not self.is_running() or self.is_timeout():
+                        break
+                    for future in sorted(done, key=lambda future: running[future][0].trial_id):
+                        trial, rung = running.pop(future)
+                        fitness, completed = future.result()
+                        if not completed: # Essai interrompu avant le palier
+                            continue
+                        spent += rungs[rung] - trial.generations
+                        trial.generations, trial.rung, trial.fitness = rungs[rung], rung, fitness
+                        results[rung][trial.trial_id] = trial.fitness
+                        if self.__best_trial is None or sign * trial.fitness < sign * self.__best_trial.fitness:
+                            self.__best_trial = trial
+                        self.set_best_critere(self.__best_trial.fitness)
+
+                        if self.is_verbose():
+                            self.logger.info(f"Trial {trial.trial_id} {trial.config}: fitness {trial.fitness} "
+                                             f"after {trial.generations} generations (rung {rung + 1}/{len(rungs)})")
+                    self.set_progress(min(round(100 * spent / budget, 1), 99.))
+                    self.set_process_time(process_time=time.time() - self.get_start_time())
+            finally:
+                stop.set()
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        self.set_progress(100.)
+        best_config = self.get_best_config()
+        self.logger.info(f"Meilleurs hyperparamètres trouvés : {best_config} "
+                         f"({len(self.__trials)} essais, {spent} generations, paliers {rungs})")
         return best_config
-    
+
     @override
     def run(self):
         """
         Exécute l'optimisation et retourne les meilleurs hyperparamètres trouvés.
         """
         self.set_start_time(start=time.time())
-        return self.optimize()
+        best_config = self.optimize()
+        self.stop()
+        self.reinitialize_data()
+        return best_config
@@ -1,16 +1,32 @@
 from algorithm.interface.ISimulatedObject import ASimulatedAircraft
+from algorithm.interface.IObjective import IncrementalObjectiveState
 from model.aircraft.storage import DataStorage
 
 from logging_config import setup_logging
 
-from typing import List, Callable
-from copy import deepcopy
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Callable
 
 import numpy as np
 
+
+@dataclass(frozen=True)
+class Move:
+    """Modification des commandes d'un objet de l'etat (DataStorage immuables: copies par reference)"""
+    index: int
+    old_commands: Tuple[DataStorage, ...]
+    new_commands: Tuple[DataStorage, ...]
+
+
 class Etat:
     """
         Etat d'un recuit simulé
+
+        Les objets de data portent l'etat courant. Un voisin est une liste de Move (journal d'annulation):
+        accept() les garde et ne retient que les commandes des objets modifies depuis le meilleur etat,
+        reject() les annule objet par objet. Le meilleur etat est une copie compacte (tuples de DataStorage)
+        mise a jour seulement pour les objets modifies (save_best), et restore_best() ne re-applique
+        que les commandes des objets qui en different.
     """
 
     generator = np.random.Generator(bit_generator=np.random.PCG64(seed=123))
@@ -24,18 +40,24 @@ class Etat:
 
         self.dimension: int = len(data)
         self.data           = data
-        # Vector est un vecteur de donnees stockant les valeurs (pas de modification)
-        self.vector: List[DataStorage]    = []
+        # Vector est un vecteur de donnees stockant les commandes courantes de chaque objet
+        self.vector: List[List[DataStorage]] = []
         self.critere = None
 
+        self.__moves: List[Move] = []                              # Voisin en attente de accept/reject
+        self.__previous_critere  = None                            # Critere avant le voisin en attente
+        self.__changes: Dict[int, Tuple[DataStorage, ...]] = {}    # Commandes acceptees depuis le meilleur etat
+        self.__best_vector: List[Tuple[DataStorage, ...]] = []
+        self.__best_critere = None
+
     def initialize_random(self) -> None:
         """Generation d'un etat aleatoire"""
         # Debug : le 25/01/2025 11:16:00
         # Le vecteur d'etat:
         #       - n'est pas encore initialiser, appeler:  obj.initialize()
         #       - est deja initialiser, generer un voisin: obj.obj.generate_neighbor()
-        
-        if len(self.vector) <= 0: 
+
+        if len(self.vector) <= 0:
             for obj in self.data:
                 obj.update_commands(commands=obj.initialize())
                 self.vector.append(obj.get_data_storages())
@@ -45,9 +67,19 @@ class Etat:
                 obj.generate_neighbor() # modification en place des commandes dans obj
                 # la mise a jour des commandes est faite dans generate_neighbor
                 self.vector[i] = obj.get_data_storages()
-
-    def generate_neighborhood(self):
-        """Générer un état voisin."""
+        # Tous les objets ont change: plus de voisin en attente ni de meilleur etat
+        self.__moves.clear()
+        self.__changes.clear()
+        self.__best_vector  = []
+        self.__best_critere = None
+
+    def generate_neighborhood(self, incremental_state: IncrementalObjectiveState = None) -> List[Move]:
+        """Générer un état voisin, en attente de accept() ou reject().
+        Si <incremental_state> est donné, il est mis à jour avec les conflits de chaque objet modifié."""
+        if self.__moves:
+            msg = f"Le voisin precedent doit etre accepte ou rejete avant d'en generer un autre"
+            raise RuntimeError(msg)
+        self.__previous_critere = self.critere
 
         # Selection aleatoire d'un element du vecteur (un ISimulatedObject)
         i = self.generator.integers(low=0, high=self.dimension) # [0, dim - 1]
@@ -55,11 +87,76 @@ class Etat:
         # Generation d'un voisin de cet objet
         for k in range(min(i, j), max(i, j) + 1): # Plusieurs d'un cout
             obji = self.data[k]
-        
+            # generate_neighbor modifie la liste de commandes en place: copie des anciennes commandes
+            old_commands = tuple(obji.get_data_storages())
+
+            if incremental_state is not None: incremental_state.remove(obji)
             obji.generate_neighbor()
+            if incremental_state is not None: incremental_state.add(obji)
             self.vector[k] = obji.get_data_storages()
-            self.data[k] = obji
-        
+            self.__moves.append(Move(index=int(k), old_commands=old_commands, new_commands=tuple(self.vector[k])))
+        return self.__moves
+
+    def accept(self, critere: float) -> None:
+        """Garde le voisin en attente, de critere <critere>"""
+        for move in self.__moves:
+            self.__changes[move.index] = move.new_commands
+        self.__moves.clear()
+        self.critere = critere
+
+    def reject(self, incremental_state: IncrementalObjectiveState = None) -> None:
+        """Annule le voisin en attente: seuls les objets modifies recuperent leurs commandes"""
+        for move in reversed(self.__moves):
+            self.__apply(move.index, move.old_commands, incremental_state)
+        self.__moves.clear()
+        self.critere = self.__previous_critere
+
+    def save_best(self) -> None:
+        """Le meilleur etat devient l'etat courant (seules les commandes modifiees depuis sont copiees)"""
+        if self.__moves:
+            msg = f"Le voisin en attente doit etre accepte ou rejete avant de sauvegarder le meilleur etat"
+            raise RuntimeError(msg)
+        if not self.__best_vector:
+            self.__best_vector = [tuple(commands) for commands in self.vector]
+        else:
+            for index, commands in self.__changes.items():
+                self.__best_vector[index] = commands
+        self.__changes.clear()
+        self.__best_critere = self.critere
+
+    def restore_best(self, incremental_state: IncrementalObjectiveState = None) -> None:
+        """L'etat courant redevient le meilleur etat: seuls les objets qui en different sont mis a jour"""
+        for move in reversed(self.__moves):
+            self.__changes.setdefault(move.index, move.new_commands)
+        self.__moves.clear()
+        for index in self.__changes:
+            self.__apply(index, self.__best_vector[index], incremental_state)
+        self.__changes.clear()
+        self.critere = self.__best_critere
+
+    def load(self, vector: List[List[DataStorage]], critere: float,
+             best_vector: List[List[DataStorage]], best_critere: float) -> None:
+        """Etat courant <vector> (applique a tous les objets) et meilleur etat, ex: d'un point de reprise"""
+        self.vector = []
+        for obj, commands in zip(self.data, vector):
+            obj.update_commands(commands=list(commands))
+            self.vector.append(obj.get_data_storages())
+        self.critere = critere
+        self.__moves.clear()
+        self.__best_vector  = [tuple(commands) for commands in best_vector]
+        self.__best_critere = best_critere
+        self.__changes = {index: tuple(commands) for index, commands in enumerate(vector)
+                          if tuple(commands) != self.__best_vector[index]}
+
+    def __apply(self, index: int, commands: Tuple[DataStorage, ...], incremental_state: IncrementalObjectiveState) -> None:
+        obji = self.data[index]
+        if obji.has_commands(commands): # Commandes inchangees: ni temps ni conflits a recalculer
+            return
+        if incremental_state is not None: incremental_state.remove(obji)
+        obji.update_commands(commands=list(commands)) # Liste propre a l'objet (modifiee en place par generate_neighbor)
+        if incremental_state is not None: incremental_state.add(obji)
+        self.vector[index] = obji.get_data_storages()
+
     def calcul_critere(self, function: Callable) -> float:
         """Evaluation du critere (fonction objectif) prenant une List[ASimulatedAircraft]"""
         if isinstance(function, Callable):
@@ -67,43 +164,28 @@ class Etat:
             return self.critere
 
         msg = f"function argument must be Callable with on parameter of type List[ASimulatedAircraft]"
-        raise TypeError(msg) 
-    
+        raise TypeError(msg)
+
     def get_critere(self) -> float:
         """Renvoie la valeur du crietere de l'etat"""
         return self.critere
 
-    def copy(self, copy_from: 'Etat') -> None:
-        self.vector    = copy_from.vector[:]
-        self.data      = copy_from.data[:]
-        self.dimension = copy_from.dimension
-        self.critere   = copy_from.critere
-
-    def save_state(self, other: 'Etat') -> None:
-        self.vector    = [deepcopy(v) for v in other.vector]
-        self.data      = other.data[:]
-        self.dimension = other.dimension
-        self.critere   = other.critere
-
-    def restore_state(self, other: 'Etat') -> None:
-        self.dimension = other.dimension
-
-        for i in range(self.dimension):
-            ovi = other.vector[i]
-            obji = other.data[i]
-            obji.update_commands(commands=ovi)
-
-            self.vector[i] = ovi
-            self.data[i] = obji
+    def get_best_critere(self) -> float:
+        """Renvoie la valeur du critere du meilleur etat (None s'il n'a pas ete sauvegarde)"""
+        return self.__best_critere
 
     def display(self) -> str:
         """Affichage de l'Etat"""
         msg = f"Critere: {self.critere}"
         msg += f"\n{self.vector}\n"
         return msg
-    
+
     def get_vector(self) -> List[List[DataStorage]]:
         return self.vector
-    
+
+    def get_best_vector(self) -> List[List[DataStorage]]:
+        """Commandes du meilleur etat (nouvelles listes)"""
+        return [list(commands) for commands in self.__best_vector]
+
     def __repr__(self):
-        return self.display()
\ No newline at end of file
+        return self.display()
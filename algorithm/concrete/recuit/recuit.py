@@ -1,5 +1,6 @@
 from algorithm.interface.ISimulatedObject import ASimulatedAircraft
 from algorithm.interface.IAlgorithm import AAlgorithm
+from algorithm.interface.IObjective import AIncrementalObjective, IncrementalObjectiveState
 from algorithm.concrete.recuit.etat import Etat
 from model.aircraft.storage import DataStorage
 
@@ -7,7 +8,7 @@ from utils.controller.argument import method_control_type
 
 from logging_config import setup_logging
 
-from typing import List
+from typing import List, Dict, Any
 from typing_extensions import override
 
 import numpy as np
@@ -15,6 +16,14 @@ from datetime import time, datetime
 
 @AAlgorithm.register_algorithm
 class AlgorithmRecuit(AAlgorithm):
+    """Recuit simule. La temperature initiale est celle qui accepte heat_up_acceptance des transitions:
+        - 'estimate': calculee a partir des ecarts de critere d'un echantillon de heat_up_samples (etat, voisin)
+        - 'loop': temperature multipliee par heat_up_rate jusqu'a atteindre l'acceptation sur number_transitions transitions
+    Le mode 'estimate' se replie sur 'loop' si l'echantillon ne permet pas l'estimation.
+    """
+    HEAT_UP_MODES = ("estimate", "loop")
+    INITIAL_TEMPERATURE = 0.01
+
     @method_control_type(List[ASimulatedAircraft])
     def __init__(self, data: List[ASimulatedAircraft], is_minimise: bool = False, 
                  verbose           : bool = False,
@@ -23,6 +32,8 @@ class AlgorithmRecuit(AAlgorithm):
                  heat_up_rate      : float = 1.5,
                  heat_up_acceptance: float = 0.8,
                  cooling_rate      : float = 0.995,
+                 heat_up_mode      : str = "estimate",
+                 heat_up_samples   : int = 200,
                  **kwargs):
     
         # Attributs generaux
@@ -31,11 +42,17 @@ class AlgorithmRecuit(AAlgorithm):
 
         self.logger = setup_logging(self.__class__.__name__)
 
+        if heat_up_mode not in self.HEAT_UP_MODES:
+            error = f"heat up mode must be one of {self.HEAT_UP_MODES}, got {heat_up_mode}"
+            raise ValueError(error)
+
         # Parametres de l'algorithme Recuit Simule
         self.__nb_transitions = number_transitions
         self.__heat_up_rate   = heat_up_rate
         self.__heat_up_accept = heat_up_acceptance
         self.__cooling_rate   = cooling_rate
+        self.__heat_up_mode   = heat_up_mode
+        self.__heat_up_samples = heat_up_samples
 
         # Timeout
         self.set_timeout_value(self.get_timeout_value())
@@ -58,6 +75,81 @@ class AlgorithmRecuit(AAlgorithm):
                 #self.logger.info(f"yi={yi}, yj={yj} --> delta={delta}, prob:{probability}, boltzmann:{boltzmann} -> {probability < boltzmann}")
                 return probability < boltzmann * accept_pourentage
 
+    def incremental_state(self) -> IncrementalObjectiveState:
+        """Etat incremental de la fonction objective sur les avions courants (None si elle ne le supporte pas):
+        un voisin ne modifiant que quelques avions est evalue en O(conflits de ces avions)"""
+        objective = self.get_objective_function()
+        return objective.incremental_state(self.get_data()) if isinstance(objective, AIncrementalObjective) else None
+
+    def __evaluate_neighbor(self, xj: Etat, incremental_state: IncrementalObjectiveState) -> float:
+        """Genere un voisin de xj (en attente de accept/reject) et renvoie son critere"""
+        xj.generate_neighborhood(incremental_state)
+        if incremental_state is None:
+            return xj.calcul_critere(self.get_objective_function().evaluate)
+        xj.critere = incremental_state.get_value()
+        return xj.critere
+
+    def __is_better(self, yj: float, best: float) -> bool:
+        return yj < best if self.is_minimisation() else yj > best
+
+    def __sample_deltas(self) -> np.ndarray:
+        """Ecarts de critere (voisin - etat, positifs si le voisin est moins bon) de heat_up_samples etats aleatoires"""
+        xi = Etat(self.get_data())
+        deltas = []
+        sign = 1 if self.is_minimisation() else -1
+        for k in range(self.__heat_up_samples):
+            if not self.is_running() or self.is_timeout():
+                break
+            xi.initialize_random()
+            incremental_state = self.incremental_state() # Tous les avions ont change
+            yi = xi.calcul_critere(self.get_objective_function().evaluate) if incremental_state is None \
+                 else incremental_state.get_value()
+            xi.critere = yi
+            yj = self.__evaluate_neighbor(xi, incremental_state)
+            xi.accept(yj)
+            deltas.append(sign * (yj - yi))
+        return np.asarray(deltas, dtype=float)
+
+    @classmethod
+    def temperature_for_acceptance(cls, deltas: np.ndarray, acceptance: float) -> float:
+        """Temperature T >= INITIAL_TEMPERATURE a laquelle la proportion de transitions acceptees,
+        moyenne de min(1, exp(-delta/T)) sur <deltas>, vaut <acceptance> (dichotomie sur log(T)).
+        Renvoie None si elle n'existe pas (echantillon vide, acceptation >= 1 ou aucune transition defavorable)"""
+        deltas = np.asarray(deltas, dtype=float)
+        uphill = deltas[deltas > 0]
+        if len(deltas) == 0 or acceptance >= 1 or len(uphill) == 0:
+            return None
+        def acceptance_rate(temperature: float) -> float:
+            return (len(deltas) - len(uphill) + np.exp(-uphill / temperature).sum()) / len(deltas)
+
+        low = cls.INITIAL_TEMPERATURE
+        if acceptance_rate(low) >= acceptance:
+            return low
+        high = low
+        while acceptance_rate(high) < acceptance:
+            high *= 2
+        for _ in range(60):
+            middle = np.sqrt(low * high)
+            if acceptance_rate(middle) < acceptance: low = middle
+            else: high = middle
+        return float(high)
+
+    def __heat_up_estimate(self) -> float:
+        """Determine the initial temperature from one batch of (state, neighbour) deltas, 'loop' if it fails"""
+        self.set_start_time(start=datetime.now().timestamp())
+        deltas = self.__sample_deltas()
+        temperature = self.temperature_for_acceptance(deltas, self.__heat_up_accept)
+        if temperature is None:
+            self.logger.warning(f"Initial temperature cannot be estimated from {len(deltas)} deltas, fallback to the heat up loop")
+            return self.__heat_up_loop()
+
+        # La boucle aurait fait au moins autant de paliers de number_transitions transitions (2 evaluations chacune)
+        steps = 1 + int(np.ceil(np.log(temperature / self.INITIAL_TEMPERATURE) / np.log(self.__heat_up_rate)))
+        saved = 2 * (steps * self.__nb_transitions - len(deltas))
+        self.logger.info(f"Estimated initial temperature: {temperature} (acceptance {self.__heat_up_accept}, "
+                         f"{2 * len(deltas)} evaluations, about {saved} saved on the heat up loop)")
+        return temperature
+
     def __heat_up_loop(self) -> float:
         """Determine the initial temperature"""
         start_time = datetime.now().timestamp()
@@ -65,12 +157,11 @@ class AlgorithmRecuit(AAlgorithm):
         self.set_start_time(start=start_time)
 
         accept_counter = 0
-        temperature    = 0.01
+        temperature    = self.INITIAL_TEMPERATURE
         accept_rate    = 0.0
 
         # Etat
         xi = Etat(self.get_data())
-        xj = Etat(self.get_data())
 
         while accept_rate < self.__heat_up_accept and self.is_running(): # 80% of transifition must be accepted
             accept_counter    = 0
@@ -79,19 +170,21 @@ class AlgorithmRecuit(AAlgorithm):
                 if not self.is_timeout():
                     # Generation of state point
                     xi.initialize_random()
-                    yi = xi.calcul_critere(self.get_objective_function().evaluate)
+                    incremental_state = self.incremental_state() # Tous les avions ont change
+                    yi = xi.calcul_critere(self.get_objective_function().evaluate) if incremental_state is None \
+                         else incremental_state.get_value()
+                    xi.critere = yi
 
                     # Generation of neighborhood of xi
-                    xj.copy(xi)
-                    xj.generate_neighborhood()
-                    yj = xj.calcul_critere(self.get_objective_function().evaluate)
+                    yj = self.__evaluate_neighbor(xi, incremental_state)
 
-                    # Is neighborhood accepted ?
+                    # Is neighborhood accepted ? (xi est re-tire a la transition suivante: pas d'annulation)
                     #self.logger.info(f"At T={temperature}, yi={yi}, yj={yj}")
                     if self.__accept(yi, yj, temperature):
                         accept_counter += 1
                         # Maj du critiere
                         self.set_best_critere(yj)
+                    xi.accept(yj)
                     #    self.logger.info(f"At T={temperature}, yi={yi}, yj={yj} ({accept_counter}/{self._nb_transitions})")
 
             # Count rate of accepted transitions
@@ -108,15 +201,31 @@ class AlgorithmRecuit(AAlgorithm):
         self.logger.info(f"Start colling at temperature: {initial_temperature}")
 
         xi = Etat(self.get_data())
-        xi.initialize_random()
-        yi = xi.calcul_critere(self.get_objective_function().evaluate)
-        xi.critere = yi
-
-        xj = Etat(self.get_data())
-        best_state = Etat(self.get_data())
+        snapshot = self.pop_resume_snapshot()
+        if snapshot is None:
+            xi.initialize_random()
+            first_step = 0
+        else: # Reprise: etat courant et meilleur etat du point de reprise
+            state = snapshot["state"]
+            xi.load(state["vector"], state["critere"], state["best_vector"], state["best_critere"])
+            Etat.generator.bit_generator.state = state["etat_generator"]
+            first_step = snapshot["step"]
+        incremental_state = self.incremental_state()
+        if snapshot is None:
+            yi = xi.calcul_critere(self.get_objective_function().evaluate) if incremental_state is None \
+                 else incremental_state.get_value()
+            xi.critere = yi
+            xi.save_best()
+        yi = xi.get_critere()
+        self.set_best_critere(xi.get_best_critere())
 
         temperatures = self.__get_all_temperatures(initial_temperature)
+        next_step = first_step
         for i, temperature in enumerate(temperatures):
+            if i < first_step:
+                continue
+            # Point de reprise au debut de chaque palier de temperature
+            self.checkpoint(i, lambda: self.checkpoint_state(xi, initial_temperature))
             pourcentage = round(100*(i+1)/len(temperatures), 1)
             self.set_progress(pourcentage=pourcentage)
 
@@ -127,36 +236,49 @@ class AlgorithmRecuit(AAlgorithm):
                 for k in range(self.__nb_transitions):
                     self.set_process_time(process_time=datetime.now().timestamp()-self.get_start_time())
 
-                    xj.copy(xi)
-                    xj.generate_neighborhood()
-                    yj = xj.calcul_critere(self.get_objective_function().evaluate)
+                    yj = self.__evaluate_neighbor(xi, incremental_state)
 
                     if self.__accept(yi, yj, temperature):
-                        best_state.save_state(xj)
-
-                        xj = xi
+                        xi.accept(yj)
                         yi = yj
-                        # Maj du critiere
-                        self.set_best_critere(yj)
+                        if self.__is_better(yj, xi.get_best_critere()):
+                            xi.save_best()
+                            # Maj du critiere
+                            self.set_best_critere(yj)
 
                         if self.is_verbose():
                             msg = f"Iteration {k}/{self.__nb_transitions} - Temperature: {temperature} - critere: {yi}"
                             self.logger.info(msg)
-                            self.logger.info(f"Etat: {best_state.display()}")
+                    else:
+                        xi.reject(incremental_state) # Seuls les avions du voisin sont recalcules
+                next_step = i + 1
 
+        # Dernier point de reprise (timeout, arret ou fin)
+        self.checkpoint(next_step, lambda: self.checkpoint_state(xi, initial_temperature), force=True)
 
-        self.logger.info(f"End of colling - Before restoring: Best {best_state}")
-        best_state.restore_state(best_state)                    # Maj du critiere
-        self.set_best_critere(best_state.get_critere())
+        self.logger.info(f"End of colling - Before restoring: {xi}")
+        xi.restore_best(incremental_state)
+        self.set_best_critere(xi.get_critere())
 
-        self.logger.info(f"End of colling - After restoring: Best {best_state}")
+        self.logger.info(f"End of colling - After restoring: Best {xi}")
         self.stop()
-        return best_state
+        return xi
+
+    def checkpoint_state(self, xi: Etat, initial_temperature: float) -> Dict[str, Any]:
+        """Etat du recuit pour un point de reprise (entre deux transitions), avec le generateur des voisins (Etat.generator)"""
+        return {"initial_temperature": initial_temperature, "etat_generator": Etat.generator.bit_generator.state,
+                "vector": [list(commands) for commands in xi.get_vector()], "critere": xi.get_critere(),
+                "best_vector": xi.get_best_vector(), "best_critere": xi.get_best_critere()}
 
     @override
     def run(self) -> List[List[DataStorage]]:
-        # Initial Temperature
-        initial_temperature = self.__heat_up_loop()
+        # Initial Temperature (celle du point de reprise si resume a ete appele)
+        snapshot = self.get_resume_snapshot()
+        if snapshot is not None:
+            initial_temperature = snapshot["state"]["initial_temperature"]
+            self.logger.info(f"Resume at temperature step {snapshot['step']} (initial temperature {initial_temperature})")
+        else:
+            initial_temperature = self.__heat_up_estimate() if self.__heat_up_mode == "estimate" else self.__heat_up_loop()
         # Cooling Temperature
         best = self.__cooling_loop(initial_temperature)
         
@@ -164,7 +286,7 @@ class AlgorithmRecuit(AAlgorithm):
         self.reinitialize_data()
         self.logger.info(f"After setting initial value {best}")
         self.stop()
-        return best.get_vector()
+        return best.get_best_vector()
     
 
     def __get_all_temperatures(self, initial: float) -> List[float]:
@@ -0,0 +1,178 @@
+from algorithm.interface.ISimulatedObject import ASimulatedAircraft
+from algorithm.interface.IAlgorithm import AAlgorithm
+from algorithm.interface.IObjective import AObjective
+from algorithm.evaluation import Scenario
+from algorithm.data import SimulatedAircraftImplemented, mutate_commands
+from model.aircraft.storage import DataStorage
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import List
+from typing_extensions import override
+from datetime import time, datetime
+
+import os
+import numpy as np
+
+
+@dataclass
+class Replica:
+    """Chaine de Markov d'une temperature, envoyee a un processus pour chaque serie de transitions puis renvoyee"""
+    commands: List[List[DataStorage]]  # Etat courant: une liste de commandes par avion
+    critere: float
+    generator: np.random.Generator
+    best_commands: List[List[DataStorage]]
+    best_critere: float
+    accepted: int = 0                  # Transitions acceptees depuis le debut
+
+
+# Etat d'un processus de replicas, initialise une fois par _initialize_replica_worker
+_worker_scenario: Scenario = None
+_worker_objective: AObjective = None
+_worker_speeds: np.ndarray = None
+_worker_precision: int = None
+
+def _initialize_replica_worker(scenario: Scenario, objective: AObjective, possible_speeds: np.ndarray, precision: int) -> None:
+    global _worker_scenario, _worker_objective, _worker_speeds, _worker_precision
+    _worker_scenario, _worker_objective, _worker_speeds, _worker_precision = scenario, objective, possible_speeds, precision
+
+def _neighbor(commands: List[List[DataStorage]], generator: np.random.Generator) -> List[List[DataStorage]]:
+    """Voisin d'un etat, comme Etat.generate_neighborhood: les commandes des avions entre deux indices tires
+    au hasard sont modifiees par l'operateur de SimulatedAircraftImplemented.generate_commands (cf. mutate_commands),
+    avec le generateur de la replica au lieu de ceux des avions"""
+    neighbor = list(commands)
+    i, j = generator.integers(0, len(commands), size=2)
+    for k in range(min(i, j), max(i, j) + 1):
+        trajectory = mutate_commands(commands[k], generator, _worker_speeds, _worker_precision,
+                                     SimulatedAircraftImplemented.NB_MAXIMUM_COMMANDS)
+        trajectory.sort(key=lambda c: c.time) # Comme Aircraft.set_commands
+        neighbor[k] = trajectory
+    return neighbor
+
+def _run_replica(replica: Replica, temperature: float, transitions: int, is_minimise: bool) -> Replica:
+    """<transitions> transitions de Metropolis a temperature fixe (meme acceptation que AlgorithmRecuit)"""
+    sign = 1 if is_minimise else -1
+    for _ in range(transitions):
+        commands = _neighbor(replica.commands, replica.generator)
+        critere = _worker_scenario.evaluate(commands, _worker_objective).get_value()
+        delta = sign * (critere - replica.critere)
+        if delta < 0 or replica.generator.random() < np.exp(-delta / temperature):
+            replica.commands, replica.critere = commands, critere
+            replica.accepted += 1
+            if sign * critere < sign * replica.best_critere:
+                replica.best_commands, replica.best_critere = commands, critere
+    return replica
+
+
+@AAlgorithm.register_algorithm
+class AlgorithmRecuitParallelTempering(AAlgorithm):
+    """Recuit simule par echange de replicas (parallel tempering).
+
+    n_replicas chaines evoluent chacune a une temperature fixe, en progression geometrique de
+    max_temperature a min_temperature, dans des processus distincts (scenario fige, cf. Scenario):
+    pas de phase de chauffe. Toutes les <exchange_interval> transitions, les chaines de temperatures
+    voisines echangent leurs etats avec la probabilite min(1, exp((1/Ti - 1/Tj) (Ei - Ej))), en alternant
+    les paires paires et impaires. Chaque chaine fait <number_transitions> transitions au total.
+    Le meilleur etat de toutes les chaines est renvoye; avancement, meilleur critere et timeout
+    sont suivis a chaque echange.
+    """
+    def __init__(self, data: List[ASimulatedAircraft], is_minimise: bool = False,
+                 verbose            : bool = False,
+                 timeout            : time = time(hour=0, minute=2, second=0),
+                 number_transitions : int = 2000,
+                 n_replicas         : int = 4,
+                 min_temperature    : float = 0.01,
+                 max_temperature    : float = 10.,
+                 exchange_interval  : int = 50,
+                 **kwargs):
+        super().__init__(data=data, is_minimise=is_minimise, verbose=verbose, timeout=timeout, **kwargs)
+        if not 0 < min_temperature <= max_temperature:
+            error = f"temperatures must verify 0 < min_temperature <= max_temperature, got {min_temperature} and {max_temperature}"
+            raise ValueError(error)
+        if exchange_interval <= 0 or number_transitions < 0:
+            error = f"exchange interval must be strictly positive and number of transitions positive, got {exchange_interval} and {number_transitions}"
+            raise ValueError(error)
+
+        self.__nb_transitions    = number_transitions
+        self.__n_replicas        = n_replicas if n_replicas > 0 else os.cpu_count()
+        self.__min_temperature   = min_temperature
+        self.__max_temperature   = max_temperature
+        self.__exchange_interval = exchange_interval
+        self.__swaps = np.zeros(max(self.__n_replicas - 1, 0), dtype=int) # Echanges acceptes entre les temperatures i et i+1
+
+    def get_n_replicas(self) -> int: return self.__n_replicas
+    def get_swaps(self) -> np.ndarray: return self.__swaps
+
+    def get_temperatures(self) -> np.ndarray:
+        """Temperatures des chaines, de la plus chaude a la plus froide"""
+        if self.__n_replicas == 1:
+            return np.array([self.__min_temperature])
+        return self.__max_temperature * (self.__min_temperature / self.__max_temperature) ** (np.arange(self.__n_replicas) / (self.__n_replicas - 1))
+
+    def exchange(self, replicas: List[Replica], round_index: int) -> List[Replica]:
+        """Echange les etats des chaines voisines (paires commencant a round_index % 2)"""
+        temperatures = self.get_temperatures()
+        sign = 1 if self.is_minimisation() else -1
+        for i in range(round_index % 2, len(replicas) - 1, 2):
+            # Energies: critere en minimisation, oppose en maximisation
+            log_ratio = (1 / temperatures[i] - 1 / temperatures[i + 1]) * sign * (replicas[i].critere - replicas[i + 1].critere)
+            if log_ratio >= 0 or self.get_generator().random() < np.exp(log_ratio):
+                for name in ("commands", "critere"):
+                    value_i, value_j = getattr(replicas[i], name), getattr(replicas[i + 1], name)
+                    setattr(replicas[i], name, value_j)
+                    setattr(replicas[i + 1], name, value_i)
+                self.__swaps[i] += 1
+        return replicas
+
+    @override
+    def run(self) -> List[List[DataStorage]]:
+        self.set_progress(0.)
+        self.set_start_time(start=datetime.now().timestamp())
+        scenario  = self.update_scenario()
+        objective = self.get_objective_function()
+
+        # Etats initiaux aleatoires (cf. Etat.initialize_random), evalues sans modifier les avions
+        seeds = np.random.SeedSequence(int(self.get_generator().integers(2**32))).spawn(self.__n_replicas)
+        replicas = []
+        for seed in seeds:
+            commands = [aircraft_sim.initialize() for aircraft_sim in self.get_data()]
+            critere  = scenario.evaluate(commands, objective).get_value()
+            replicas.append(Replica(commands=commands, critere=critere, generator=np.random.default_rng(seed),
+                                    best_commands=commands, best_critere=critere))
+        best = min(replicas, key=lambda r: r.best_critere) if self.is_minimisation() else max(replicas, key=lambda r: r.best_critere)
+        best_commands, best_critere = best.best_commands, best.best_critere
+        self.set_best_critere(best_critere)
+
+        rounds = int(np.ceil(self.__nb_transitions / self.__exchange_interval))
+        temperatures = self.get_temperatures()
+        executor = ProcessPoolExecutor(max_workers=min(self.__n_replicas, os.cpu_count()), mp_context=get_context("spawn"),
+                                       initializer=_initialize_replica_worker,
+                                       initargs=(scenario, objective, self.get_data()[0].get_possible_speeds(), self.get_data()[0].PRECISION))
+        try:
+            for round_index in range(rounds):
+                if not self.is_running() or self.is_timeout():
+                    break
+                transitions = min(self.__exchange_interval, self.__nb_transitions - round_index * self.__exchange_interval)
+                futures = [executor.submit(_run_replica, replica, temperature, transitions, self.is_minimisation())
+                           for replica, temperature in zip(replicas, temperatures)]
+                replicas = [future.result() for future in futures]
+
+                for replica in replicas:
+                    if (self.is_minimisation() and replica.best_critere < best_critere) or \
+                       (not self.is_minimisation() and replica.best_critere > best_critere):
+                        best_commands, best_critere = replica.best_commands, replica.best_critere
+                self.set_best_critere(best_critere)
+                replicas = self.exchange(replicas, round_index)
+
+                if self.is_verbose():
+                    self.logger.info(f"Round {round_index + 1}/{rounds} - criteres: {[r.critere for r in replicas]} - best: {best_critere}")
+                self.set_progress(round(100 * (round_index + 1) / rounds, 1))
+                self.set_process_time(process_time=datetime.now().timestamp() - self.get_start_time())
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        self.logger.info(f"Best critere {best_critere}, echanges acceptes par paire de temperatures: {self.__swaps.tolist()}")
+        self.stop()
+        self.reinitialize_data()
+        return best_commands
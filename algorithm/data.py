@@ -8,6 +8,64 @@ from logging_config import setup_logging
 
 import numpy as np
 
+
+def mutate_commands(commands: List[DataStorage], generator: np.random.Generator, possible_speeds: np.ndarray,
+                    precision: int, max_commands: int) -> List[DataStorage]:
+    """Renvoie une copie de <commands> dont 1 a <max_commands> commandes sont modifiees: vitesse tiree dans
+    <possible_speeds> (arrondie a <precision>) et/ou temps de la premiere commande (decollage) decale.
+    Seul <generator> est modifie: operateur commun a SimulatedAircraftImplemented.generate_commands
+    et au recuit par echange de replicas (cf. tempering._neighbor)."""
+    commands = list(commands)
+    # Détermine le nombre maximum de commandes à modifier
+    max_changes = min(len(commands), max_commands)
+
+    # Nombre de commandes à modifier (au moins 1, jusqu'à max_changes)
+    num_changes = generator.integers(1, max_changes + 1)
+
+    # Sélectionne aléatoirement les indices des commandes à modifier
+    indexis = generator.integers(0, max_changes, size=num_changes)
+
+    for i in indexis:
+        # Selectionne la commande à modifier
+        cmd = commands[i]
+
+        # Selectionne le nombre de variable à modifier dans la commande
+        num_vars_to_change = generator.integers(1, 2+1) #3 exclu
+
+        variables = list(VariableName)
+        if num_vars_to_change >= len(variables):
+            vars_to_change = variables
+        else:
+            vars_to_change = generator.choice(variables, size=num_vars_to_change)
+
+        # Chaque variable à modifier
+        time, speed, heading = cmd.time, cmd.speed, cmd.heading
+        for var in vars_to_change:
+            # Selectionne quelle variable
+            if var == VariableName.SPEED:
+                speed = round(generator.choice(possible_speeds), precision)  # Nouvelle vitesse initiale
+            elif var == VariableName.TIME:
+                if i == 0: # Premiere commande : ajustement du temps de depart
+                    # Ajustement si proba de tirer uniforme entre 0 et 1 < 0.1
+                    if generator.random() < 0.5: # seuil a modifier
+                        random_time = generator.uniform(-250.0, 250.0)
+                        time = max(cmd.time + random_time, 0.) # Temps de départ ajusté
+                    else:
+                        random_time = generator.uniform(-25.0, 25.0)
+                        time = max(cmd.time + random_time, 0.) # Temps de départ ajusté
+                    random_time = generator.uniform(-10.0, 10.0)
+                    time = max(cmd.time + random_time, 0.) # Temps de commande ajusté
+            else: # VariableName.HEADING
+                # TO IMPLEMENT
+                continue
+        # Modifie la commande dans la liste
+        commands[i] = DataStorage(id=commands[i].id,
+                                  speed=speed,
+                                  time=time,
+                                  heading=heading)
+    return commands
+
+
 class SimulatedAircraftImplemented(ASimulatedAircraft):
     """Implémentation concrète de ASimulatedAircraft"""
     PRECISION           = 4
@@ -29,12 +87,28 @@ class SimulatedAircraftImplemented(ASimulatedAircraft):
         self.__possible_speeds = np.round(self.__possible_speeds, self.PRECISION)
                 
         self.__commands = aircraft.get_commands()
+        self.__applied_commands = tuple(self.__commands) # Commandes a l'origine du plan de vol timé et des conflits
 
     @override
     def update_commands(self, commands: List[DataStorage], recalcul = True, dt: int = 0) -> None:
         """Met a jour les commandes pour l'avion"""
         self.__aircraft.set_commands(commands=commands, recalcul=recalcul, dt=dt)
         self.__commands = commands
+        self.__applied_commands = tuple(commands)
+
+    @override
+    def has_commands(self, commands: List[DataStorage]) -> bool:
+        """True si <commands> (triees par temps) sont celles appliquees en dernier par update_commands
+        et que l'avion n'a pas recu d'autres commandes depuis (ex: set_commands direct sur l'avion)"""
+        return self.__aircraft.get_commands() is self.__commands and \
+               tuple(sorted(commands, key=lambda c: c.time)) == self.__applied_commands
+
+    @override
+    def bind_commands(self, commands: List[DataStorage]) -> None:
+        """Remplace la liste de commandes par <commands> (cf. has_commands): le plan de vol timé
+        et les conflits de l'avion sont deja ceux de ces commandes, ils ne sont pas recalcules"""
+        self.__aircraft.load_commands(commands)
+        self.__commands = commands
     
     @override
     def initialize(self) -> List[DataStorage]:
@@ -79,6 +153,10 @@ class SimulatedAircraftImplemented(ASimulatedAircraft):
         new_commands = self.generate_commands()
         self.update_commands(new_commands)
     
+    def get_possible_speeds(self) -> np.ndarray:
+        """Vitesses possibles tirees lors de la generation de commandes"""
+        return self.__possible_speeds
+
     @override
     def get_data_storages(self) -> List[DataStorage]:
         """Storage des donnees de l'objet necessaire lors de l'algorithme"""
@@ -104,51 +182,7 @@ class SimulatedAircraftImplemented(ASimulatedAircraft):
         if not self.__commands: # Vérifie si des commandes existent
             return self.initialize()
         
-        # Détermine le nombre maximum de commandes à modifier
-        max_changes = min(len(self.__commands), self.NB_MAXIMUM_COMMANDS)
-
-        # Nombre de commandes à modifier (au moins 1, jusqu'à max_changes)
-        num_changes = self.__random_generator.integers(1, max_changes + 1)
-
-        # Sélectionne aléatoirement les indices des commandes à modifier
-        indexis = self.__random_generator.integers(0, max_changes, size=num_changes)
-        
-        for i in indexis:
-            # Selectionne la commande à modifier
-            cmd = self.__commands[i]
-            
-            # Selectionne le nombre de variable à modifier dans la commande
-            num_vars_to_change = self.__random_generator.integers(1, 2+1) #3 exclu
-
-            variables = list(VariableName)
-            if num_vars_to_change >= len(variables):
-                vars_to_change = variables
-            else:
-                vars_to_change = self.__random_generator.choice(variables, size=num_vars_to_change)
-
-            # Chaque variable à modifier
-            time, speed, heading = cmd.time, cmd.speed, cmd.heading
-            for var in vars_to_change:
-                # Selectionne quelle variable
-                if var == VariableName.SPEED:
-                    speed = self.__generate_random_speed()  # Nouvelle vitesse initiale
-                elif var == VariableName.TIME:
-                    if i == 0: # Premiere commande : ajustement du temps de depart
-                        # Ajustement si proba de tirer uniforme entre 0 et 1 < 0.1
-                        if self.__random_generator.random() < 0.5: # seuil a modifier
-                            random_time = self.__generate_random_time(low=-250.0, high=250.0)
-                            time = max(cmd.time + random_time, 0.) # Temps de départ ajusté 
-                        else:
-                            random_time = self.__generate_random_time(low=-25.0, high=25.0)
-                            time = max(cmd.time + random_time, 0.) # Temps de départ ajusté 
-                        random_time = self.__generate_random_time(low=-10.0, high=10.0)
-                        time = max(cmd.time + random_time, 0.) # Temps de commande ajusté                   
-                else: # VariableName.HEADING
-                    # TO IMPLEMENT
-                    continue
-            # Modifie la commande dans la liste
-            self.__commands[i] = DataStorage(id=self.__commands[i].id, 
-                                            speed=speed,
-                                            time=time,
-                                            heading=heading)
-        return self.__commands
\ No newline at end of file
+        # Modification en place: la liste reste celle de l'avion (cf. has_commands)
+        self.__commands[:] = mutate_commands(self.__commands, self.__random_generator, self.__possible_speeds,
+                                             self.PRECISION, self.NB_MAXIMUM_COMMANDS)
+        return self.__commands
@@ -0,0 +1,255 @@
+from algorithm.interface.ISimulatedObject import ASimulatedAircraft
+from algorithm.interface.IObjective import AObjective
+from model.aircraft.storage import DataStorage
+from model.aircraft.fleet import FleetTiming
+from model.conflict_manager import ConflictInformation, ConflictStore, ConflictKey
+from model.collector import Collector
+from model.balise import Balise
+from model.point import Point
+
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, FrozenSet, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from model.aircraft.aircraft import Aircraft
+
+
+class EvaluatedAircraft:
+    """Avion d'une solution évaluée par Scenario.evaluate: vue en lecture seule, sans lien avec
+    les objets Aircraft. Offre les getters de Aircraft lus par les fonctions objectives, et ceux de
+    ASimulatedAircraft (get_object, get_data_storages): la liste de ces avions remplace data."""
+    def __init__(self, id: int, flight_plan: Tuple[Balise, ...], position: Point,
+                 commands: List[DataStorage], flight_plan_timed: Dict[str, float]):
+        self.__id                = id
+        self.__flight_plan       = flight_plan
+        self.__position          = position
+        self.__commands          = commands
+        self.__flight_plan_timed = flight_plan_timed
+        self.__conflicts: Dict[ConflictKey, ConflictInformation] = {} # Orientés du point de vue de l'avion
+
+    def get_object(self) -> 'EvaluatedAircraft': return self
+    def get_data_storages(self) -> List[DataStorage]: return self.__commands
+
+    def get_id_aircraft(self) -> int: return self.__id
+    def get_commands(self) -> List[DataStorage]: return self.__commands
+    def get_take_off_time(self) -> float: return self.__commands[0].time
+    def get_speed(self) -> float: return self.__commands[0].speed
+    def get_position(self) -> Point: return self.__position
+    def get_flight_plan(self) -> Tuple[Balise, ...]: return self.__flight_plan
+    def get_flight_plan_timed(self) -> Dict[str, float]: return self.__flight_plan_timed
+    def get_arrival_time_on_last_point(self) -> float: return list(self.__flight_plan_timed.values())[-1]
+    def is_in_conflict(self) -> bool: return len(self.__conflicts) > 0
+
+    def get_conflicts(self) -> Collector[List[ConflictInformation]]:
+        """Conflits de l'avion regroupés par id de l'autre avion (cf. Aircraft.get_conflicts)"""
+        conflicts_by_aircraft: Dict[int, List[ConflictInformation]] = {}
+        for conflict in self.__conflicts.values():
+            conflicts_by_aircraft.setdefault(conflict.get_aircraft_two().get_id_aircraft(), []).append(conflict)
+        collector = Collector()
+        for conflict_with, conflicts in conflicts_by_aircraft.items():
+            collector.add(key=conflict_with, value=conflicts)
+        return collector
+
+    def set_conflicts(self, conflict: ConflictInformation) -> None:
+        """Ajoute le conflit (vu depuis cet avion), remplace celui de même paire et balise"""
+        self.__conflicts[ConflictStore.key_of(conflict)] = conflict
+
+    def __hash__(self):
+        return hash(self.__id)
+
+    def __eq__(self, other):
+        if not isinstance(other, EvaluatedAircraft):
+            return False
+        return self.__id == other.get_id_aircraft()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(id={self.__id}, commands={self.__commands})"
+
+
+@dataclass(frozen=True)
+class EvaluationResult:
+    value: float                                 # Valeur de la fonction objective
+    conflicts: Tuple[ConflictInformation, ...]   # Un conflit par (paire d'avions, balise), premier passage en premier
+    aircrafts: Tuple[EvaluatedAircraft, ...]     # Avions de la solution, dans l'ordre du scénario
+
+    def get_value(self) -> float: return self.value
+    def get_conflicts(self) -> Tuple[ConflictInformation, ...]: return self.conflicts
+    def get_aircrafts(self) -> Tuple[EvaluatedAircraft, ...]: return self.aircrafts
+    def get_conflict_keys(self) -> FrozenSet[ConflictKey]:
+        return frozenset(ConflictStore.key_of(conflict) for conflict in self.conflicts)
+
+
+@dataclass(frozen=True)
+class BackgroundAircraft:
+    """Avion du reste de la flotte, aux temps de passage figés: il n'est pas évalué mais
+    les conflits des avions évalués avec lui sont détectés"""
+    id: int
+    route: Tuple[Balise, ...]
+    position: Tuple[float, float, float]
+    commands: Tuple[DataStorage, ...]
+    passage_times: Tuple[float, ...] # Temps de passage dans l'ordre de la route
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Description figée d'une flotte pour évaluer des solutions sans effet de bord.
+
+    Une solution (List[List[DataStorage]], une liste de commandes par avion) est évaluée
+    sans toucher aux Aircraft, Balise ou ConflictManager: temps de passage calculés en une passe
+    (FleetTiming), conflits détectés par un balayage trié par balise (même règle que le
+    ConflictManager: |t1 - t2| <= time_threshold), puis fonction objective appelée sur des
+    EvaluatedAircraft. Les conflits antérieurs au temps courant des deux avions, qu'une mise à jour
+    des commandes n'efface pas, sont repris du stockage de conflits au moment de la création.
+    Les avions du reste de la flotte (background) gardent leurs temps de passage figés: seuls
+    leurs conflits avec les avions évalués comptent, comme lorsqu'une partie de la flotte est optimisée.
+    Le scénario se sérialise (pickle) pour être envoyé à d'autres processus.
+    """
+    aircraft_ids: Tuple[int, ...]
+    routes: Tuple[Tuple[Balise, ...], ...]                          # Balises copiées, sans stockage de conflits partagé
+    start_positions: Tuple[Tuple[float, float, float], ...]         # Positions courantes, départ du calcul des temps
+    past_conflicts: Tuple[Tuple[int, int, float, float, str], ...]  # (id 1, id 2, temps 1, temps 2, balise)
+    time_threshold: float = 60
+    background: Tuple[BackgroundAircraft, ...] = ()
+    _timing: FleetTiming = field(init=False, repr=False, compare=False) # Table des routes distinctes
+    _route_index: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        routes: Dict[Tuple[str, ...], int] = {}
+        route_table, route_index = [], []
+        for route in self.routes:
+            key = tuple(balise.get_name() for balise in route)
+            if key not in routes:
+                routes[key] = len(route_table)
+                route_table.append(list(route))
+            route_index.append(routes[key])
+        object.__setattr__(self, '_timing', FleetTiming(route_table))
+        object.__setattr__(self, '_route_index', np.array(route_index, dtype=int))
+
+    def __getstate__(self) -> dict:
+        # La table des routes est recalculée à la désérialisation
+        return {name: getattr(self, name) for name in ('aircraft_ids', 'routes', 'start_positions', 'past_conflicts',
+                                                       'time_threshold', 'background')}
+
+    def __setstate__(self, state: dict) -> None:
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        self.__post_init__()
+
+    @classmethod
+    def from_data(cls, data: List[ASimulatedAircraft], background: List[ASimulatedAircraft] = (),
+                  time_threshold: float = 60) -> 'Scenario':
+        """Fige l'état courant des avions de data (routes, positions, conflits passés),
+        et celui des avions de background (temps de passage courants)"""
+        balises: Dict[str, Balise] = {}
+        def copy_route(aircraft: 'Aircraft') -> Tuple[Balise, ...]:
+            for balise in aircraft.get_flight_plan():
+                if balise.get_name() not in balises:
+                    balises[balise.get_name()] = balise.deepcopy()
+            return tuple(balises[balise.get_name()] for balise in aircraft.get_flight_plan())
+
+        routes, past_conflicts = [], {}
+        for aircraft_sim in data:
+            aircraft = aircraft_sim.get_object()
+            routes.append(copy_route(aircraft))
+
+            for conflict in aircraft.get_conflict_store().get_by_aircraft(aircraft.get_id_aircraft()):
+                one, two = conflict.get_aircraft_one(), conflict.get_aircraft_two()
+                if conflict.get_conflict_time_one() < one.get_time() and conflict.get_conflict_time_two() < two.get_time():
+                    past_conflicts[ConflictStore.key_of(conflict)] = (one.get_id_aircraft(), two.get_id_aircraft(),
+                                                                      conflict.get_conflict_time_one(), conflict.get_conflict_time_two(),
+                                                                      conflict.get_location().get_name())
+        background = tuple(BackgroundAircraft(id=aircraft.get_id_aircraft(),
+                                              route=copy_route(aircraft),
+                                              position=tuple(aircraft.get_position().getXYZ()),
+                                              commands=tuple(aircraft.get_commands()),
+                                              passage_times=tuple(aircraft.get_flight_plan_timed()[balise.get_name()]
+                                                                  for balise in aircraft.get_flight_plan()))
+                           for aircraft in (aircraft_sim.get_object() for aircraft_sim in background))
+        return cls(aircraft_ids=tuple(aircraft_sim.get_object().get_id_aircraft() for aircraft_sim in data),
+                   routes=tuple(routes),
+                   start_positions=tuple(tuple(aircraft_sim.get_object().get_position().getXYZ()) for aircraft_sim in data),
+                   past_conflicts=tuple(past_conflicts.values()),
+                   time_threshold=time_threshold,
+                   background=background)
+
+    def __len__(self) -> int:
+        return len(self.aircraft_ids)
+
+    def fingerprint(self) -> int:
+        """Empreinte de l'état figé (identique pour deux scénarios évaluant les commandes de la même façon)"""
+        return hash((self.aircraft_ids,
+                     tuple(tuple(balise.get_name() for balise in route) for route in self.routes),
+                     self.start_positions, self.past_conflicts, self.time_threshold,
+                     tuple((other.id, other.passage_times) for other in self.background)))
+
+    def simulate(self, commands: List[List[DataStorage]]) -> List[EvaluatedAircraft]:
+        """Temps de passage et conflits de la solution <commands> (une liste de commandes par avion)"""
+        if len(commands) != len(self):
+            error = f"{self.__class__.__name__} expects commands for {len(self)} aircrafts, got {len(commands)}"
+            raise ValueError(error)
+
+        take_off_times, speeds, command_times, command_speeds = FleetTiming.command_arrays(commands)
+        times = self._timing.compute(route_index=self._route_index,
+                                     take_off_times=take_off_times,
+                                     speeds=speeds,
+                                     command_times=command_times,
+                                     command_speeds=command_speeds,
+                                     start_positions=np.array(self.start_positions, dtype=float)[:, :2])
+
+        aircrafts: List[EvaluatedAircraft] = []
+        passages: Dict[str, List[Tuple[float, int]]] = {} # Balise -> [(temps, indice avion)]
+        for i, (route, cmds) in enumerate(zip(self.routes, commands)):
+            # Même arrondi que le plan de vol timé des avions
+            flight_plan_timed = {balise.get_name(): round(float(t), 2) for balise, t in zip(route, times[i, :len(route)])}
+            for balise_name, passage_time in flight_plan_timed.items():
+                passages.setdefault(balise_name, []).append((passage_time, i))
+            aircrafts.append(EvaluatedAircraft(self.aircraft_ids[i], route, Point(*self.start_positions[i]),
+                                               sorted(cmds, key=lambda c: c.time), flight_plan_timed))
+
+        # Le reste de la flotte suit les avions évalués (indices >= len(self)), il n'est pas renvoyé
+        others: List[EvaluatedAircraft] = []
+        for other in self.background:
+            flight_plan_timed = {balise.get_name(): t for balise, t in zip(other.route, other.passage_times)}
+            for balise_name, passage_time in flight_plan_timed.items():
+                passages.setdefault(balise_name, []).append((passage_time, len(self) + len(others)))
+            others.append(EvaluatedAircraft(other.id, other.route, Point(*other.position), list(other.commands), flight_plan_timed))
+        everyone = aircrafts + others
+
+        by_id = {aircraft.get_id_aircraft(): aircraft for aircraft in everyone}
+        balises = {balise.get_name(): balise for route in self.routes for balise in route}
+        balises.update({balise.get_name(): balise for other in self.background for balise in other.route})
+        def add_conflict(one: EvaluatedAircraft, two: EvaluatedAircraft, time_one: float, time_two: float, balise: Balise) -> None:
+            one.set_conflicts(ConflictInformation(one, two, time_one, time_two, balise))
+            two.set_conflicts(ConflictInformation(two, one, time_two, time_one, balise))
+
+        for id_one, id_two, time_one, time_two, balise_name in self.past_conflicts:
+            if id_one in by_id and id_two in by_id: # Avion hors du scénario: conflit ignoré
+                add_conflict(by_id[id_one], by_id[id_two], time_one, time_two, balises[balise_name])
+
+        for balise_name, entries in passages.items():
+            entries.sort()
+            for j, (time_one, i_one) in enumerate(entries):
+                for time_two, i_two in entries[j + 1:]:
+                    if time_two - time_one > self.time_threshold:
+                        break # Les passages suivants sont trop éloignés dans le temps
+                    if i_one < len(self) or i_two < len(self): # Conflits entre avions du background ignorés
+                        add_conflict(everyone[i_one], everyone[i_two], time_one, time_two, balises[balise_name])
+        return aircrafts
+
+    def evaluate(self, commands: List[List[DataStorage]], objective: AObjective) -> EvaluationResult:
+        """Valeur de la fonction objective et conflits de la solution <commands>"""
+        aircrafts = self.simulate(commands)
+        evaluated_ids = set(self.aircraft_ids)
+        conflicts: Dict[ConflictKey, ConflictInformation] = {}
+        for aircraft in aircrafts:
+            for conflicts_with in aircraft.get_conflicts().get_all().values():
+                for conflict in conflicts_with:
+                    # Orienté par le premier passage, sauf avec un avion du background (vu depuis l'avion évalué)
+                    if conflict.get_conflict_time_one() <= conflict.get_conflict_time_two() or \
+                            conflict.get_aircraft_two().get_id_aircraft() not in evaluated_ids:
+                        conflicts.setdefault(ConflictStore.key_of(conflict), conflict)
+        return EvaluationResult(value=objective.evaluate(aircrafts),
+                                conflicts=tuple(conflicts[key] for key in sorted(conflicts)),
+                                aircrafts=tuple(aircrafts))
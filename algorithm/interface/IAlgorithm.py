@@ -1,6 +1,8 @@
 import inspect
 from algorithm.interface.ISimulatedObject import ISimulatedObject, ASimulatedAircraft
 from algorithm.interface.IObjective import IObjective, AObjective
+from algorithm.evaluation import Scenario, EvaluationResult
+from algorithm.checkpoint import CheckpointWriter, CHECKPOINT_VERSION
 from model.aircraft.storage import DataStorage
 
 from utils.conversion import sec_to_time, time_to_sec
@@ -9,7 +11,7 @@ from logging_config import setup_logging
 from utils.controller.database_dynamique import MetaDynamiqueDatabase
 
 from abc import ABC, abstractmethod
-from typing import List, Type, Any
+from typing import List, Type, Any, Dict, Callable, Optional
 from typing_extensions import override
 from copy import deepcopy
 from datetime import time, datetime
@@ -122,6 +124,14 @@ class AAlgorithm(IAlgorithm):
         self.__name = self.__class__.__name__       
         self.__best_critere = float('inf') if is_minimise else -float('inf')
         self.__simulation_duration : float= None
+        self.__scenario: Scenario = None # Etat fige de data pour l'evaluation sans effet de bord (cf. evaluate_commands)
+        self.__background: List[ASimulatedAircraft] = [] # Reste de la flotte, fige dans le scenario
+        # Points de reprise (cf. set_checkpoint, checkpoint, resume)
+        self.__checkpoint_path: str = None
+        self.__checkpoint_interval = 60.
+        self.__checkpoint_time: float = None
+        self.__checkpoint_writer: CheckpointWriter = None
+        self.__resume_snapshot: Dict[str, Any] = None
         self.logger = setup_logging(self.__class__.__name__)
 
     def get_param(self, param_name: str, default=None) -> Any:
@@ -164,6 +174,24 @@ class AAlgorithm(IAlgorithm):
     def set_data(self, data: List[ASimulatedAircraft]) -> None:
         """Modifie l'attribut data (List[ASimulatedAircraft]) en enoyant l'argument dans l'attribut"""
         self.__data = data
+        self.__scenario = None
+
+    def set_background(self, background: List[ASimulatedAircraft]) -> None:
+        """Modifie les avions du reste de la flotte (hors data) dont les conflits avec data sont
+        pris en compte par le scenario, ex: lorsqu'une layer optimise une partie de la flotte"""
+        self.__background = background
+        self.__scenario = None
+
+    def get_scenario(self) -> Scenario:
+        """Renvoie le scenario fige de data (routes, positions, conflits passes), cree au premier appel"""
+        if self.__scenario is None:
+            self.__scenario = Scenario.from_data(self.__data, self.__background)
+        return self.__scenario
+
+    def update_scenario(self) -> Scenario:
+        """Fige a nouveau l'etat courant de data (ex: au demarrage de l'algorithme) et renvoie le scenario"""
+        self.__scenario = Scenario.from_data(self.__data, self.__background)
+        return self.__scenario
 
     def get_number_of_layers(self) -> float:
         """Renvoie le nombre de layer definie dans l'algorithme"""
@@ -190,6 +218,7 @@ class AAlgorithm(IAlgorithm):
         Démarrer l'algorithme pour chercher une solution optimale.
         """
         self.set_state(AlgorithmState.STARTED)
+        self.__checkpoint_time = datetime.now().timestamp()
         try:
             result = self.run()
             self.set_state(AlgorithmState.FINISHED)
@@ -200,6 +229,8 @@ class AAlgorithm(IAlgorithm):
             self.set_state(AlgorithmState.ERROR)
             # raise type(e)(f"{e}\nTraceback:\n{tb}") from e # Propager l'erreur avec le traceback
             return e
+        finally:
+            self.close_checkpoint() # Le dernier point de reprise depose est ecrit
         
     @override
     def stop(self) -> None:
@@ -252,6 +283,15 @@ class AAlgorithm(IAlgorithm):
             raise ValueError(msg)
         return self.__fobjective.evaluate(data=self.__data if data == None else data)
 
+    def evaluate_commands(self, commands: List[List[DataStorage]]) -> EvaluationResult:
+        """Evaluation d'une solution (une liste de commandes par ASimulatedAircraft de data) sans effet de bord:
+        les avions, balises et le ConflictManager ne sont pas modifies (cf. Scenario)"""
+        if self.__fobjective == None:
+            msg = f"Objective function not set in the algorithm, please use an instance of {AObjective} object\n"
+            msg += f"and set the function by using {self.__class__.__name__}.set_objective_function(obj_func) to set objective function."
+            raise ValueError(msg)
+        return self.get_scenario().evaluate(commands, self.__fobjective)
+
     def get_timeout_value(self) -> float:
         """Renvoie la duree pour declencher le timeout"""
         return self.__timeout_value
@@ -281,6 +321,82 @@ class AAlgorithm(IAlgorithm):
             self.set_state(AlgorithmState.TIMEOUT)
         return _is_timeout
     
+    def set_checkpoint(self, path: str, interval: float = 60.) -> None:
+        """Active les points de reprise: pendant run, au plus un toutes les <interval> secondes dans le fichier <path>
+        (path None: desactive)"""
+        self.__checkpoint_path     = path
+        self.__checkpoint_interval = interval
+
+    def get_checkpoint_path(self) -> str:
+        """Renvoie le fichier des points de reprise (None si desactive)"""
+        return self.__checkpoint_path
+
+    def checkpoint(self, step: int, state: Callable[[], Dict[str, Any]], force: bool = False) -> bool:
+        """Depose un point de reprise si ils sont actives et que l'intervalle est ecoule (ou si <force>).
+        <step> est l'avancement (ex: generation) a partir duquel reprendre, <state> construit l'etat propre
+        a l'algorithme (population, etat courant...), appele seulement si le point de reprise est depose.
+        Il est complete par l'etat des generateurs aleatoires (celui de l'algorithme et celui de chaque avion de data,
+        utilise par initialize, generate_commands...), le meilleur critere et la fonction objective.
+        L'ecriture a lieu sur un thread dedie (cf. CheckpointWriter). Renvoie True si le point de reprise est depose."""
+        if self.__checkpoint_path is None:
+            return False
+        now = datetime.now().timestamp()
+        if not force and self.__checkpoint_time is not None and now - self.__checkpoint_time < self.__checkpoint_interval:
+            return False
+        if self.__checkpoint_writer is None:
+            self.__checkpoint_writer = CheckpointWriter(self.__checkpoint_path)
+        self.__checkpoint_writer.submit({"version": CHECKPOINT_VERSION,
+                                         "algorithm": self.__class__.__name__,
+                                         "step": step,
+                                         "rng": self.get_generator().bit_generator.state,
+                                         "aircraft_rng": {aircraft_sim.get_object().get_id_aircraft():
+                                                          aircraft_sim.get_object().get_random_generator().bit_generator.state
+                                                          for aircraft_sim in self.__data},
+                                         "best_critere": self.__best_critere,
+                                         "objective": self.__fobjective,
+                                         "state": state()})
+        self.__checkpoint_time = now
+        return True
+
+    def close_checkpoint(self) -> None:
+        """Attend l'ecriture du dernier point de reprise depose"""
+        if self.__checkpoint_writer is not None:
+            self.__checkpoint_writer.close()
+            self.logger.info(f"{self.__checkpoint_writer.get_written()} checkpoint(s) written in {self.__checkpoint_path}")
+            self.__checkpoint_writer = None
+
+    def resume(self, path: str) -> None:
+        """Reprend a partir du point de reprise <path>: les generateurs aleatoires (algorithme et avions de data)
+        et le meilleur critere sont restaures,
+        la fonction objective aussi si elle n'est pas definie. Le prochain run repart de l'etat sauvegarde.
+        Exception: ValueError si le point de reprise vient d'un autre algorithme ou d'une autre fonction objective"""
+        snapshot = CheckpointWriter.load(path)
+        if snapshot["algorithm"] != self.__class__.__name__:
+            error = f"checkpoint {path} was written by {snapshot['algorithm']}, not by {self.__class__.__name__}"
+            raise ValueError(error)
+        objective = snapshot["objective"]
+        if self.__fobjective is None:
+            self.__fobjective = objective
+        elif objective is not None and type(objective) is not type(self.__fobjective):
+            error = f"checkpoint {path} was written with {type(objective).__name__}, not with {type(self.__fobjective).__name__}"
+            raise ValueError(error)
+        self.get_generator().bit_generator.state = snapshot["rng"]
+        for aircraft_sim in self.__data:
+            aircraft = aircraft_sim.get_object()
+            if aircraft.get_id_aircraft() in snapshot["aircraft_rng"]:
+                aircraft.get_random_generator().bit_generator.state = snapshot["aircraft_rng"][aircraft.get_id_aircraft()]
+        self.__best_critere = snapshot["best_critere"]
+        self.__resume_snapshot = snapshot
+
+    def get_resume_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Renvoie le point de reprise charge par resume (None s'il n'y en a pas)"""
+        return self.__resume_snapshot
+
+    def pop_resume_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Renvoie le point de reprise charge par resume, qui n'est utilise qu'une fois (None s'il n'y en a pas)"""
+        snapshot, self.__resume_snapshot = self.__resume_snapshot, None
+        return snapshot
+
     def get_generator(self) -> np.random.Generator:
         """Recupere le generator de nombre aleatoire de l'algorithme"""
         return self.__generator
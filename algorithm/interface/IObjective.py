@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
 from algorithm.interface.ISimulatedObject import ISimulatedObject, ASimulatedAircraft
+from model.conflict_manager import ConflictInformation
 from utils.controller.database_dynamique import MetaDynamiqueDatabase
 
-from typing import List
+from typing import List, Any
 from typing_extensions import Type, override
 
 # Interface 
@@ -88,4 +89,79 @@ class AObjective(IObjective):
         Retourne les paramètres du constructeur de la fonction objectif spécifiée.
         Exception: TypeError
         """
-        return MetaDynamiqueDatabase.get_class_constructor_params(cls, class_name)
\ No newline at end of file
+        return MetaDynamiqueDatabase.get_class_constructor_params(cls, class_name)
+
+
+class AIncrementalObjective(AObjective):
+    """Fonction objective calculee a partir de statistiques additives sur les conflits vus par chaque avion de data
+    (un conflit entre deux avions de data est vu deux fois, une fois depuis chaque avion).
+
+    Quand les commandes d'un seul avion changent, seuls les conflits de cet avion (et leurs vues depuis
+    les autres avions) sont retires puis ajoutes aux statistiques (cf. IncrementalObjectiveState):
+    la mise a jour coute O(conflits de l'avion) au lieu de O(conflits de data), pour la meme valeur.
+    """
+    @abstractmethod
+    def new_statistics(self) -> Any:
+        """Statistiques vides"""
+        pass
+
+    @abstractmethod
+    def accumulate(self, statistics: Any, conflict: ConflictInformation, weight: int) -> None:
+        """Ajoute (weight=1) ou retire (weight=-1) un conflit vu depuis conflict.aircraft_one"""
+        pass
+
+    @abstractmethod
+    def value_of(self, statistics: Any) -> float:
+        """Valeur de la fonction objective pour ces statistiques"""
+        pass
+
+    def statistics_of(self, data: List[ASimulatedAircraft]) -> Any:
+        """Statistiques des conflits de tous les avions de data"""
+        statistics = self.new_statistics()
+        for aircraft_sim in data:
+            for conflicts in aircraft_sim.get_object().get_conflicts().get_all().values():
+                for conflict in conflicts:
+                    self.accumulate(statistics, conflict, 1)
+        return statistics
+
+    @override
+    def evaluate(self, data: List[ASimulatedAircraft]) -> float:
+        return self.value_of(self.statistics_of(data))
+
+    def incremental_state(self, data: List[ASimulatedAircraft]) -> 'IncrementalObjectiveState':
+        """Etat de la fonction objective sur data, mis a jour avion par avion"""
+        return IncrementalObjectiveState(self, data)
+
+
+class IncrementalObjectiveState:
+    """Valeur d'une AIncrementalObjective sur data, suivie au fil des changements de commandes d'un avion:
+        state.remove(aircraft_sim)  # avant le changement des commandes
+        aircraft_sim.update_commands(...)
+        state.add(aircraft_sim)     # apres, les conflits de l'avion sont a jour
+        state.get_value()
+    """
+    def __init__(self, objective: AIncrementalObjective, data: List[ASimulatedAircraft]):
+        self.__objective = objective
+        self.__ids = {aircraft_sim.get_object().get_id_aircraft() for aircraft_sim in data}
+        self.__statistics = objective.statistics_of(data)
+
+    def get_value(self) -> float:
+        return self.__objective.value_of(self.__statistics)
+
+    def remove(self, aircraft_sim: ASimulatedAircraft) -> None:
+        """Retire les conflits de l'avion, vus depuis l'avion et depuis les autres avions de data"""
+        self.__accumulate(aircraft_sim, -1)
+
+    def add(self, aircraft_sim: ASimulatedAircraft) -> None:
+        """Ajoute les conflits (mis a jour) de l'avion, vus depuis l'avion et depuis les autres avions de data"""
+        self.__accumulate(aircraft_sim, 1)
+
+    def __accumulate(self, aircraft_sim: ASimulatedAircraft, weight: int) -> None:
+        for conflicts in aircraft_sim.get_object().get_conflicts().get_all().values():
+            for conflict in conflicts:
+                self.__objective.accumulate(self.__statistics, conflict, weight)
+                if conflict.get_aircraft_two().get_id_aircraft() in self.__ids: # Vu aussi depuis l'autre avion
+                    mirror = ConflictInformation(conflict.get_aircraft_two(), conflict.get_aircraft_one(),
+                                                 conflict.get_conflict_time_two(), conflict.get_conflict_time_one(),
+                                                 conflict.get_location())
+                    self.__objective.accumulate(self.__statistics, mirror, weight)
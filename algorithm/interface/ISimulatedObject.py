@@ -25,6 +25,16 @@ class ISimulatedObject(ABC):
         """Met a jour les commandes pour l'objet"""
         pass
     
+    @abstractmethod
+    def has_commands(self, commands: List[DataStorage]) -> bool:
+        """True si <commands> sont les commandes deja appliquees a l'objet (rien a recalculer)"""
+        pass
+
+    @abstractmethod
+    def bind_commands(self, commands: List[DataStorage]) -> None:
+        """Remplace la liste de commandes de l'objet par <commands>, egales a celles appliquees, sans recalcul"""
+        pass
+
     @abstractmethod
     def initialize(self) -> List[DataStorage]:
         """Initialise les commandes aleatoirement pour l'objet"""
@@ -1,6 +1,8 @@
-from algorithm.interface.IObjective import AObjective
+from algorithm.interface.IObjective import AObjective, AIncrementalObjective
 from algorithm.interface.ISimulatedObject import ASimulatedAircraft
+from model.conflict_manager import ConflictInformation
 
+from collections import Counter
 from typing import List
 from typing_extensions import override
 
@@ -14,7 +16,7 @@ import numpy as np
 #----------------------------------------------------------
 #----------------------------------------------------------
 @AObjective.register_objective_function
-class ObjectiveFunctionMaxConflict(AObjective):
+class ObjectiveFunctionMaxConflict(AIncrementalObjective):
     """ 
     Fonction objective simple:
     calculant le nombre de conflits de chaque ASimulatedAircraft
@@ -23,14 +25,16 @@ class ObjectiveFunctionMaxConflict(AObjective):
         super().__init__(**kwargs)
 
     @override
-    def evaluate(self, data: List[ASimulatedAircraft]) -> float:
-        total_conflicts = 0
-        nc = 0.
-        for _, aircraft_sim in enumerate(data):
-            for conflicts in aircraft_sim.get_object().get_conflicts().get_all().values():
-                nc = len(conflicts)
-                total_conflicts += nc
-        return (total_conflicts * 0.5)
+    def new_statistics(self) -> Counter:
+        return Counter(total_conflicts=0)
+
+    @override
+    def accumulate(self, statistics: Counter, conflict: ConflictInformation, weight: int) -> None:
+        statistics['total_conflicts'] += weight
+
+    @override
+    def value_of(self, statistics: Counter) -> float:
+        return (statistics['total_conflicts'] * 0.5)
     
 #-----------------------------------------------------------------------
 #-----------------------------------------------------------------------
@@ -232,7 +236,16 @@ class ObjectiveFunctionMaxConflictMinVariation(AObjective):
 #---------------- PENALISATION EXTERNAL --------------------------------
 #-----------------------------------------------------------------------
 @AObjective.register_objective_function 
-class ObjectiveFunctionConflictInternal(AObjective):
+class ObjectiveFunctionConflictInternal(AIncrementalObjective):
+    """
+    Fonction objective: ecart au nombre de conflits et de balises en conflit attendus,
+    avec penalisation des conflits sur les balises externes et des paires d'avions en conflit plusieurs fois.
+    Les statistiques portent sur les conflits vus depuis chaque avion:
+        - total_conflicts: nombre de vues (2 par conflit entre deux avions de data)
+        - external: vues sur une balise externe
+        - balises: nombre de vues par balise en conflit
+        - pairs: nombre de vues par paire (premier avion a passer, second), redondance = vues - paires distinctes
+    """
 
     def __init__(self,
                 nb_expected_conflict: int = 2,
@@ -256,44 +269,36 @@ class ObjectiveFunctionConflictInternal(AObjective):
 
     def set_nb_expected_conflict(self, n: int) -> None:
         self.nb_expected_conflict = n
-    
+
     @override
-    def evaluate(self, data: List[ASimulatedAircraft]) -> float:
-        total_conflicts = 0
-        nc = 0.
-        conflict = []
-        conflict_pair = []
-        conflict_balise = []
-        external_penalisation = 0
-        redundance_penalisation = 0
-        for _, aircraft_sim in enumerate(data):
-            for conflicts in aircraft_sim.get_object().get_conflicts().get_all().values():
-                if conflicts not in conflict:
-                    conflict.append(conflicts)
-                    nc = len(conflicts)
-                    total_conflicts += nc
-
-                    for c in conflicts : 
-                        if c.location not in conflict_balise :
-                            conflict_balise.append(c.location)
-                        if c.conflict_time_one >c.conflict_time_two : 
-                            if (c.aircraft_two, c.aircraft_one)  not in conflict_pair :
-                                conflict_pair.append((c.aircraft_two, c.aircraft_one))
-                            else :
-                                redundance_penalisation += 1
-                        else : 
-                            if (c.aircraft_one, c.aircraft_two)  not in conflict_pair :
-                                conflict_pair.append((c.aircraft_one, c.aircraft_two))
-                            else : 
-                                redundance_penalisation += 1
-                        if c.location.is_external() == True:
-                            external_penalisation += 1
+    def new_statistics(self) -> dict:
+        return {'total_conflicts': 0, 'external': 0, 'balises': Counter(), 'pairs': Counter()}
 
+    @override
+    def accumulate(self, statistics: dict, conflict: ConflictInformation, weight: int) -> None:
+        statistics['total_conflicts'] += weight
+        if conflict.location.is_external() == True:
+            statistics['external'] += weight
+
+        if conflict.conflict_time_one > conflict.conflict_time_two:
+            pair = (conflict.aircraft_two.get_id_aircraft(), conflict.aircraft_one.get_id_aircraft())
+        else:
+            pair = (conflict.aircraft_one.get_id_aircraft(), conflict.aircraft_two.get_id_aircraft())
+        for counter, key in ((statistics['balises'], conflict.location), (statistics['pairs'], pair)):
+            counter[key] += weight
+            if counter[key] == 0: # Seules les balises et paires encore en conflit sont comptees
+                del counter[key]
+
+    @override
+    def value_of(self, statistics: dict) -> float:
+        total_conflicts = statistics['total_conflicts']
+        external_penalisation = statistics['external']
+        redundance_penalisation = total_conflicts - len(statistics['pairs'])
 
         # Calcul du coût : 
         penalisation = self.__weight_external_penality * external_penalisation
         conflicts    = np.abs(self.nb_expected_conflict - (total_conflicts * 0.5)) * self.__weight_conflicts
-        penality_balise = abs(self.nb_expected_balise - len(conflict_balise)) * self.__weight_balise
+        penality_balise = abs(self.nb_expected_balise - len(statistics['balises'])) * self.__weight_balise
         red_penalisation =  self.__weight_balise / 2 * redundance_penalisation
 
         total = conflicts + penalisation + penality_balise + red_penalisation
@@ -0,0 +1,56 @@
+from algorithm.interface.IObjective import AObjective
+from algorithm.evaluation import Scenario
+from model.aircraft.storage import DataStorage
+from logging_config import setup_logging
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import List
+
+import os
+import numpy as np
+
+
+# Etat d'un processus d'évaluation, initialisé une fois par _initialize_worker
+_worker_scenario: Scenario = None
+_worker_objective: AObjective = None
+
+def _initialize_worker(scenario: Scenario, objective: AObjective) -> None:
+    global _worker_scenario, _worker_objective
+    _worker_scenario, _worker_objective = scenario, objective
+
+def _evaluate_chunk(individuals: List[List[List[DataStorage]]]) -> np.ndarray:
+    """Evalue une partie de la population, dans l'ordre"""
+    return np.array([_worker_scenario.evaluate(individual, _worker_objective).get_value() for individual in individuals], dtype=float)
+
+
+class ParallelEvaluator:
+    """Evaluation d'une population répartie sur un pool de processus.
+
+    Le scénario figé de la flotte (cf. Scenario) est envoyé une seule fois à l'initialisation
+    de chaque processus, qui évalue les individus sans effet de bord: les avions de l'appelant
+    ne sont pas modifiés. La population est découpée en blocs contigus, chaque bloc est évalué
+    dans l'ordre et les fitnesses sont rassemblées dans l'ordre de la population: le résultat est
+    le même que celui de l'évaluation séquentielle, quel que soit le nombre de processus.
+    Les processus sont démarrés par 'spawn' pour ne pas hériter de l'état (avions, Qt) du parent.
+    """
+    logger = setup_logging("ParallelEvaluator")
+
+    def __init__(self, scenario: Scenario, objective: AObjective, n_jobs: int = None):
+        self.__n_jobs = n_jobs if n_jobs and n_jobs > 0 else os.cpu_count()
+        self.__executor = ProcessPoolExecutor(max_workers=self.__n_jobs, mp_context=get_context("spawn"),
+                                              initializer=_initialize_worker, initargs=(scenario, objective))
+        self.logger.info(f"{self.__n_jobs} processus d'évaluation pour {len(scenario)} avions")
+
+    def get_n_jobs(self) -> int: return self.__n_jobs
+
+    def evaluate(self, population: List[List[List[DataStorage]]]) -> List[float]:
+        """Renvoie les fitnesses de chaque individu de la population, dans l'ordre"""
+        if not population:
+            return []
+        chunks = [chunk.tolist() for chunk in np.array_split(np.arange(len(population)), min(self.__n_jobs, len(population)))]
+        futures = [self.__executor.submit(_evaluate_chunk, [population[i] for i in chunk]) for chunk in chunks]
+        return np.concatenate([future.result() for future in futures]).tolist()
+
+    def close(self) -> None:
+        self.__executor.shutdown(wait=True, cancel_futures=True)
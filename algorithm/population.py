@@ -0,0 +1,171 @@
+from model.aircraft.storage import DataStorage
+
+from typing import List, Sequence, Callable, Tuple
+
+import numpy as np
+
+
+# Une commande de la population: heading NaN pour None, valid False pour les cases de remplissage
+COMMAND_DTYPE = np.dtype([('time', float), ('speed', float), ('heading', float), ('valid', bool)])
+
+
+class Population:
+    """Population d'un algorithme genetique stockee dans un tableau structure (individus, avions, commandes).
+
+    Chaque individu donne une liste de commandes par avion; les listes plus courtes que max_commands
+    sont completees par des cases invalides (valid=False), toujours placees apres les commandes valides.
+    Le croisement, la mutation et le tri des commandes sont des operations vectorisees sur tout le tableau;
+    les DataStorage ne sont crees qu'a la conversion (to_individuals) pour l'evaluation.
+    """
+    def __init__(self, commands: np.ndarray, aircraft_ids: np.ndarray):
+        if commands.dtype != COMMAND_DTYPE or commands.ndim != 3 or commands.shape[1] != len(aircraft_ids):
+            error = f"{self.__class__.__name__} expects a {COMMAND_DTYPE} array shaped (population, {len(aircraft_ids)}, max_commands), " \
+                    f"got {commands.dtype} {commands.shape}"
+            raise ValueError(error)
+        self.__commands     = commands
+        self.__aircraft_ids = np.asarray(aircraft_ids, dtype=int)
+
+    @classmethod
+    def from_individuals(cls, individuals: List[List[List[DataStorage]]], aircraft_ids: Sequence[int]) -> 'Population':
+        """Construit la population a partir d'individus (une liste de commandes par avion)"""
+        max_commands = max((len(trajectory) for individual in individuals for trajectory in individual), default=1)
+        commands = np.zeros((len(individuals), len(aircraft_ids), max(max_commands, 1)), dtype=COMMAND_DTYPE)
+        commands['heading'] = np.nan
+        for i, individual in enumerate(individuals):
+            for j, trajectory in enumerate(individual):
+                for k, command in enumerate(trajectory):
+                    commands[i, j, k] = (command.time, command.speed,
+                                         np.nan if command.heading is None else command.heading, True)
+        return cls(commands, np.asarray(aircraft_ids, dtype=int))
+
+    def to_individuals(self, indices: Sequence[int] = None) -> List[List[List[DataStorage]]]:
+        """Convertit les individus (tous par defaut) en listes de DataStorage, dans l'ordre de <indices>"""
+        indices = range(len(self)) if indices is None else indices
+        ids = self.__aircraft_ids.tolist()
+        individuals = []
+        for i in indices:
+            row = self.__commands[i]
+            times, speeds, headings, valid = row['time'].tolist(), row['speed'].tolist(), row['heading'].tolist(), row['valid']
+            individuals.append([[DataStorage(id=ids[j], speed=speeds[j][k], time=times[j][k],
+                                             heading=None if np.isnan(headings[j][k]) else headings[j][k])
+                                 for k in np.flatnonzero(valid[j]).tolist()]
+                                for j in range(len(ids))])
+        return individuals
+
+    def __len__(self) -> int: return self.__commands.shape[0]
+    def get_commands(self) -> np.ndarray: return self.__commands
+    def get_aircraft_ids(self) -> np.ndarray: return self.__aircraft_ids
+    def get_lengths(self) -> np.ndarray:
+        """Nombre de commandes valides de chaque (individu, avion)"""
+        return self.__commands['valid'].sum(axis=-1)
+
+    def take(self, indices: Sequence[int]) -> 'Population':
+        """Sous-population des individus <indices>, dans cet ordre"""
+        return Population(self.__commands[np.asarray(indices, dtype=int)], self.__aircraft_ids)
+
+    def concatenate(self, other: 'Population') -> 'Population':
+        """Population de self suivie de other (memes avions)"""
+        width = max(self.__commands.shape[2], other.get_commands().shape[2])
+        return Population(np.concatenate([self.__pad(self.__commands, width), self.__pad(other.get_commands(), width)]),
+                          self.__aircraft_ids)
+
+    def crossover(self, first: np.ndarray, second: np.ndarray, crossover_rate: float, generator: np.random.Generator) -> 'Population':
+        """Enfants des couples (first[i], second[i]): pour chaque avion, avec la probabilite crossover_rate,
+        les commandes de first avant un point de coupure tire dans [1, longueur - 1] puis celles de second,
+        sinon la liste de l'un des deux parents (cf. AlgorithmGeneticBase.crossover)"""
+        one, two = self.__commands[first], self.__commands[second]
+        n, aircrafts, width = one.shape
+        lengths = one['valid'].sum(axis=-1)
+        points = np.where(lengths > 1, 1 + np.floor(generator.random((n, aircrafts)) * (lengths - 1)), 1).astype(int)
+        is_cut = generator.random((n, aircrafts)) < crossover_rate
+        keep_one = generator.random((n, aircrafts)) < 0.5
+        from_one = np.where(is_cut[..., None], np.arange(width) < points[..., None], keep_one[..., None])
+        return Population(self.__sort(np.where(from_one, one, two)), self.__aircraft_ids)
+
+    def mutate(self, mutation_rate: float, possible_speeds: np.ndarray, generator: np.random.Generator,
+               max_time_shift: float = 10.) -> 'Population':
+        """Mutation de chaque commande, independamment, avec la probabilite mutation_rate (2 * mutation_rate
+        pour le decollage): nouvelle vitesse tiree dans possible_speeds et/ou temps decale dans
+        [-max_time_shift, max_time_shift] (borne a 0), une ou deux variables modifiees.
+
+        Ce n'est pas l'operateur de AlgorithmGeneticBase.mutate: celui-ci remplace une commande par une commande
+        de SimulatedAircraftImplemented.generate_commands, qui part des commandes appliquees a l'avion (pas de
+        celles de l'individu), modifie 1 a NB_MAXIMUM_COMMANDS commandes et ne decale que le temps du decollage.
+        Les deux algorithmes n'explorent donc pas les memes voisinages."""
+        commands = self.__commands.copy()
+        shape, valid = commands.shape, commands['valid']
+        rates = np.full(shape[2], mutation_rate)
+        rates[0] = min(2 * mutation_rate, 1.)
+        mutated = valid & (generator.random(shape) < rates)
+
+        both = generator.random(shape) < 0.5 # Une ou deux variables modifiees
+        speed_only = generator.random(shape) < 0.5
+        change_speed = mutated & (both | speed_only)
+        change_time = mutated & (both | ~speed_only)
+
+        new_speeds = np.asarray(possible_speeds, dtype=float)[generator.integers(0, len(possible_speeds), size=shape)]
+        new_times = np.maximum(commands['time'] + generator.uniform(-max_time_shift, max_time_shift, size=shape), 0.)
+        commands['speed'] = np.where(change_speed, new_speeds, commands['speed'])
+        commands['time'] = np.where(change_time, new_times, commands['time'])
+        return Population(self.__sort(commands), self.__aircraft_ids)
+
+    @staticmethod
+    def selection_probabilities(fitnesses: np.ndarray, is_minimise: bool) -> np.ndarray:
+        """Probabilites de selection de chaque individu, proportionnelles a l'ecart au pire (cf. AlgorithmGeneticBase.select_parents)"""
+        adjusted = fitnesses.max() - fitnesses if is_minimise else fitnesses
+        total = adjusted.sum()
+        if total <= 0 or np.count_nonzero(adjusted) < 2: # Deux parents distincts doivent pouvoir etre tires
+            return np.full(len(fitnesses), 1 / len(fitnesses))
+        return adjusted / total
+
+    @classmethod
+    def select_parent_pairs(cls, fitnesses: np.ndarray, number_of_pairs: int, is_minimise: bool,
+                            generator: np.random.Generator) -> np.ndarray:
+        """Tire <number_of_pairs> couples de parents distincts (indices), chacun sans remise selon les probabilites
+        de selection: les deux plus grandes cles log(p) + Gumbel de chaque ligne forment un couple"""
+        with np.errstate(divide='ignore'):
+            log_probabilities = np.log(cls.selection_probabilities(fitnesses, is_minimise))
+        keys = log_probabilities + generator.gumbel(size=(number_of_pairs, len(fitnesses)))
+        return np.argsort(-keys, axis=1)[:, :2]
+
+    def next_generation(self, fitnesses: np.ndarray, evaluate: Callable[[List[List[List[DataStorage]]]], List[float]],
+                        generator: np.random.Generator, population_size: int, crossover_rate: float, mutation_rate: float,
+                        possible_speeds: np.ndarray, is_minimise: bool = True) -> Tuple['Population', np.ndarray]:
+        """Prochaine population avec elitisme et surproduction (cf. AlgorithmGeneticBase.next_population_elitism_surprod)
+        et ses fitnesses: seuls les enfants sont evalues (par <evaluate>), les elites gardent leur fitness"""
+        sign = 1 if is_minimise else -1
+
+        # Sélection des élites
+        elite_size = max(1, int(0.1 * population_size))
+        elites = np.argsort(sign * fitnesses, kind='stable')[:elite_size]
+
+        # Surproduction: enfants (p1, p2) et (p2, p1) de chaque couple
+        number_of_offspring = max(int(1.5 * population_size) - elite_size, 0)
+        pairs = self.select_parent_pairs(fitnesses, (number_of_offspring + 1) // 2, is_minimise, generator)
+        first, second = pairs.ravel()[:number_of_offspring], pairs[:, ::-1].ravel()[:number_of_offspring]
+        offspring = self.crossover(first, second, crossover_rate, generator).mutate(mutation_rate, possible_speeds, generator)
+
+        # Sélection finale des meilleurs individus pour la nouvelle génération
+        candidates = self.take(elites).concatenate(offspring)
+        candidate_fitnesses = np.concatenate([fitnesses[elites], np.asarray(evaluate(offspring.to_individuals()), dtype=float)])
+        selected = np.argsort(sign * candidate_fitnesses, kind='stable')[:population_size]
+        return candidates.take(selected), candidate_fitnesses[selected]
+
+    @staticmethod
+    def __sort(commands: np.ndarray) -> np.ndarray:
+        """Commandes valides triees par temps, cases invalides a la fin"""
+        keys = np.where(commands['valid'], commands['time'], np.inf)
+        return np.take_along_axis(commands, np.argsort(keys, axis=-1, kind='stable'), axis=-1)
+
+    @staticmethod
+    def __pad(commands: np.ndarray, width: int) -> np.ndarray:
+        if commands.shape[2] == width:
+            return commands
+        padded = np.zeros(commands.shape[:2] + (width,), dtype=COMMAND_DTYPE)
+        padded['heading'] = np.nan
+        padded[..., :commands.shape[2]] = commands
+        return padded
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(individuals={len(self)}, aircrafts={len(self.__aircraft_ids)}, " \
+               f"max_commands={self.__commands.shape[2]})"
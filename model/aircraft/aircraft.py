@@ -2,32 +2,43 @@ from dataclasses import dataclass, field
 from model.aircraft. information import Information
 from model.point import Point, PointValue
 from model.balise import Balise
+from model.route import Airway
+from model.conflict_manager import ConflictInformation, ConflictStore
 from utils.conversion import rad_to_deg_aero
 from model.collector import Collector
 from logging_config import setup_logging
 from model.aircraft.storage import DataStorage
 
-from typing import List, Dict, TYPE_CHECKING, Optional
+from typing import List, Dict, Mapping, Tuple, TYPE_CHECKING, Optional
+from bisect import bisect_right
 from copy import deepcopy
 from weakref import WeakSet
 
 import numpy as np
 
 if TYPE_CHECKING:
-    from model.conflict_manager import ConflictManager, ConflictInformation
+    from model.conflict_manager import ConflictManager
+    from model.route import RouteGeometry
+    from model.aircraft.fleet import FleetState
 
 class Aircraft:
     __REGISTRY: Dict[int, 'Aircraft'] = {}
     __observers: WeakSet = WeakSet()
+    # Incrémenté a chaque modification avion par avion du temps, du cap, du décollage ou du plan de vol timé,
+    # comme la version de l'avion modifié (permet a FleetState de ne relire que les avions modifiés)
+    __kinematics_version: int = 0
 
-    def __init__(self, flight_plan: List[Balise], speed: float, id: int = None, take_off_time=0.):
+    def __init__(self, flight_plan: List[Balise], speed: float, id: int = None, take_off_time=0., estimate_times: bool = True):
         # Logger
         self.logger = setup_logging(self.__class__.__name__)
 
         self.flight_plan       = flight_plan
+        # Géométrie précalculée de la route (longueurs, directions, caps des tronçons)
+        self.__geometry        = Airway.get_geometry(flight_plan)
         
         # Initialisation du dictionnaire rempli par calculate_estimated_times_commands
         self.flight_plan_timed = {}
+        self.__timeline        = None # Temps de passage et coordonnees pour la recherche de position (cf. get_timeline)
 
         if speed == None or speed <= 0: # Protection pour calcul des temps de passage au balise !!!
             error = f"{self.__class__.__name__} cannot be instanciate due to speed negative or null value or None value"
@@ -54,6 +65,9 @@ class Aircraft:
         # Premiere position autour de la premiere balise
         self.start_position = self.generate_position_near_balise(self.flight_plan[self.current_target_index])
         self.position       = deepcopy(self.start_position)
+        self.__fleet_state: 'FleetState' = None # Etat de flotte qui fournit temps et temps de vol (cf. set_kinematic_state)
+        self.__fleet_row    = 0
+        self.__own_kinematics_version = 0 # cf. touch_kinematics
         self.time           = 0.
         self.flight_time    = 0.
         self.take_off_time  = take_off_time
@@ -64,8 +78,8 @@ class Aircraft:
         # Cap entre la première position et la balise
         self.heading = self.calculate_heading(self.position, self.flight_plan[self.current_target_index])
 
-        # Collecteur de conflicts
-        self._conflict_dict = Collector(List['ConflictInformation']) # Collecteur vide au depart
+        # Stockage des conflicts, vide au depart et remplacé par celui du ConflictManager a l'enregistrement
+        self.__conflict_store = ConflictStore()
         # List de commandes de l'avion
         # Si l'avion doit changer de vitesse dans le temps par exemple.
         self.commands = [DataStorage(id=self.id, time=self.take_off_time,
@@ -76,7 +90,9 @@ class Aircraft:
         self.next_command = self.set_next_command()
 
         # Calcul du plan de vol timé par rapport à la vitesse (et au commande dans le temps)
-        self.calculate_estimated_times_commands()
+        # estimate_times=False: le calcul est fait pour toute la flotte par FleetTiming.estimate_aircrafts
+        if estimate_times:
+            self.calculate_estimated_times_commands()
 
         self.__REGISTRY[self.id] = self
 
@@ -98,6 +114,21 @@ class Aircraft:
         if id in cls.__REGISTRY.keys():
             del cls.__REGISTRY[aircraft.get_id_aircraft()]
 
+    @classmethod
+    def get_kinematics_version(cls) -> int:
+        """Version de l'ensemble des avions: change si un avion quelconque est modifié"""
+        return Aircraft.__kinematics_version
+
+    def get_own_kinematics_version(self) -> int:
+        """Version de cet avion: change seulement s'il est modifié"""
+        return self.__own_kinematics_version
+
+    def touch_kinematics(self) -> None:
+        """Signale une modification du temps, du cap, du décollage ou du plan de vol timé de l'avion
+        (pas une simple recherche de position)"""
+        self.__own_kinematics_version += 1
+        Aircraft.__kinematics_version += 1
+
     @classmethod
     def register_observer(cls, observer: 'ConflictManager'):
         """Enregistre un observateur global (ex: ConflictManager)."""
@@ -109,6 +140,12 @@ class Aircraft:
         for observer in cls.__observers:
             observer.update_aircraft_conflicts(aircraft)
 
+    @classmethod
+    def notify_passages_observers(cls, aircraft: 'Aircraft'):
+        """Notifier les observateurs d'un changement des temps de passage d'un avion (index des passages)."""
+        for observer in cls.__observers:
+            observer.update_aircraft_passages(aircraft)
+
     def __hash__(self):
         return hash(self.get_id_aircraft())
 
@@ -119,26 +156,83 @@ class Aircraft:
 
 
     def get_position(self): return self.position
+    def get_start_position(self) -> Point: return self.start_position
 
     def get_time(self): return self.time
     def set_time(self, time: float) -> None: 
         self.time = time
+        self.touch_kinematics()
 
     def get_flight_time(self): return self.flight_time
+
+    @property
+    def time(self) -> float:
+        """Temps de l'avion, lu dans l'état de flotte si l'avion y est rattaché"""
+        return self.__time if self.__fleet_state is None else self.__fleet_state.get_time_of(self.__fleet_row)
+    @time.setter
+    def time(self, time: float) -> None:
+        self.__detach_fleet_state()
+        self.__time = time
+
+    @property
+    def flight_time(self) -> float:
+        """Temps de vol de l'avion, lu dans l'état de flotte si l'avion y est rattaché"""
+        return self.__flight_time if self.__fleet_state is None else self.__fleet_state.get_flight_time_of(self.__fleet_row)
+    @flight_time.setter
+    def flight_time(self, flight_time: float) -> None:
+        self.__detach_fleet_state()
+        self.__flight_time = flight_time
+
+    def set_kinematic_state(self, fleet_state: 'FleetState', row: int, heading: float, is_finished: bool) -> None:
+        """Rattache l'avion a la ligne <row> de l'état de flotte (cf. update pour le calcul avion par avion):
+        temps, temps de vol et position y sont lus, le cap et la fin de vol calculés sont affectés"""
+        self.__fleet_state = fleet_state
+        self.__fleet_row   = row
+        self.heading       = heading
+        self._is_finished  = is_finished
+        self.position      = fleet_state.get_view(row)
+
+    def __detach_fleet_state(self) -> None:
+        """Fige le temps et le temps de vol lus dans l'état de flotte avant une modification avion par avion"""
+        if self.__fleet_state is not None:
+            self.__time, self.__flight_time = self.time, self.flight_time
+            self.__fleet_state = None
+
+    def __getstate__(self) -> dict:
+        """Copie (deepcopy, pickle): temps et temps de vol figés, sans l'état de flotte"""
+        state = self.__dict__.copy()
+        state['_Aircraft__time'], state['_Aircraft__flight_time'] = self.time, self.flight_time
+        state['_Aircraft__fleet_state'] = None
+        return state
     def get_take_off_time(self): return self.take_off_time
     def get_speed(self): return self.speed
     def get_heading(self, in_aero: bool = False): 
         if in_aero:return rad_to_deg_aero(self.heading)
         else: return self.heading
     def get_flight_plan(self): return self.flight_plan
+    def get_geometry(self) -> 'RouteGeometry': return self.__geometry
     def get_next_target(self): return self.flight_plan[self.current_target_index]
     def get_id_aircraft(self): return self.id
     def get_history(self): return self.history
     def get_random_generator(self): return self.rng
     def set_aircraft_id(self, id: int) -> None:
         self.id = id
-
-    def get_conflicts(self) -> Collector[List['ConflictInformation']]: return self._conflict_dict
+        self.__conflict_store.reindex() # Les clés du stockage contiennent les ids
+
+    def get_conflicts(self) -> Collector[List['ConflictInformation']]:
+        """Conflits de l'avion regroupés par id de l'autre avion, lus dans le stockage de conflits"""
+        conflicts_by_aircraft: Dict[int, List['ConflictInformation']] = {}
+        for conflict in self.__conflict_store.get_by_aircraft(self.id):
+            conflicts_by_aircraft.setdefault(conflict.get_aircraft_two().get_id_aircraft(), []).append(conflict)
+        collector = Collector()
+        for conflict_with, conflicts in conflicts_by_aircraft.items():
+            collector.add(key=conflict_with, value=conflicts)
+        return collector
+
+    def get_conflict_store(self) -> 'ConflictStore': return self.__conflict_store
+    def set_conflict_store(self, conflict_store: 'ConflictStore') -> None:
+        """Branche l'avion sur le stockage de conflits partagé (ex: celui du ConflictManager)"""
+        self.__conflict_store = conflict_store
     def get_commands(self) -> List['DataStorage']: return self.commands
 
     def set_speed(self, speed: float) -> None:
@@ -148,13 +242,21 @@ class Aircraft:
     def set_heading(self, hdg: float) -> None:
         #self.__class__.logger.info(f"Set heading to aircraft {self.id}: from {self.heading} to {hdg}")
         self.heading = hdg
+        self.touch_kinematics()
 
     def set_take_off_time(self, take_off_time: float) -> None:
         self.take_off_time = take_off_time
+        self.touch_kinematics()
 
     def get_flight_plan_timed(self) -> Dict[str, float]: return self.flight_plan_timed
+    def set_flight_plan_timed(self, flight_plan_timed: Mapping[str, float]) -> None:
+        """Remplace le plan de vol timé (ex: vue sur la matrice calculée par FleetTiming)"""
+        self.flight_plan_timed = flight_plan_timed
+        self.__timeline        = None
+        self.touch_kinematics()
+        Aircraft.notify_passages_observers(self)
 
-    def is_in_conflict(self) -> bool: return not(self._conflict_dict.is_empty())
+    def is_in_conflict(self) -> bool: return self.__conflict_store.has_aircraft(self.id)
 
 
     def get_arrival_time_on_last_point(self) -> float:
@@ -166,7 +268,13 @@ class Aircraft:
         return last_time # 0.0 si aucune donnée n'est présente
     
     def deepcopy(self) -> 'Aircraft':
-        new_aircraft = deepcopy(self)
+        # Le stockage de conflits partagé n'est pas copié: la copie garde ses seuls conflits
+        own_conflicts = ConflictStore()
+        new_aircraft = deepcopy(self, memo={id(self.__conflict_store): own_conflicts})
+        for conflict in self.__conflict_store.get_by_aircraft(self.id):
+            own_conflicts.add(ConflictInformation(new_aircraft, conflict.get_aircraft_two(),
+                                                  conflict.get_conflict_time_one(), conflict.get_conflict_time_two(),
+                                                  conflict.get_location()))
         return new_aircraft
 
     def has_reached_final_point(self): return self._is_finished
@@ -206,76 +314,50 @@ class Aircraft:
     
     def calculate_estimated_times_commands(self) -> None:
         """
-        Calcule les temps estimés de passage de l'avion pour chaque balise avec un pas adaptatif.
-        Le pas de temps devient plus petit à l'approche des balises ou d'un changement de vitesse.
+        Calcule les temps estimés de passage de l'avion pour chaque balise de manière exacte.
+        Chaque commande définit un segment à vitesse constante: la distance parcourue est donc
+        une fonction linéaire par morceaux du temps. Les temps de passage sont obtenus en
+        fusionnant les distances cumulées des balises avec les bornes des commandes,
+        en O(nombre de balises + nombre de commandes), sans pas de temps ni création de Point.
         """
         if len(self.history) <= 0:  # L'avion n'a pas encore bougé.
-            current_position = self.position
-            current_time = self.take_off_time
-            current_speed = self.speed
-            current_command_index = 0
-            current_command = self.commands[current_command_index] if self.commands else None
-            current_flight_time = 0.
-
             # Initialisation des temps pour les balises
             self.flight_plan_timed = {}
+            self.__timeline        = None
+            self.touch_kinematics()
 
-            for balise in self.flight_plan:
-                while True:
-                    # Distance horizontale jusqu'à la balise
-                    distance_to_balise = current_position.distance_horizontale(balise)
-
-                    # Temps jusqu'au changement de vitesse (si applicable)
-                    time_to_next_command = (
-                        current_command.time - current_time
-                        if current_command and current_command.time > current_time
-                        else float('inf')
-                    )
-
-                    # Choix d'un pas adaptatif en fonction de la distance et du temps restant
-                    if distance_to_balise > 10 * self.speed and time_to_next_command > 10:  # Balise non atteinte avec un pas de 10 ou prochaine commandes dans plus de 10 sec
-                        time_step = 10
-                    elif distance_to_balise > self.speed or time_to_next_command > 1:  #  Balise non atteinte avec un pas de 1 ou prochaine commandes dans plus de 1 sec
-                        time_step = 1
-                    elif distance_to_balise > 0.1 * self.speed or time_to_next_command > 0.1:   #Balise non atteinte avec un pas de .1 ou prochaine commandes dans plus de .1 sec
-                        time_step = 0.1
-                    else:  # Très proche d'une balise ou d'un changement de vitesse
-                        time_step = 0.01
-
-                    # Vérifier si la balise est atteinte avec ce pas
-                    if distance_to_balise <= current_speed * time_step:
-                        # Balise atteinte
-                        dt = distance_to_balise / current_speed
-                        current_time += distance_to_balise / current_speed
-                        current_position = Point(balise.getX(), balise.getY(), current_position.getZ())
-                        self.flight_plan_timed[balise.get_name()] = self.__round(current_time)
-                        current_flight_time += dt
+            current_time  = self.take_off_time
+            current_speed = self.speed
+
+            # Les commandes anterieures ou egales au decollage s'appliquent des le depart
+            commands = self.commands if self.commands else []
+            command_index = 0
+            while command_index < len(commands) and commands[command_index].time <= current_time:
+                current_speed = commands[command_index].speed
+                command_index += 1
+
+            for balise_name, leg_length in zip(self.__geometry.names, self.calculate_leg_lengths()):
+                remaining = leg_length
+                # Consommer les segments de commandes qui se terminent avant la balise
+                while command_index < len(commands):
+                    segment_duration = commands[command_index].time - current_time
+                    segment_length   = current_speed * segment_duration
+                    if segment_length >= remaining:
                         break
-                    else:
-                        # Sinon, avancer d'un pas de temps
-                        current_time += time_step
-                        proportion = (current_speed * time_step) / distance_to_balise
-                        inter_x = current_position.getX() + proportion * (balise.getX() - current_position.getX())
-                        inter_y = current_position.getY() + proportion * (balise.getY() - current_position.getY())
-                        inter_z = current_position.getZ()  # Altitude inchangée
-                        current_position = Point(inter_x, inter_y, inter_z)
-                        current_flight_time += time_step
-
-                    # Gérer les commandes de vitesse
-                    if current_command and current_time >= current_command.time:
-                        current_speed = current_command.speed
-                        current_command_index += 1
-                        current_command = (
-                            self.commands[current_command_index]
-                            if current_command_index < len(self.commands)
-                            else None
-                        )
-            # Trier par ordre d'arriver mais normalement si le calcul est bien, il n'y a pas besoin
-            # car ca changerait le plan de vol !
-            #self.flight_plan_timed = dict(sorted(self.flight_plan_timed.items(), 
-            #                                     key=lambda item: item[1]
-            #                                     )
-            #                              )
+                    remaining     -= segment_length
+                    current_time   = commands[command_index].time
+                    current_speed  = commands[command_index].speed
+                    command_index += 1
+
+                # La balise est atteinte sur le segment courant a vitesse constante
+                current_time += remaining / current_speed
+                self.flight_plan_timed[balise_name] = self.__round(current_time)
+            Aircraft.notify_passages_observers(self)
+
+    def calculate_leg_lengths(self) -> List[float]:
+        """Renvoie les longueurs horizontales des tronçons du plan de vol:
+        position courante -> 1ere balise, puis balise i -> balise i+1 (lues dans la géométrie de la route)"""
+        return [self.position.distance_horizontale(self.flight_plan[0])] + self.__geometry.segment_lengths.tolist()
 
 
     def clear_flight_plan_timed(self):
@@ -286,6 +368,7 @@ class Aircraft:
         """Mise à jour des attributs de l'avion pour le faire avancer en utilisant get_position_from_time"""
         self.time     = self.__round(self.time + timestep)
         self.position = self.get_position_from_time(time=self.time)
+        self.touch_kinematics()
 
     # def update(self, timestep: float) -> None:
     #    """Method de mise à jour des attributs de l'avion pour le faire avancer.
@@ -366,41 +449,24 @@ class Aircraft:
 
     def clear_conflicts(self, with_aircraft_id: int = None) -> None:
         """Efface les conflits dépassés ou spécifiques à un autre avion."""
-        # Nouveau Collector pour stocker les conflits a garder
         #self.logger.info(f"Nettoyage des conflicts de l'avion {self.get_id_aircraft()} with_aircraft_id={with_aircraft_id})")
-        new_collector = Collector()
-        for key, conflicts in self.get_conflicts().get_all().items():
-            if conflicts != None:
-                # Filtrer les conflits selon la condition
-                filtered_conflicts = [
-                    c for c in conflicts
-                    if (with_aircraft_id == None and c.get_conflict_time_one() < self.time) or
-                    (with_aircraft_id != None and (
-                        c.get_aircraft_two().get_id_aircraft() != with_aircraft_id or 
-                        c.get_conflict_time_one() < self.time))
-                ]
-                #self.logger.info(f"filtered_conflicts pour avion {self.id}: {filtered_conflicts}")
-                # Ajouter les conflits restants dans le nouveau collector
-                if filtered_conflicts:
-                    new_collector.add(key, filtered_conflicts)
-
-        # Remplacer l'ancien _conflict_dict par le nouveau
-        self._conflict_dict = new_collector
+        def is_cleared(conflict: 'ConflictInformation') -> bool:
+            # Le stockage garde une seule orientation: se placer du point de vue de l'avion
+            if conflict.get_aircraft_one().get_id_aircraft() == self.id:
+                own_time, other_id = conflict.get_conflict_time_one(), conflict.get_aircraft_two().get_id_aircraft()
+            else:
+                own_time, other_id = conflict.get_conflict_time_two(), conflict.get_aircraft_one().get_id_aircraft()
+            # Les conflits passes sont conserves
+            return own_time >= self.time and (with_aircraft_id == None or other_id == with_aircraft_id)
+
+        self.__conflict_store.remove_if(self.__conflict_store.get_keys_by_aircraft(self.id), is_cleared)
 
     def set_conflicts(self, conflict_info: 'ConflictInformation') -> None:
         """ 
-            Methode qui ajoute le conflict au dictionnaire.
+            Methode qui ajoute le conflict au stockage (remplace le conflit de même paire et balise).
         """
-        # Ajout du conflict dans le dictionnaire
-        conflict_with = conflict_info.get_aircraft_two().get_id_aircraft()
-        values = self._conflict_dict.get_from_key(conflict_with)
-
-        #self.logger.info(f"Ajout d'un conflict: {conflict_info}: {values}")
-        if values: # La cle existe si ca renvoie pas None
-            if not conflict_info in values:
-                self._conflict_dict.get_from_key(conflict_with).append(conflict_info) # Modification en place
-        else:
-            self._conflict_dict.add(key=conflict_with, value=[conflict_info]) # Forcer la valeur a etre une liste
+        #self.logger.info(f"Ajout d'un conflict: {conflict_info}")
+        self.__conflict_store.add(conflict_info)
 
 
     def update_conflicts(self, recalcul = True, dt:int = 0):
@@ -427,6 +493,57 @@ class Aircraft:
         """ Renvoie la position de l'avion au temps <time>"""
         return self.__find_next_position(target_time=time)
 
+    def get_timeline(self) -> Tuple[List[float], List[float], List[float], List[float]]:
+        """Temps de passage triés (ordre du plan de vol) et coordonnées / caps des balises associées,
+        construits une fois par plan de vol timé puis interrogés par bisect"""
+        if self.__timeline is None:
+            names   = list(self.flight_plan_timed.keys())
+            indices = [self.__geometry.index[name] for name in names]
+            times   = [self.flight_plan_timed[name] for name in names]
+            xs      = self.__geometry.xy[indices, 0].tolist()
+            ys      = self.__geometry.xy[indices, 1].tolist()
+            # Cap du tronçon qui arrive sur chaque balise (le 1er dépend de la position de départ)
+            headings = [None] + [float(self.__geometry.headings[i - 1]) for i in indices[1:]]
+            self.__timeline = (times, xs, ys, headings)
+        return self.__timeline
+
+    def positions_at(self, times: np.ndarray) -> np.ndarray:
+        """
+        Renvoie les positions (x, y) de l'avion aux instants <times>, sans modifier l'avion.
+        Même interpolation que get_position_from_time, vectorisée par searchsorted.
+
+        :param times: (N,) instants en secondes.
+        :return: (N, 2) positions horizontales.
+        """
+        times = np.asarray(times, dtype=float)
+        passage_times, xs, ys, _ = self.get_timeline()
+        passage_times = np.asarray(passage_times, dtype=float)
+        start_x, start_y = self.start_position.getXY()
+
+        # Bornes de chaque tronçon: départ (décollage) puis chaque balise du plan de vol
+        bound_times = np.concatenate([[self.take_off_time], passage_times])
+        bound_x     = np.concatenate([[start_x], xs])
+        bound_y     = np.concatenate([[start_y], ys])
+
+        # Indice de la prochaine balise: premier temps de passage strictement supérieur
+        next_index = np.searchsorted(passage_times, times, side='right') + 1
+        on_route   = next_index < len(bound_times)
+        next_index = np.minimum(next_index, len(bound_times) - 1)
+        previous_index = next_index - 1
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            progress = (np.round(times, 2) - bound_times[previous_index]) / (bound_times[next_index] - bound_times[previous_index])
+        x = bound_x[previous_index] + progress * (bound_x[next_index] - bound_x[previous_index])
+        y = bound_y[previous_index] + progress * (bound_y[next_index] - bound_y[previous_index])
+
+        # Arrivé: sur la dernière balise, avant le décollage: à la position de départ
+        x = np.where(on_route, x, bound_x[-1])
+        y = np.where(on_route, y, bound_y[-1])
+        before_take_off = times < self.take_off_time
+        x = np.where(before_take_off, start_x, x)
+        y = np.where(before_take_off, start_y, y)
+        return np.stack([x, y], axis=-1)
+
     def __find_next_position(self, target_time: float) -> Point:
         """Methode qui calcul par interpolation linéaire sa position 
         en fonction de la cible temporelle passéé en paramètre
@@ -435,20 +552,6 @@ class Aircraft:
         /!\     Cette méthode est très sensibe au modification !!!        /!\
         /!\/!\/!\/!\/!\/!\/!\/!\/!\/!\/!\/!\/!\/!\/!\/!\/!\/!\/!\/!\/!\/!\/!\
         """
-        def find_keys(flight_plan_timed: Dict[str, float], time: float):
-            """Chercher entre quelle balise l'avion est en fonction du time"""
-            # Convertir en liste triée de tuples, elle est deja triee si tout va bien.
-            # La retrier changerait le plan de vol, c'est une mauvaise idee !!!!
-            list_items = list(flight_plan_timed.items())  
-            lower, upper = None, None
-            for i, (key, value) in enumerate(list_items):
-                if time < value:
-                    upper = key
-                    lower = list_items[i - 1][0] if i > 0 else None
-                    break
-            else:
-                lower = list_items[-1][0]
-            return lower, upper
         #---------------------------------------
         self.flight_time = max(0, target_time - self.take_off_time) # si target_time < take_off alors avion pas décollé
         #self.time = target_time
@@ -458,26 +561,27 @@ class Aircraft:
             self.heading  = self.calculate_heading(self.start_position, self.flight_plan[0])
             return self.start_position
         else: # L'avion doit bouger
-            # Trouver les balises entre lesquelles se trouve l'avion
-            previous_balise_name, next_balise_name = find_keys(flight_plan_timed=self.flight_plan_timed, time=target_time)
+            # Trouver les balises entre lesquelles se trouve l'avion:
+            # la prochaine est la premiere dont le temps de passage est strictement superieur
+            passage_times, xs, ys, headings = self.get_timeline()
+            next_index = bisect_right(passage_times, target_time)
 
             #-------------- Cas 1 --------------------------
-            if next_balise_name == None:  # L'avion est arrivé à sa dernière balise
+            if next_index == len(passage_times):  # L'avion est arrivé à sa dernière balise
                 self._is_finished = True
-                x, y = self.flight_plan[-1].get_point().getXY() # se positionner sur la balise
-                self.position = Point(x, y, z=self.position.getZ())
+                self.position = Point(xs[-1], ys[-1], z=self.position.getZ()) # se positionner sur la balise
                 return self.position
             else: # L'avion a une prochaine balise donc recuperation du temps de passage a la balise
-                next_balise      = Balise.get_balise_by_name(next_balise_name)
-                next_balise_time = self.flight_plan_timed.get(next_balise_name)
+                next_x, next_y   = xs[next_index], ys[next_index]
+                next_balise_time = passage_times[next_index]
             
             #-------------- Cas 2 --------------------------
-            if previous_balise_name == None: # L'avion a démarré et est entre sa position_start et la next_balise (1ere)
-                previous_balise      = self.start_position
-                previous_balise_time = self.take_off_time # L'avion etait au depart si il n'y a pas de balise précédante
+            if next_index == 0: # L'avion a démarré et est entre sa position_start et la next_balise (1ere)
+                previous_x, previous_y = self.start_position.getXY()
+                previous_balise_time   = self.take_off_time # L'avion etait au depart si il n'y a pas de balise précédante
             else: # L'avion connait sa balise precedante
-                previous_balise       = Balise.get_balise_by_name(previous_balise_name)
-                previous_balise_time  = self.flight_plan_timed.get(previous_balise_name)
+                previous_x, previous_y = xs[next_index - 1], ys[next_index - 1]
+                previous_balise_time   = passage_times[next_index - 1]
 
             # La gestion des cas a ete faite:
             # les différentes variables sont définies et différentes de None
@@ -485,13 +589,16 @@ class Aircraft:
             progress = (self.__round(target_time) - previous_balise_time) / (next_balise_time - previous_balise_time)
 
             # Interpolation linéaire entre les balises
-            new_x = previous_balise.getX() + progress * (next_balise.getX() - previous_balise.getX())
-            new_y = previous_balise.getY() + progress * (next_balise.getY() - previous_balise.getY())
+            new_x = previous_x + progress * (next_x - previous_x)
+            new_y = previous_y + progress * (next_y - previous_y)
             new_z = self.position.getZ() #+ progress * (next_balise.getZ() - balise.getZ())
 
-            # Mettre à jour le heading de l'avion
+            # Mettre à jour le heading de l'avion: cap du tronçon, ou vers la 1ere balise depuis le depart
             new_point = Point(new_x, new_y, new_z)
-            self.heading = self.calculate_heading(new_point, next_balise)
+            if next_index == 0:
+                self.heading = self.calculate_heading(new_point, self.flight_plan[0])
+            else:
+                self.heading = headings[next_index]
             self.position = new_point
             self._is_finished = False
             #return self.controle_position(new_x, new_y, new_z) # modifie le heading pour faire un rebond 
@@ -510,6 +617,13 @@ class Aircraft:
     
     def set_commands(self, commands: List[DataStorage], recalcul : bool = True, dt:int = 0) -> None:
         """ Set la liste de commande a l'avion (DataStorage) et recalcule les conflit en consequence"""
+        self.load_commands(commands)
+
+        # Recalculer les conflicts
+        self.update_conflicts(recalcul=recalcul, dt=dt)
+
+    def load_commands(self, commands: List[DataStorage]) -> None:
+        """Set la liste de commande a l'avion (DataStorage) et son decollage, sans recalcul des temps ni des conflits"""
         if commands:
             commands.sort(key= lambda c: c.time)
             self.commands = commands
@@ -520,9 +634,6 @@ class Aircraft:
                 self.set_speed(cmd.speed)
                 #self.set_heading(cmd.heading)
 
-        # Recalculer les conflicts
-        self.update_conflicts(recalcul=recalcul, dt=dt)
-
     def add_command(self, command: DataStorage):
         # Ajouter une commande ie. un changement de vitesse ou de cap
         self.commands.append(command)
@@ -0,0 +1,439 @@
+from model.aircraft.storage import DataStorage
+from model.route import Airway
+from model.point import PointView
+from logging_config import setup_logging
+
+from collections.abc import Mapping
+from typing import List, Dict, Tuple, Iterator, Optional, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from model.aircraft.aircraft import Aircraft
+    from model.balise import Balise
+
+
+class FlightPlanTimedView(Mapping):
+    """Vue en lecture seule d'une ligne de la matrice des temps de passage de FleetTiming.
+    Se comporte comme le dictionnaire {nom de balise: temps de passage} de Aircraft.
+    L'arrondi est celui de Aircraft (round(..., 2)) appliqué à la lecture.
+    """
+    def __init__(self, columns: Dict[str, int], row: np.ndarray):
+        self.__columns = columns # Nom de balise -> indice de colonne (partagé par route)
+        self.__row     = row     # Vue numpy sur la ligne de la matrice
+
+    def __getitem__(self, balise_name: str) -> float:
+        return round(float(self.__row[self.__columns[balise_name]]), 2)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__columns)
+
+    def __len__(self) -> int:
+        return len(self.__columns)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class FleetTiming:
+    """Calcul vectorisé des temps de passage aux balises pour une flotte d'avions.
+
+    Les routes (plans de vol) sont stockées une seule fois dans une table: coordonnées
+    et distances cumulées depuis la première balise, complétées par NaN jusqu'à la
+    longueur de la plus longue route. Chaque avion est ensuite décrit par des tableaux:
+        - l'indice de sa route,
+        - sa position de départ (premier tronçon jusqu'à la première balise),
+        - son heure de décollage et sa vitesse initiale,
+        - les temps et vitesses de ses commandes (complétés par +inf / NaN).
+    Le calcul renvoie une matrice N x max_len des temps de passage en une seule passe NumPy,
+    selon le même modèle que Aircraft.calculate_estimated_times_commands:
+    chaque commande définit un segment à vitesse constante.
+    """
+    logger = setup_logging("FleetTiming")
+
+    def __init__(self, routes: List[List['Balise']]):
+        self.__routes = [list(route) for route in routes]
+        self.__max_len = max((len(route) for route in self.__routes), default=0)
+
+        # Géométrie précalculée de chaque route (cf. Airway.get_geometry)
+        geometries = [Airway.get_geometry(route) for route in self.__routes]
+
+        # Nom de balise -> colonne, pour chaque route (partagé par les vues)
+        self.__columns: List[Dict[str, int]] = [geometry.index for geometry in geometries]
+
+        # Coordonnées des balises et distances cumulées depuis la première balise de chaque route
+        self.__balises_xy   = np.full((len(self.__routes), self.__max_len, 2), np.nan)
+        self.__cumulative   = np.full((len(self.__routes), self.__max_len), np.nan)
+        for r, geometry in enumerate(geometries):
+            self.__balises_xy[r, :len(geometry)] = geometry.xy
+            self.__cumulative[r, :len(geometry)] = geometry.cumulative
+
+    def get_routes(self) -> List[List['Balise']]: return self.__routes
+    def get_max_len(self) -> int: return self.__max_len
+
+    def compute(self, route_index: np.ndarray,
+                      take_off_times: np.ndarray,
+                      speeds: np.ndarray,
+                      command_times: np.ndarray = None,
+                      command_speeds: np.ndarray = None,
+                      start_positions: np.ndarray = None) -> np.ndarray:
+        """
+        Calcule la matrice des temps de passage (non arrondis) de N avions.
+
+        :param route_index: (N,) indice de la route de chaque avion dans la table.
+        :param take_off_times: (N,) heure de décollage.
+        :param speeds: (N,) vitesse avant la première commande.
+        :param command_times: (N, C) temps des commandes triés, complétés par +inf.
+        :param command_speeds: (N, C) vitesses des commandes, complétées par NaN.
+        :param start_positions: (N, 2) position de départ, par défaut la première balise de la route.
+        :return: (N, max_len) temps de passage, NaN au-delà de la longueur de la route.
+        """
+        route_index    = np.asarray(route_index, dtype=int)
+        take_off_times = np.asarray(take_off_times, dtype=float)
+        speeds         = np.asarray(speeds, dtype=float)
+        n = len(route_index)
+        if command_times is None:
+            command_times  = np.full((n, 0), np.inf)
+            command_speeds = np.full((n, 0), np.nan)
+        command_times  = np.asarray(command_times, dtype=float).reshape(n, -1)
+        command_speeds = np.asarray(command_speeds, dtype=float).reshape(n, -1)
+
+        # Distance à parcourir jusqu'à chaque balise: premier tronçon + distances cumulées de la route
+        first_balise_xy = self.__balises_xy[route_index, 0]
+        if start_positions is None:
+            first_leg = np.zeros(n)
+        else:
+            delta = first_balise_xy - np.asarray(start_positions, dtype=float)
+            first_leg = np.sqrt(delta[:, 0]*delta[:, 0] + delta[:, 1]*delta[:, 1])
+        distances = first_leg[:, None] + self.__cumulative[route_index] # (N, L)
+
+        # Bornes des segments à vitesse constante: décollage puis commandes (au plus tôt au décollage)
+        bounds = np.concatenate([take_off_times[:, None],
+                                 np.maximum(command_times, take_off_times[:, None])], axis=1) # (N, C+1)
+        segment_speeds = np.concatenate([speeds[:, None],
+                                         np.where(np.isnan(command_speeds), 1., command_speeds)], axis=1)
+
+        # Distance parcourue à chaque borne (inf pour les commandes absentes)
+        with np.errstate(invalid='ignore'):
+            durations = np.where(np.isinf(bounds[:, 1:]), np.inf, np.diff(bounds, axis=1))
+        covered = np.concatenate([np.zeros((n, 1)),
+                                  np.cumsum(segment_speeds[:, :-1] * durations, axis=1)], axis=1) # (N, C+1)
+
+        # Segment sur lequel chaque balise est atteinte: nombre de bornes déjà dépassées
+        segment = np.sum(covered[:, None, 1:] < distances[:, :, None], axis=2) # (N, L)
+
+        bound_at   = np.take_along_axis(bounds, segment, axis=1)
+        covered_at = np.take_along_axis(covered, segment, axis=1)
+        speed_at   = np.take_along_axis(segment_speeds, segment, axis=1)
+        return bound_at + (distances - covered_at) / speed_at
+
+    def view(self, times: np.ndarray, aircraft_index: int, route_index: int) -> FlightPlanTimedView:
+        """Renvoie la vue {balise: temps} de la ligne <aircraft_index> de la matrice <times>"""
+        route_len = len(self.__routes[route_index])
+        return FlightPlanTimedView(self.__columns[route_index], times[aircraft_index, :route_len])
+
+    @staticmethod
+    def command_arrays(commands: List[List[DataStorage]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Tableaux d'entrée de compute pour des listes de commandes (non modifiées).
+        Le decollage et la vitesse initiale sont ceux de la premiere commande (cf. Aircraft.set_commands).
+
+        :return: (décollages, vitesses initiales, temps des commandes triés, vitesses des commandes),
+            décollage et vitesse à NaN pour une liste vide.
+        """
+        max_commands   = max((len(cmds) for cmds in commands), default=0)
+        command_times  = np.full((len(commands), max_commands), np.inf)
+        command_speeds = np.full((len(commands), max_commands), np.nan)
+        for i, cmds in enumerate(commands):
+            ordered = sorted(cmds, key=lambda c: c.time)
+            command_times[i, :len(ordered)]  = [c.time for c in ordered]
+            command_speeds[i, :len(ordered)] = [c.speed for c in ordered]
+
+        take_off_times = np.array([cmds[0].time if cmds and cmds[0].time is not None else np.nan for cmds in commands], dtype=float)
+        speeds         = np.array([cmds[0].speed if cmds else np.nan for cmds in commands], dtype=float)
+        return take_off_times, speeds, command_times, command_speeds
+
+    @classmethod
+    def estimate_aircrafts(cls, aircrafts: List['Aircraft'], commands: List[List[DataStorage]] = None) -> np.ndarray:
+        """
+        Calcule en une passe les temps de passage d'une liste d'avions et remplace
+        le plan de vol timé de chaque avion par une vue sur la matrice résultat.
+
+        :param aircrafts: Liste des avions (leurs positions courantes servent de départ).
+        :param commands: Commandes à utiliser pour chaque avion, par défaut celles de l'avion.
+        :return: La matrice (N, max_len) des temps de passage.
+        """
+        if not aircrafts:
+            return np.empty((0, 0))
+        if commands is None:
+            commands = [aircraft.get_commands() for aircraft in aircrafts]
+
+        # Table des routes distinctes
+        routes: Dict[Tuple[str, ...], int] = {}
+        route_table = []
+        route_index = np.empty(len(aircrafts), dtype=int)
+        for i, aircraft in enumerate(aircrafts):
+            key = tuple(balise.get_name() for balise in aircraft.get_flight_plan())
+            if key not in routes:
+                routes[key] = len(route_table)
+                route_table.append(aircraft.get_flight_plan())
+            route_index[i] = routes[key]
+
+        take_off_times, speeds, command_times, command_speeds = cls.command_arrays(commands)
+        # Sans commande, le decollage et la vitesse sont ceux de l'avion
+        take_off_times = np.where(np.isnan(take_off_times), [a.get_take_off_time() for a in aircrafts], take_off_times)
+        speeds         = np.where(np.isnan(speeds), [a.get_speed() for a in aircrafts], speeds)
+        start_positions = np.array([aircraft.get_position().getXY() for aircraft in aircrafts], dtype=float)
+
+        fleet = cls(route_table)
+        times = fleet.compute(route_index=route_index,
+                              take_off_times=take_off_times,
+                              speeds=speeds,
+                              command_times=command_times,
+                              command_speeds=command_speeds,
+                              start_positions=start_positions)
+
+        for i, aircraft in enumerate(aircrafts):
+            aircraft.set_flight_plan_timed(fleet.view(times, i, route_index[i]))
+        return times
+
+
+class FleetState:
+    """Etat cinématique d'une flotte (temps, positions, caps, fin de vol) en tableaux contigus.
+
+    Chaque avion est décrit par une ligne des tableaux de bornes, construite depuis sa
+    timeline (cf. Aircraft.get_timeline): décollage puis temps de passage aux balises,
+    coordonnées associées (position de départ puis balises) et cap du tronçon arrivant
+    sur chaque balise, complétés par +inf / NaN jusqu'à la plus longue timeline.
+    Un pas de simulation avance tous les avions par une seule interpolation vectorisée,
+    selon le même modèle que Aircraft.update (mêmes arrondis, mêmes caps).
+
+    Seuls les avions en vol sont interpolés: un échéancier des décollages (triés) et la
+    détection des arrivées maintiennent l'ensemble des avions actifs. Un avion pas encore
+    parti reste a sa position de départ, un avion arrivé sur sa dernière balise, sans calcul.
+    Le nombre d'avions arrivés est tenu a jour: is_finished() est en O(1).
+
+    Utilisation par pas de timer: sync() relit les seuls avions modifiés hors de FleetState
+    (cf. Aircraft.get_own_kinematics_version), step(dt) autant de fois que nécessaire,
+    puis store() rattache les avions recalculés à l'état: leur temps, temps de vol et position
+    (PointView) sont lus dans les tableaux, get_position() n'alloue rien.
+    """
+    logger = setup_logging("FleetState")
+
+    def __init__(self, aircrafts: List['Aircraft']):
+        self.__aircrafts = list(aircrafts)
+        n = len(self.__aircrafts)
+
+        # Etat courant de chaque avion
+        self.__time        = np.zeros(n)
+        self.__flight_time = np.zeros(n)
+        self.__heading     = np.zeros(n)
+        self.__finished    = np.zeros(n, dtype=bool)
+        self.__positions   = np.zeros((n, 3))
+        self.__views       = [PointView(self.__positions, i) for i in range(n)]
+
+        # Données fixes de chaque avion: départ, cap au départ, première balise
+        self.__rows        = np.arange(n)
+        self.__take_off    = np.zeros(n)
+        self.__start_xy    = np.zeros((n, 2))
+        self.__start_heading = np.zeros(n)
+        self.__first_xy    = np.zeros((n, 2))
+        for i, aircraft in enumerate(self.__aircrafts):
+            start = aircraft.get_start_position()
+            self.__start_xy[i]      = start.getXY()
+            self.__positions[i]     = aircraft.get_position().getXYZ()
+            self.__positions[i, 2]  = start.getZ()
+            self.__first_xy[i]      = aircraft.get_flight_plan()[0].getXY()
+            self.__start_heading[i] = aircraft.calculate_heading(start, aircraft.get_flight_plan()[0])
+
+        # Echéancier: temps commun de la flotte (None si les avions ont des temps différents),
+        # décollages à venir triés, avions actifs, avions arrivés
+        self.__clock: Optional[float] = None
+        self.__pending_rows     = np.empty(0, dtype=int)
+        self.__pending_take_off = np.empty(0)
+        self.__next_departure   = 0
+        self.__active      = np.zeros(n, dtype=bool)
+        self.__active_rows = np.empty(0, dtype=int)
+        self.__finished_count = 0
+        self.__all_dirty   = True                    # Toutes les lignes à recalculer au prochain pas
+        self.__touched     = np.zeros(n, dtype=bool) # Lignes modifiées depuis le dernier store()
+
+        # Timelines: tableaux de bornes (reconstruits si un plan de vol timé change)
+        self.__version  = None                  # Version de l'ensemble des avions (cf. Aircraft.get_kinematics_version) au dernier sync
+        self.__versions = np.full(n, -1)         # Version de chaque avion (cf. Aircraft.get_own_kinematics_version) au dernier sync
+        self.__allocate(0)
+        self.sync()
+
+    def __allocate(self, max_len: int) -> None:
+        """Alloue les tableaux de bornes pour des timelines d'au plus <max_len> balises"""
+        n = len(self.__aircrafts)
+        self.__bound_times = np.full((n, max_len + 1), np.inf)
+        self.__bound_x     = np.full((n, max_len + 1), np.nan)
+        self.__bound_y     = np.full((n, max_len + 1), np.nan)
+        self.__bound_headings = np.full((n, max_len + 1), np.nan)
+        self.__lengths     = np.zeros(n, dtype=int)
+        self.__arrival     = np.full(n, np.inf)
+        self.__timelines   = [None] * n
+
+    def __fill(self, i: int, aircraft: 'Aircraft', timeline: Tuple[List[float], ...]) -> None:
+        """Remplit la ligne <i> des bornes depuis la timeline de l'avion"""
+        times, xs, ys, headings = timeline
+        length = len(times)
+        self.__bound_times[i] = np.inf
+        self.__bound_x[i] = self.__bound_y[i] = self.__bound_headings[i] = np.nan
+        self.__bound_times[i, 0] = aircraft.get_take_off_time()
+        self.__bound_times[i, 1:length + 1] = times
+        self.__bound_x[i, 0], self.__bound_y[i, 0] = self.__start_xy[i]
+        self.__bound_x[i, 1:length + 1] = xs
+        self.__bound_y[i, 1:length + 1] = ys
+        self.__bound_headings[i, 2:length + 1] = headings[1:]
+        self.__lengths[i]  = length
+        self.__arrival[i]  = times[-1] if length else -np.inf
+        self.__take_off[i] = aircraft.get_take_off_time()
+        self.__timelines[i] = timeline
+
+    def get_aircrafts(self) -> List['Aircraft']: return self.__aircrafts
+    def get_times(self) -> np.ndarray: return self.__time
+    def get_positions(self) -> np.ndarray: return self.__positions
+    def get_headings(self) -> np.ndarray: return self.__heading
+    def get_finished(self) -> np.ndarray: return self.__finished
+    def get_active_rows(self) -> np.ndarray: return self.__active_rows
+    def get_time_of(self, row: int) -> float: return self.__time[row].item()
+    def get_flight_time_of(self, row: int) -> float: return self.__flight_time[row].item()
+    def get_view(self, row: int) -> PointView: return self.__views[row]
+
+    def matches(self, aircrafts: List['Aircraft']) -> bool:
+        """True si l'état décrit exactement ces avions, dans cet ordre"""
+        return len(aircrafts) == len(self.__aircrafts) and all(a is b for a, b in zip(aircrafts, self.__aircrafts))
+
+    def sync(self) -> None:
+        """Relit les seuls avions modifiés depuis le dernier sync(): bornes des avions dont la timeline
+        ou le décollage a changé, puis temps, cap et fin de vol de ces avions"""
+        if not self.__aircrafts:
+            return
+        version = self.__aircrafts[0].get_kinematics_version()
+        if version == self.__version:
+            return
+        versions = np.fromiter((aircraft.get_own_kinematics_version() for aircraft in self.__aircrafts),
+                               dtype=int, count=len(self.__aircrafts))
+        rows = np.flatnonzero(versions != self.__versions).tolist()
+        self.__version = version
+        if not rows: # Avions hors de l'etat
+            return
+
+        timelines = {i: self.__aircrafts[i].get_timeline() for i in rows}
+        max_len = max(len(timeline[0]) for timeline in timelines.values())
+        if max_len >= self.__bound_times.shape[1]: # Timeline plus longue: tout réallouer et tout relire
+            self.__allocate(max(max_len, max(len(aircraft.get_timeline()[0]) for aircraft in self.__aircrafts)))
+            rows = list(range(len(self.__aircrafts)))
+            timelines = {i: aircraft.get_timeline() for i, aircraft in enumerate(self.__aircrafts)}
+        for i in rows:
+            aircraft = self.__aircrafts[i]
+            if timelines[i] is not self.__timelines[i] or aircraft.get_take_off_time() != self.__take_off[i]:
+                self.__fill(i, aircraft, timelines[i])
+            self.__time[i]     = aircraft.get_time()
+            self.__heading[i]  = aircraft.get_heading()
+            self.__finished[i] = aircraft.has_reached_final_point()
+        self.__versions[rows] = versions[rows]
+        self.__finished_count = int(np.count_nonzero(self.__finished))
+        self.__schedule()
+
+    def __schedule(self) -> None:
+        """Reconstruit l'échéancier depuis le temps de chaque avion; toutes les lignes seront recalculées au prochain pas"""
+        uniform = len(self.__time) > 0 and bool(np.all(self.__time == self.__time[0]))
+        self.__clock = float(self.__time[0]) if uniform else None
+        before = self.__time < self.__take_off
+        pending = np.flatnonzero(before)
+        order = np.argsort(self.__take_off[pending], kind='stable')
+        self.__pending_rows     = pending[order]
+        self.__pending_take_off = self.__take_off[self.__pending_rows]
+        self.__next_departure   = 0
+        self.__active[:]   = ~before & (self.__time < self.__arrival)
+        self.__active_rows = np.flatnonzero(self.__active)
+        self.__all_dirty   = True
+
+    def store(self) -> None:
+        """Réécrit le cap et la fin de vol des seuls avions recalculés depuis le dernier store() et les rattache
+        à l'état (temps, temps de vol et position lus dans les tableaux): les autres avions ne coûtent rien"""
+        for i in np.flatnonzero(self.__touched).tolist():
+            self.__aircrafts[i].set_kinematic_state(fleet_state=self, row=i, heading=self.__heading[i].item(),
+                                                    is_finished=bool(self.__finished[i]))
+        self.__touched[:] = False
+
+    def is_finished(self) -> bool:
+        """True si tous les avions ont atteint leur dernière balise"""
+        return self.__finished_count == len(self.__aircrafts)
+
+    def set_time(self, time: float) -> None:
+        """Place tous les avions au même temps <time> (les positions sont recalculées au prochain pas)"""
+        self.__time[:] = time
+        self.__schedule()
+
+    def step(self, timestep: float) -> None:
+        """Avance tous les avions de <timestep> secondes (cf. Aircraft.update), seuls les avions en vol sont recalculés"""
+        if self.__clock is not None: # Temps commun: décollages lus dans l'échéancier
+            self.__clock = round(self.__clock + timestep, 2)
+            self.__time.fill(self.__clock)
+            next_departure = int(np.searchsorted(self.__pending_take_off, self.__clock, side='right'))
+            departing = self.__pending_rows[self.__next_departure:next_departure]
+            self.__next_departure = next_departure
+        else: # Temps différents: tout recalculer
+            self.__time = np.round(self.__time + timestep, 2)
+            departing = np.empty(0, dtype=int)
+            self.__all_dirty = True
+
+        rows = self.__rows if self.__all_dirty else np.concatenate([self.__active_rows, departing])
+        arrived = self.__interpolate(rows)
+        if self.__all_dirty or len(departing) or arrived:
+            self.__active_rows = np.flatnonzero(self.__active)
+        self.__all_dirty = False
+        self.__touched[rows] = True
+        self.__flight_time[:] = np.maximum(0., self.__time - self.__take_off)
+
+    def __interpolate(self, rows: np.ndarray) -> int:
+        """Positions, caps et fins de vol des lignes <rows> au temps courant (cf. Aircraft.__find_next_position).
+        Met à jour les avions actifs et arrivés, renvoie le nombre de changements de fin de vol"""
+        if len(rows) == 0:
+            return 0
+        # Temps commun (scalaire) ou temps de chaque ligne
+        time  = self.__clock if self.__clock is not None else self.__time[rows]
+        local = np.arange(len(rows))
+        bound_times, bound_x, bound_y = self.__bound_times[rows], self.__bound_x[rows], self.__bound_y[rows]
+        lengths = self.__lengths[rows]
+
+        # Nombre de balises déjà passées: la prochaine est la premiere dont le temps est strictement superieur
+        passed   = (bound_times[:, 1:] <= np.reshape(time, (-1, 1))).sum(axis=1)
+        finished = passed == lengths
+        next_bound     = np.minimum(passed + 1, lengths)
+        previous_bound = next_bound - 1
+
+        previous_time = bound_times[local, previous_bound]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            progress = (time - previous_time) / (bound_times[local, next_bound] - previous_time)
+        previous_x, previous_y = bound_x[local, previous_bound], bound_y[local, previous_bound]
+        x = previous_x + progress * (bound_x[local, next_bound] - previous_x)
+        y = previous_y + progress * (bound_y[local, next_bound] - previous_y)
+
+        # Cap du tronçon, ou vers la 1ere balise depuis le depart; inchangé une fois arrivé
+        first_xy = self.__first_xy[rows]
+        heading = np.where(passed == 0,
+                           np.arctan2(first_xy[:, 1] - y, first_xy[:, 0] - x) % (2*np.pi),
+                           self.__bound_headings[rows, next_bound])
+        x = np.where(finished, bound_x[local, lengths], x)
+        y = np.where(finished, bound_y[local, lengths], y)
+        heading = np.where(finished, self.__heading[rows], heading)
+
+        # Avant le décollage: à la position de départ, cap vers la 1ere balise
+        before_take_off = time < self.__take_off[rows]
+        start_xy = self.__start_xy[rows]
+        finished = finished & ~before_take_off
+        was_finished = self.__finished[rows]
+        changed = int(np.count_nonzero(finished != was_finished))
+        self.__finished_count += int(np.count_nonzero(finished)) - int(np.count_nonzero(was_finished))
+
+        self.__positions[rows, 0] = np.where(before_take_off, start_xy[:, 0], x)
+        self.__positions[rows, 1] = np.where(before_take_off, start_xy[:, 1], y)
+        self.__heading[rows]      = np.where(before_take_off, self.__start_heading[rows], heading)
+        self.__finished[rows]     = finished
+        self.__active[rows]       = ~before_take_off & ~finished
+        return changed
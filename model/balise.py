@@ -1,6 +1,6 @@
-from typing import List, Dict
+from typing import List, Dict, Set
 from model.point import Point
-from model.conflict_manager import ConflictInformation
+from model.conflict_manager import ConflictInformation, ConflictStore
 
 from copy import deepcopy
 from logging_config import setup_logging
@@ -12,7 +12,7 @@ class Balise(Point):
         super().__init__(x, y, z)
         self.name = name
         self.__is_external = is_external
-        self.conflits: List[ConflictInformation] = []
+        self.__conflict_store = ConflictStore() # Remplacé par celui du ConflictManager à l'enregistrement
         self.logger = setup_logging(__class__.__name__)
         # Enregistrer la balise dans le registre
         if name:
@@ -40,28 +40,41 @@ class Balise(Point):
         repr = repr.replace('Point', 'Balise').replace(')', f", name='{self.name}', is_external={self.__is_external})")
         return repr
     
+    def get_conflict_store(self) -> ConflictStore: return self.__conflict_store
+    def set_conflict_store(self, conflict_store: ConflictStore) -> None:
+        """Branche la balise sur le stockage de conflits partagé (ex: celui du ConflictManager)"""
+        self.__conflict_store = conflict_store
+
     def set_conflicts(self, conflicts: List[ConflictInformation]) -> None:
         #self.logger.info(f"Adding/Replacing conflict in balise: {self}\nfrom {self.conflits} to {conflicts}")
-        self.conflits = conflicts # Ajoute les conflits
+        for key in self.__conflict_store.get_keys_by_balise(self.name):
+            self.__conflict_store.remove(key)
+        for conflict in conflicts:
+            self.__conflict_store.add(conflict) # Ajoute les conflits
 
     def add_conflicts(self, conflict: ConflictInformation) -> None:
         #self.logger.info(f"Adding/Replacing conflict in balise: {self}\nfrom {self.conflits} to {conflicts}")
-        if conflict not in self.conflits :
-            self.conflits.append(conflict)  # Ajoute les conflits
+        self.__conflict_store.add(conflict)  # Ajoute ou remplace le conflit
 
     
-    def get_conflicts(self) -> List[ConflictInformation]: return self.conflits
+    def get_conflicts(self) -> List[ConflictInformation]: return self.__conflict_store.get_by_balise(self.name)
 
     def clear_conflicts(self, time: float) -> None: 
         #self.logger.info(f"Clearing conflict in balise: {self}")
-    
-        filter_conflict = []
-        for c in self.conflits:
-            time_of_conflict = min(c.get_conflict_time_one(), c.get_conflict_time_two())
-            if time_of_conflict < time:
-                filter_conflict.append(c)
-        
-        self.conflits = filter_conflict
+        # Garder les conflits dont le premier passage est antérieur à <time>
+        self.__conflict_store.remove_if(self.__conflict_store.get_keys_by_balise(self.name),
+                                        lambda c: min(c.get_conflict_time_one(), c.get_conflict_time_two()) >= time)
+
+    def clear_conflicts_with(self, aircraft_id: int, with_aircraft_ids: Set[int]) -> None:
+        """
+        Supprime les conflits entre un avion et un ensemble d'autres avions.
+
+        Args:
+            aircraft_id (int): ID de l'avion cible.
+            with_aircraft_ids (Set[int]): IDs des avions dont les conflits avec la cible sont supprimés.
+        """
+        for with_aircraft_id in with_aircraft_ids:
+            self.clear_conflicts_between(aircraft_id, with_aircraft_id)
 
     def clear_conflicts_between(self, aircraft_id_one: int, aircraft_id_two: int) -> None:
         """
@@ -71,20 +84,12 @@ class Balise(Point):
             aircraft_id_one (int): ID du premier avion.
             aircraft_id_two (int): ID du second avion.
         """
-        self.conflits = [
-            conflict for conflict in self.conflits
-            if not (
-                (conflict.get_aircraft_one().get_id_aircraft() == aircraft_id_one and
-                conflict.get_aircraft_two().get_id_aircraft() == aircraft_id_two)
-                or
-                (conflict.get_aircraft_one().get_id_aircraft() == aircraft_id_two and
-                conflict.get_aircraft_two().get_id_aircraft() == aircraft_id_one)
-            )
-        ]
+        self.__conflict_store.remove(ConflictStore.make_key(aircraft_id_one, aircraft_id_two, self.name))
 
     
     def deepcopy(self) -> 'Balise':
-        new_balise = deepcopy(self)
+        # Le stockage de conflits partagé n'est pas copié: la copie repart d'un stockage vide
+        new_balise = deepcopy(self, memo={id(self.__conflict_store): ConflictStore()})
         return new_balise       
     
     @classmethod
@@ -244,6 +244,9 @@ Airway(name="SOUTHNORTH53", points=["GAI", "ONGHI", "ETORI", "SPIDY", "MTL", "LT
 Airway(name="SOUTHNORTH54", points=["GAI", "ONGHI", "ETORI", "SPIDY", "MTL", "GRENA", "BOSUA", "JUVEN", "BIELA"])
 ]
 
+# L'espace aerien est statique: geometrie des routes calculee une seule fois
+Airway.compile_geometry()
+
 
 #------------------------------------------------------------------------------
 #--------- Definition  des balise de departs et d'arrivées: -------------------
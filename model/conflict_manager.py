@@ -1,10 +1,11 @@
 from dataclasses import dataclass
+from bisect import bisect_left, bisect_right, insort
 
 import numpy as np
 
 from logging_config import setup_logging
 
-from typing import List, TYPE_CHECKING
+from typing import List, Dict, Tuple, Callable, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from model.aircraft.aircraft import Aircraft
@@ -50,8 +51,198 @@ class ConflictInformation:
         return f"ConflictInformation(id_one={id_one} (v={speed_one}), id_two={id_two} (v={speed_two}), time_one={self.conflict_time_one}, time_two={self.conflict_time_two}, location=\'{self.location.get_name()}\')"
 
 
+ConflictKey = Tuple[int, int, str] # (plus petit id avion, plus grand id avion, nom de balise)
+
+
+class ConflictTimeline:
+    """Index des intervalles de temps des conflits [min(t1, t2), max(t1, t2)].
+
+    Les intervalles sont rangés dans des listes triées par début (une globale et une par balise),
+    maintenues par bisect. La durée d'un intervalle est bornée (au plus time_threshold), donc
+    les conflits qui recoupent [t0, t1] ont leur début dans [t0 - durée max, t1]: une recherche
+    se fait en O(log n + k), k étant le nombre d'intervalles de cette plage.
+
+    Utilisé par la vue des conflits (cf. ConflictManager.split_conflicts). Les fonctions objectives
+    (algorithm/objective_function) ne comptent pas les conflits sur une fenêtre de temps mais sur
+    les avions optimisés, et le Scenario les évalue sans ConflictManager: aucune ne passe par cet index.
+    """
+    def __init__(self):
+        self.__intervals: List[Tuple[float, float, ConflictKey]] = []             # (début, fin, clé) triés
+        self.__by_balise: Dict[str, List[Tuple[float, float, ConflictKey]]] = {}
+        self.__max_duration = 0. # Ne diminue pas lors des suppressions: borne supérieure
+
+    @staticmethod
+    def interval_of(conflict: ConflictInformation) -> Tuple[float, float]:
+        return (min(conflict.conflict_time_one, conflict.conflict_time_two),
+                max(conflict.conflict_time_one, conflict.conflict_time_two))
+
+    def add(self, key: ConflictKey, start: float, end: float) -> None:
+        insort(self.__intervals, (start, end, key))
+        insort(self.__by_balise.setdefault(key[2], []), (start, end, key))
+        self.__max_duration = max(self.__max_duration, end - start)
+
+    def remove(self, key: ConflictKey, start: float, end: float) -> None:
+        for intervals in (self.__intervals, self.__by_balise.get(key[2], [])):
+            index = bisect_left(intervals, (start, end, key))
+            if index < len(intervals) and intervals[index] == (start, end, key):
+                del intervals[index]
+        if not self.__by_balise.get(key[2], True):
+            del self.__by_balise[key[2]]
+
+    def clear(self) -> None:
+        self.__intervals, self.__by_balise, self.__max_duration = [], {}, 0.
+
+    def __get_intervals(self, balise_name: Optional[str]) -> List[Tuple[float, float, ConflictKey]]:
+        return self.__intervals if balise_name is None else self.__by_balise.get(balise_name, [])
+
+    def within(self, t0: float, t1: float, balise_name: Optional[str] = None) -> List[ConflictKey]:
+        """Clés des conflits dont l'intervalle recoupe [t0, t1], triées par début"""
+        intervals = self.__get_intervals(balise_name)
+        low = bisect_left(intervals, (t0 - self.__max_duration,))
+        high = bisect_right(intervals, (t1, float('inf')))
+        return [key for _, end, key in intervals[low:high] if end >= t0]
+
+    def after(self, time: float, k: int, balise_name: Optional[str] = None) -> List[ConflictKey]:
+        """Clés des <k> prochains conflits qui commencent strictement après <time>"""
+        intervals = self.__get_intervals(balise_name)
+        low = bisect_right(intervals, (time, float('inf')))
+        return [key for _, _, key in intervals[low:low + k]]
+
+    def count_by_balise(self, t0: float, t1: float) -> Dict[str, int]:
+        """Nombre de conflits par balise dont l'intervalle recoupe [t0, t1]"""
+        counts: Dict[str, int] = {}
+        for key in self.within(t0, t1):
+            counts[key[2]] = counts.get(key[2], 0) + 1
+        return counts
+
+    def __len__(self) -> int:
+        return len(self.__intervals)
+
+
+class ConflictStore:
+    """Stockage unique des conflits, indexé par (plus petit id, plus grand id, nom de balise).
+
+    Ajout, suppression et recherche se font en O(1). Deux index secondaires (par avion et par balise)
+    permettent aux getters de Aircraft, Balise et ConflictManager de lire le même stockage
+    sans parcourir de liste. Un conflit est conservé dans l'orientation du dernier ajout;
+    l'orientation inverse est gardée pour les lectures du point de vue du second avion.
+    Les intervalles de temps des conflits sont indexés dans un ConflictTimeline.
+    """
+    def __init__(self):
+        self.__conflicts: Dict[ConflictKey, Tuple[ConflictInformation, ConflictInformation]] = {}
+        self.__by_aircraft: Dict[int, Dict[ConflictKey, None]] = {} # Dictionnaires utilisés comme ensembles ordonnés
+        self.__by_balise: Dict[str, Dict[ConflictKey, None]] = {}
+        self.__timeline = ConflictTimeline()
+
+    def get_timeline(self) -> ConflictTimeline: return self.__timeline
+
+    @staticmethod
+    def make_key(aircraft_id_one: int, aircraft_id_two: int, balise_name: str) -> ConflictKey:
+        return (min(aircraft_id_one, aircraft_id_two), max(aircraft_id_one, aircraft_id_two), balise_name)
+
+    @staticmethod
+    def key_of(conflict: ConflictInformation) -> ConflictKey:
+        return ConflictStore.make_key(conflict.get_aircraft_one().get_id_aircraft(),
+                                      conflict.get_aircraft_two().get_id_aircraft(),
+                                      conflict.get_location().get_name())
+
+    @staticmethod
+    def reverse(conflict: ConflictInformation) -> ConflictInformation:
+        """Le même conflit vu depuis le second avion"""
+        return ConflictInformation(conflict.aircraft_two, conflict.aircraft_one,
+                                   conflict.conflict_time_two, conflict.conflict_time_one, conflict.location)
+
+    def add(self, conflict: ConflictInformation) -> None:
+        """Ajoute le conflit ou remplace celui de même clé."""
+        key = self.key_of(conflict)
+        stored = self.__conflicts.get(key)
+        if stored is None:
+            self.__conflicts[key] = (conflict, self.reverse(conflict))
+            self.__by_aircraft.setdefault(key[0], {})[key] = None
+            self.__by_aircraft.setdefault(key[1], {})[key] = None
+            self.__by_balise.setdefault(key[2], {})[key] = None
+            self.__timeline.add(key, *ConflictTimeline.interval_of(conflict))
+        elif stored[0] != conflict:
+            self.__conflicts[key] = (stored[1], stored[0]) if stored[1] == conflict else (conflict, self.reverse(conflict))
+            interval, new_interval = ConflictTimeline.interval_of(stored[0]), ConflictTimeline.interval_of(conflict)
+            if interval != new_interval:
+                self.__timeline.remove(key, *interval)
+                self.__timeline.add(key, *new_interval)
+
+    def remove(self, key: ConflictKey) -> bool:
+        """Supprime le conflit de clé <key>, renvoie False s'il n'existe pas."""
+        stored = self.__conflicts.pop(key, None)
+        if stored is None:
+            return False
+        self.__timeline.remove(key, *ConflictTimeline.interval_of(stored[0]))
+        for index, index_key in ((self.__by_aircraft, key[0]), (self.__by_aircraft, key[1]), (self.__by_balise, key[2])):
+            keys = index.get(index_key)
+            if keys is not None:
+                keys.pop(key, None)
+                if not keys: del index[index_key]
+        return True
+
+    def discard(self, conflict: ConflictInformation) -> None:
+        """Supprime le conflit s'il est stocké (dans l'une ou l'autre orientation)."""
+        if conflict in self:
+            self.remove(self.key_of(conflict))
+
+    def remove_if(self, keys: List[ConflictKey], predicate: Callable[[ConflictInformation], bool]) -> None:
+        for key in keys:
+            if predicate(self.__conflicts[key][0]):
+                self.remove(key)
+
+    def get(self, key: ConflictKey) -> Optional[ConflictInformation]:
+        stored = self.__conflicts.get(key)
+        return stored[0] if stored else None
+
+    def get_all(self) -> List[ConflictInformation]:
+        return [stored[0] for stored in self.__conflicts.values()]
+
+    def get_keys_by_aircraft(self, aircraft_id: int) -> List[ConflictKey]:
+        return list(self.__by_aircraft.get(aircraft_id, ()))
+
+    def get_keys_by_balise(self, balise_name: str) -> List[ConflictKey]:
+        return list(self.__by_balise.get(balise_name, ()))
+
+    def get_by_aircraft(self, aircraft_id: int) -> List[ConflictInformation]:
+        """Conflits d'un avion, orientés de son point de vue (aircraft_one est l'avion)."""
+        conflicts = []
+        for key in self.__by_aircraft.get(aircraft_id, ()):
+            conflict, reversed_conflict = self.__conflicts[key]
+            conflicts.append(conflict if conflict.get_aircraft_one().get_id_aircraft() == aircraft_id else reversed_conflict)
+        return conflicts
+
+    def get_by_balise(self, balise_name: str) -> List[ConflictInformation]:
+        return [self.__conflicts[key][0] for key in self.__by_balise.get(balise_name, ())]
+
+    def has_aircraft(self, aircraft_id: int) -> bool:
+        return aircraft_id in self.__by_aircraft
+
+    def reindex(self) -> None:
+        """Recalcule les clés à partir des conflits stockés (ex: après un changement d'id d'avion)."""
+        conflicts = self.get_all()
+        self.__conflicts, self.__by_aircraft, self.__by_balise = {}, {}, {}
+        self.__timeline.clear()
+        for conflict in conflicts:
+            self.add(conflict)
+
+    def __contains__(self, conflict: ConflictInformation) -> bool:
+        stored = self.__conflicts.get(self.key_of(conflict))
+        return stored is not None and conflict in stored
+
+    def __len__(self) -> int:
+        return len(self.__conflicts)
+
+
 class ConflictManager:
-    """Manager responsable de la détection et de la gestion des conflits."""
+    """Manager responsable de la détection et de la gestion des conflits.
+
+    Les temps de passage des avions enregistrés sont indexés par balise dans des listes
+    triées de (temps, id avion), maintenues par bisect. Lorsqu'un avion est modifié, seules
+    ses entrées sont retirées puis réinsérées, et il n'est comparé qu'aux passages situés
+    dans la fenêtre [t - time_threshold, t + time_threshold] de chacune de ses balises.
+    """
     logger = setup_logging("ConflictManager")
 
     def __init__(self, time_threshold: float = 60):
@@ -59,22 +250,93 @@ class ConflictManager:
         self.balises = {}
         self.time_threshold = time_threshold
         self.time_simulation = None
-        self.conflicts: List[ConflictInformation] = []
+        self.__store = ConflictStore() # Partagé avec les avions et balises enregistrés
+
+        self.__passages: Dict[str, List[Tuple[float, int]]] = {}      # Balise -> [(temps, id avion)] triés
+        self.__indexed_passages: Dict[int, List[Tuple[str, float]]] = {} # Id avion -> [(balise, temps)] indexés
+
+    def get_conflict_store(self) -> ConflictStore: return self.__store
+
+    def get_passages(self, balise_name: str) -> List[Tuple[float, int]]:
+        """Renvoie les passages (temps, id avion) indexés pour une balise, triés par temps."""
+        return self.__passages.get(balise_name, [])
 
     def register_aircraft(self, aircraft: 'Aircraft') -> None:
         """Enregistre un avion dans le gestionnaire."""
         self.aircrafts[aircraft.get_id_aircraft()] = aircraft
-        self.detect_conflicts(list(self.aircrafts.values()))  # recalculer les conflits car certains peuvent apparaitre
+        aircraft.set_conflict_store(self.__store)
+        self.__index_aircraft(aircraft)
+        # Les conflits entre avions deja enregistres sont connus: seuls ceux du nouvel avion peuvent apparaitre
+        self.__detect_conflicts_of(aircraft, target_first=False)
+
+    def register_fleet(self, aircrafts: List['Aircraft'], balises: List['Balise'] = ()) -> None:
+        """
+        Enregistre en bloc une flotte d'avions et des balises, puis détecte tous les conflits
+        en un seul balayage par balise, au lieu d'une détection par avion enregistré.
+
+        :param aircrafts: Les avions à enregistrer (leurs temps de passage doivent être à jour).
+        :param balises: Les balises à enregistrer.
+        """
+        for balise in balises:
+            self.register_balise(balise)
+        for aircraft in aircrafts:
+            self.aircrafts[aircraft.get_id_aircraft()] = aircraft
+            aircraft.set_conflict_store(self.__store)
+
+        # Reconstruire l'index: un tri par balise plutôt qu'une insertion par passage
+        self.__passages = {}
+        self.__indexed_passages = {}
+        for aircraft_id, aircraft in self.aircrafts.items():
+            passages = list(aircraft.get_flight_plan_timed().items())
+            for balise_name, passage_time in passages:
+                self.__passages.setdefault(balise_name, []).append((passage_time, aircraft_id))
+            self.__indexed_passages[aircraft_id] = passages
+        for entries in self.__passages.values():
+            entries.sort()
+
+        # Effacer les conflits futurs des avions puis tous les conflits entre avions enregistrés
+        registered_ids = set(self.aircrafts)
+        for aircraft in self.aircrafts.values():
+            aircraft.clear_conflicts()
+        for aircraft_id in registered_ids:
+            self.__store.remove_if(self.__store.get_keys_by_aircraft(aircraft_id),
+                                   lambda c: c.get_aircraft_one().get_id_aircraft() in registered_ids and
+                                             c.get_aircraft_two().get_id_aircraft() in registered_ids)
+
+        # Balayage: à égalité de temps, le dernier avion enregistré passe en premier,
+        # comme après la mise à jour successive de chaque avion
+        rank = {aircraft_id: i for i, aircraft_id in enumerate(self.aircrafts)}
+        for balise_name, entries in self.__passages.items():
+            balise = self.balises.get(balise_name)
+            if not balise: continue
+
+            passages = sorted(entries, key=lambda entry: (entry[0], -rank[entry[1]]))
+            for i in range(len(passages) - 1):
+                time1, aircraft_id1 = passages[i]
+                for j in range(i + 1, len(passages)):
+                    time2, aircraft_id2 = passages[j]
+                    if time2 - time1 > self.time_threshold:
+                        break # Les avions suivants sont trop éloignés dans le temps
+
+                    aircraft1, aircraft2 = self.aircrafts[aircraft_id1], self.aircrafts[aircraft_id2]
+                    conflict_info_one = ConflictInformation(aircraft1, aircraft2, time1, time2, balise)
+                    conflict_info_two = ConflictInformation(aircraft2, aircraft1, time2, time1, balise)
+
+                    aircraft1.set_conflicts(conflict_info_one)
+                    aircraft2.set_conflicts(conflict_info_two)
+
+                    self.add_conflicts(conflict_info_one if time1 < time2 else conflict_info_two)
 
     def register_balise(self, balise: 'Balise') -> None:
         """Enregistre une balise dans le gestionnaire."""
         self.balises[balise.get_name()] = balise
+        balise.set_conflict_store(self.__store)
 
     def delete_aircraft(self, aircraft: 'Aircraft') -> bool:
         aircraft_id = aircraft.get_id_aircraft()
         if self.aircrafts.get(aircraft_id):
             del self.aircrafts[aircraft_id]
-            self.detect_conflicts(list(self.aircrafts.values())) # recalculer les conflits car certains peuvent disparaitre
+            self.__unindex_aircraft(aircraft_id)
             return True
         else: return False
 
@@ -85,25 +347,93 @@ class ConflictManager:
         """
         Met à jour les conflits impliquant un avion spécifique après une modification.
         """
-        # Récupérer les balises affectées par cet avion
-        affected_balises = updated_aircraft.get_flight_plan_timed().keys()
-        
-        # Identifier les avions partageant ces balises
-        impacted_aircrafts = []
-        for aircraft in self.aircrafts.values():
-            if any(balise in aircraft.get_flight_plan_timed() for balise in affected_balises):
-                impacted_aircrafts.append(aircraft)
-        
-        # Ajouter l'avion cible en tête de la liste
-        impacted_aircrafts.insert(0, updated_aircraft)
+        # Mettre a jour les entrees de l'avion dans l'index (si ses temps ont change sans notification)
+        self.update_aircraft_passages(updated_aircraft)
 
-        # Supprimer les doublons tout en maintenant l'ordre
-        impacted_aircrafts = list(dict.fromkeys(impacted_aircrafts))
-        
-        # Recalculer les conflits uniquement pour ces avions
-        self.detect_conflicts(impacted_aircrafts)
+        # Recalculer les conflits uniquement pour les voisins de l'avion
+        self.__detect_conflicts_of(updated_aircraft, target_first=True)
+
+    def update_aircraft_passages(self, aircraft: 'Aircraft') -> None:
+        """Réindexe les temps de passage d'un avion enregistré, appelé à chaque changement de ses temps
+        de passage (une copie ou un avion non enregistré n'est pas indexé)"""
+        if self.aircrafts.get(aircraft.get_id_aircraft()) is aircraft:
+            self.__index_aircraft(aircraft)
 
+    def __index_aircraft(self, aircraft: 'Aircraft') -> None:
+        """Remplace les passages indexés d'un avion par ses temps de passage courants."""
+        aircraft_id = aircraft.get_id_aircraft()
+        passages = list(aircraft.get_flight_plan_timed().items())
+        if self.__indexed_passages.get(aircraft_id) == passages:
+            return # Index deja a jour
+        self.__unindex_aircraft(aircraft_id)
+        for balise_name, passage_time in passages:
+            insort(self.__passages.setdefault(balise_name, []), (passage_time, aircraft_id))
+        self.__indexed_passages[aircraft_id] = passages
+
+    def __unindex_aircraft(self, aircraft_id: int) -> None:
+        """Retire de l'index les passages d'un avion."""
+        for balise_name, passage_time in self.__indexed_passages.pop(aircraft_id, []):
+            entries = self.__passages[balise_name]
+            i = bisect_left(entries, (passage_time, aircraft_id))
+            if i < len(entries) and entries[i] == (passage_time, aircraft_id):
+                del entries[i]
+
+    def __neighbours(self, balise_name: str, passage_time: float) -> List[Tuple[float, int]]:
+        """Passages indexés d'une balise dans la fenêtre [t - time_threshold, t + time_threshold]."""
+        entries = self.__passages.get(balise_name, [])
+        lower = bisect_left(entries, (passage_time - self.time_threshold, float('-inf')))
+        upper = bisect_right(entries, (passage_time + self.time_threshold, float('inf')))
+        return entries[lower:upper]
+
+    def __detect_conflicts_of(self, target_aircraft: 'Aircraft', target_first: bool) -> None:
+        """
+        Recalcule les conflits entre un avion et les autres avions enregistrés.
+
+        :param target_aircraft: L'avion dont les conflits sont recalculés.
+        :param target_first: En cas d'égalité des temps de passage, l'avion cible est considéré
+            comme le premier (mise à jour) ou le second (enregistrement), comme dans detect_conflicts.
+        """
+        target_id = target_aircraft.get_id_aircraft()
+        target_passages = target_aircraft.get_flight_plan_timed()
+
+        # Étape 1 : Effacer les seuls conflits de la cible: ceux des balises qu'elle survole
+        # et ceux encore à venir pour l'autre avion
+        def is_cleared(conflict: ConflictInformation) -> bool:
+            if conflict.get_location().get_name() in target_passages:
+                return True
+            if conflict.get_aircraft_one().get_id_aircraft() == target_id:
+                other, other_time = conflict.get_aircraft_two(), conflict.get_conflict_time_two()
+            else:
+                other, other_time = conflict.get_aircraft_one(), conflict.get_conflict_time_one()
+            return other_time >= other.get_time()
+
+        self.__store.remove_if(self.__store.get_keys_by_aircraft(target_id), is_cleared)
 
+        # Étape 2 : Comparer la cible aux seuls passages voisins de chacune de ses balises
+        # (l'index est mis à jour à chaque changement des temps de passage, cf. update_aircraft_passages)
+        for balise_name, target_time in target_passages.items():
+            balise = self.balises.get(balise_name)
+            if not balise: continue
+
+            for other_time, aircraft_id in self.__neighbours(balise_name, target_time):
+                if aircraft_id == target_id: continue
+                aircraft = self.aircrafts[aircraft_id]
+
+                # Ordonner les deux passages comme le tri de detect_conflicts
+                if target_time < other_time or (target_time == other_time and target_first):
+                    aircraft1, time1, aircraft2, time2 = target_aircraft, target_time, aircraft, other_time
+                else:
+                    aircraft1, time1, aircraft2, time2 = aircraft, other_time, target_aircraft, target_time
+
+                conflict_info_one = ConflictInformation(aircraft1, aircraft2, time1, time2, balise)
+                conflict_info_two = ConflictInformation(aircraft2, aircraft1, time2, time1, balise)
+
+                # Ajouter les conflits aux avions
+                aircraft1.set_conflicts(conflict_info_one)
+                aircraft2.set_conflicts(conflict_info_two)
+
+                # Le stockage est partagé avec la balise: un seul ajout suffit
+                self.add_conflicts(conflict_info_one if time1 < time2 else conflict_info_two)
 
     def detect_conflicts(self, aircraft_list: List['Aircraft']) -> None:
         """
@@ -203,14 +533,32 @@ class ConflictManager:
         return None
     
     def add_conflicts(self, conflict: ConflictInformation) -> None:
-        if not conflict in self.conflicts:
-            self.conflicts.append(conflict)
+        self.__store.add(conflict)
     
     def delete_conflicts(self, conflict: ConflictInformation) -> None:
-        try:
-            self.conflicts.remove(conflict)
-        except ValueError:
-            pass
+        self.__store.discard(conflict)
     
     def get_conflicts(self) -> List[ConflictInformation]:
-        return list(sorted(self.conflicts, key=lambda c: c.get_conflict_time_one()))
\ No newline at end of file
+        return list(sorted(self.__store.get_all(), key=lambda c: c.get_conflict_time_one()))
+
+    def get_conflicts_within(self, t0: float, t1: float, balise_name: Optional[str] = None) -> List[ConflictInformation]:
+        """Conflits (d'une balise si <balise_name>) dont l'intervalle [min(t1, t2), max(t1, t2)]
+        recoupe [t0, t1], triés par début"""
+        return [self.__store.get(key) for key in self.__store.get_timeline().within(t0, t1, balise_name)]
+
+    def get_next_conflicts(self, time: float, k: int = 1, balise_name: Optional[str] = None) -> List[ConflictInformation]:
+        """Les <k> prochains conflits qui commencent strictement après <time>"""
+        return [self.__store.get(key) for key in self.__store.get_timeline().after(time, k, balise_name)]
+
+    def count_conflicts_by_balise(self, t0: float, t1: float) -> Dict[str, int]:
+        """Nombre de conflits par balise sur la fenêtre [t0, t1]"""
+        return self.__store.get_timeline().count_by_balise(t0, t1)
+
+    def split_conflicts(self, time: float, balise_name: Optional[str] = None) -> Tuple[List[ConflictInformation], List[ConflictInformation], List[ConflictInformation]]:
+        """Sépare les conflits (d'une balise si <balise_name>) en (passés, en cours, à venir) au temps <time>"""
+        timeline = self.__store.get_timeline()
+        active = timeline.within(time, time, balise_name)
+        upcoming = timeline.after(time, len(timeline), balise_name)
+        excluded = set(active)
+        past = [key for key in timeline.within(float('-inf'), time, balise_name) if key not in excluded]
+        return tuple([self.__store.get(key) for key in keys] for keys in (past, active, upcoming))
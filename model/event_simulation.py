@@ -0,0 +1,196 @@
+from model.simulation import SimulationModel
+from model.runner import SimulationSnapshot
+from model.aircraft.aircraft import Aircraft
+from model.aircraft.fleet import FleetState
+from model.aircraft.storage import DataStorage
+from model.conflict_manager import ConflictInformation
+from logging_config import setup_logging
+
+from dataclasses import dataclass
+from enum import Enum
+from heapq import heappush, heappop
+from itertools import count
+from typing import Dict, List, Callable, Iterator, Optional
+
+
+class EventType(Enum):
+    """Types d'évènements, la valeur donne l'ordre de traitement à temps égal"""
+    TAKE_OFF       = 0
+    COMMAND        = 1
+    BALISE_PASSAGE = 2
+    CONFLICT       = 3
+    ARRIVAL        = 4
+
+
+@dataclass(frozen=True)
+class SimulationEvent:
+    time: float
+    event_type: EventType
+    aircraft_id: int
+    balise_name: Optional[str] = None                  # BALISE_PASSAGE, CONFLICT
+    command: Optional[DataStorage] = None              # COMMAND
+    conflict: Optional[ConflictInformation] = None     # CONFLICT
+
+    def get_time(self) -> float: return self.time
+    def get_event_type(self) -> EventType: return self.event_type
+    def get_aircraft_id(self) -> int: return self.aircraft_id
+    def get_balise_name(self) -> Optional[str]: return self.balise_name
+    def get_command(self) -> Optional[DataStorage]: return self.command
+    def get_conflict(self) -> Optional[ConflictInformation]: return self.conflict
+
+
+class EventSimulation:
+    """Simulation à évènements discrets, à côté de SimulationModel (qui avance par pas de temps fixes).
+
+    Les évènements sont lus dans les avions et le ConflictManager de la simulation:
+        - décollage (heure de décollage),
+        - changement de commande (temps de chaque commande après le décollage),
+        - passage à chaque balise (plan de vol timé), arrivée à la dernière balise,
+        - conflit, émis à son conflict_time_one.
+    Ils sont rangés dans une file de priorité (tas) par (temps, type) et le temps
+    saute directement d'un évènement au suivant. L'état à un instant (positions, caps)
+    n'est calculé qu'à la demande par state_at, sans modifier les avions.
+    Si des avions sont modifiés (nouvelles commandes, cf. Aircraft.get_kinematics_version),
+    les évènements à venir sont reconstruits depuis le temps courant inclus (hors évènements
+    déjà traités), les évènements ajoutés par schedule sont gardés à part et ne sont pas perdus.
+    """
+    logger = setup_logging("EventSimulation")
+
+    def __init__(self, simulation: SimulationModel, start_time: float = 0.):
+        self.__simulation = simulation
+        self.__time       = start_time
+        self.__queue      = [] # Evènements lus dans les avions et les conflits, reconstruits si les avions changent
+        self.__scheduled  = [] # Evènements ajoutés par schedule, conservés lors des reconstructions
+        self.__processed  = set() # Clés des évènements déjà traités au temps courant
+        self.__sequence   = count() # Départage des évènements identiques (ordre d'insertion)
+        self.__callbacks: Dict[EventType, List[Callable[[SimulationEvent], None]]] = {event_type: [] for event_type in EventType}
+        self.__fleet_state: FleetState = None # Etat de la flotte pour state_at
+        self.__version = None
+        self.__build()
+
+    def get_simulation(self) -> SimulationModel: return self.__simulation
+    def get_time(self) -> float: return self.__time
+    def __len__(self) -> int: return len(self.__queue) + len(self.__scheduled)
+
+    def connect(self, event_type: EventType, callback: Callable[[SimulationEvent], None]) -> None:
+        """Ajoute une fonction appelée à chaque évènement du type donné"""
+        self.__callbacks[event_type].append(callback)
+
+    def schedule(self, event: SimulationEvent) -> None:
+        """Ajoute un évènement dans la file (il doit être dans le futur)"""
+        if event.get_time() < self.__time:
+            error = f"{self.__class__.__name__} cannot schedule an event in the past: {event.get_time()} < {self.__time}"
+            raise ValueError(error)
+        heappush(self.__scheduled, self.__entry(event))
+
+    def __entry(self, event: SimulationEvent) -> tuple:
+        return (event.get_time(), event.get_event_type().value, next(self.__sequence), event)
+
+    @staticmethod
+    def __key(event: SimulationEvent) -> tuple:
+        """Identifie un évènement d'une reconstruction à l'autre (les objets commande/conflit sont recréés)"""
+        conflict = event.get_conflict()
+        other_id = conflict.get_aircraft_two().get_id_aircraft() if conflict is not None else None
+        return (event.get_time(), event.get_event_type(), event.get_aircraft_id(), event.get_balise_name(), other_id)
+
+    def __build(self) -> None:
+        """(Re)construit la file des évènements des avions et des conflits à partir du temps courant inclus,
+        sans ceux déjà traités à ce temps (les évènements de schedule ne sont pas touchés)"""
+        self.__queue = []
+        def schedule(event: SimulationEvent) -> None:
+            if self.__key(event) not in self.__processed:
+                heappush(self.__queue, self.__entry(event))
+        def is_future(time: float) -> bool:
+            return time >= self.__time
+
+        for aircraft in self.__simulation.get_aircrafts().values():
+            aircraft_id = aircraft.get_id_aircraft()
+            if is_future(aircraft.get_take_off_time()):
+                schedule(SimulationEvent(aircraft.get_take_off_time(), EventType.TAKE_OFF, aircraft_id))
+            for command in aircraft.get_commands()[1:]: # La 1ere commande est le décollage
+                if command.time is not None and command.time > aircraft.get_take_off_time() and is_future(command.time):
+                    schedule(SimulationEvent(command.time, EventType.COMMAND, aircraft_id, command=command))
+            flight_plan_timed = aircraft.get_flight_plan_timed()
+            for balise_name, passage_time in flight_plan_timed.items():
+                if is_future(passage_time):
+                    schedule(SimulationEvent(passage_time, EventType.BALISE_PASSAGE, aircraft_id, balise_name=balise_name))
+            if flight_plan_timed and is_future(aircraft.get_arrival_time_on_last_point()):
+                schedule(SimulationEvent(aircraft.get_arrival_time_on_last_point(), EventType.ARRIVAL, aircraft_id))
+
+        for conflict in self.__simulation.conflict_manager.get_conflicts():
+            if is_future(conflict.get_conflict_time_one()):
+                schedule(SimulationEvent(conflict.get_conflict_time_one(), EventType.CONFLICT,
+                                         conflict.get_aircraft_one().get_id_aircraft(),
+                                         balise_name=conflict.get_location().get_name(), conflict=conflict))
+        self.__version = Aircraft.get_kinematics_version()
+
+    def __check_version(self) -> None:
+        """Reconstruit les évènements à venir si des avions ont été modifiés depuis la construction de la file"""
+        if Aircraft.get_kinematics_version() != self.__version:
+            self.logger.info(f"Avions modifiés: reconstruction des évènements depuis t={self.__time}")
+            self.__build()
+
+    def __set_time(self, time: float) -> None:
+        if time != self.__time:
+            self.__processed.clear()
+        self.__time = time
+
+    def __next_queue(self) -> Optional[list]:
+        """File (dérivée ou schedule) qui contient le prochain évènement, None si les deux sont vides"""
+        queues = [queue for queue in (self.__queue, self.__scheduled) if queue]
+        return min(queues, key=lambda queue: queue[0][:3]) if queues else None
+
+    def peek_time(self) -> float:
+        """Temps du prochain évènement (inf si la file est vide)"""
+        self.__check_version()
+        queue = self.__next_queue()
+        return queue[0][0] if queue else float('inf')
+
+    def next_event(self) -> Optional[SimulationEvent]:
+        """Avance le temps jusqu'au prochain évènement, le traite et le renvoie (None si la file est vide)"""
+        self.__check_version()
+        queue = self.__next_queue()
+        if queue is None:
+            return None
+        _, _, _, event = heappop(queue)
+        self.__set_time(event.get_time())
+        if queue is self.__queue:
+            self.__processed.add(self.__key(event))
+        for callback in self.__callbacks[event.get_event_type()]:
+            callback(event)
+        return event
+
+    def events(self, until: float = float('inf')) -> Iterator[SimulationEvent]:
+        """Générateur des évènements jusqu'au temps <until> inclus, le temps courant finit à <until>"""
+        while self.peek_time() <= until and len(self):
+            yield self.next_event()
+        if until != float('inf'):
+            self.__set_time(max(self.__time, until))
+
+    def run_until(self, until: float = float('inf')) -> int:
+        """Traite tous les évènements jusqu'au temps <until> inclus, renvoie le nombre d'évènements traités"""
+        return sum(1 for _ in self.events(until))
+
+    def is_finished(self) -> bool:
+        """True s'il ne reste aucun évènement"""
+        return self.peek_time() == float('inf')
+
+    def state_at(self, time: float = None) -> SimulationSnapshot:
+        """Etat de la simulation au temps <time> (par défaut le temps courant), calculé à la demande
+        en une interpolation vectorisée (cf. FleetState), sans modifier les avions"""
+        time = self.__time if time is None else time
+        aircrafts = list(self.__simulation.get_aircrafts().values())
+        if self.__fleet_state is None or not self.__fleet_state.matches(aircrafts):
+            self.__fleet_state = FleetState(aircrafts)
+        else:
+            self.__fleet_state.sync()
+        self.__fleet_state.set_time(time)
+        self.__fleet_state.step(0.)
+
+        finished = self.__fleet_state.get_finished()
+        return SimulationSnapshot(time=time,
+                                  aircraft_ids=tuple(aircraft.get_id_aircraft() for aircraft in aircrafts),
+                                  positions=self.__fleet_state.get_positions().copy(),
+                                  headings=self.__fleet_state.get_headings().copy(),
+                                  finished=tuple(aircraft.get_id_aircraft() for aircraft, done in zip(aircrafts, finished) if done),
+                                  conflicts=self.__simulation.conflict_manager.get_conflicts())
@@ -1,6 +1,10 @@
 from dataclasses import dataclass
 from math import sqrt
 from enum import Enum
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
 
 class PointValue(Enum):
     MinX = 0
@@ -90,4 +94,23 @@ class Point:
         """
         Représentation lisible du point.
         """
-        return f"Point(x={self.x:.5f}, y={self.y:.5f}, z={self.z:.5f})"
\ No newline at end of file
+        return f"Point(x={self.x:.5f}, y={self.y:.5f}, z={self.z:.5f})"
+
+class PointView(Point):
+    """Point dont les coordonnées sont lues dans une ligne d'un tableau (N, 3) partagé,
+    par exemple les positions de FleetState: aucune allocation a chaque pas de simulation.
+    Une copie (deepcopy, pickle) donne un Point figé à la position courante.
+    """
+    def __init__(self, positions: 'np.ndarray', row: int):
+        self.__positions = positions
+        self.__row       = row
+
+    @property
+    def x(self) -> float: return float(self.__positions[self.__row, 0])
+    @property
+    def y(self) -> float: return float(self.__positions[self.__row, 1])
+    @property
+    def z(self) -> float: return float(self.__positions[self.__row, 2])
+
+    def __reduce__(self):
+        return (Point, self.getXYZ())
@@ -1,8 +1,51 @@
 from model.balise import Balise
-from typing import List, Dict
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class RouteGeometry:
+    """Géométrie précalculée d'une route (liste ordonnée de balises).
+
+    Tableaux de L balises et de L-1 tronçons (balise i -> balise i+1):
+        - xy: coordonnées des balises (L, 2)
+        - segment_lengths: longueurs horizontales des tronçons (L-1,)
+        - cumulative: distance depuis la première balise (L,)
+        - directions: vecteurs unitaires des tronçons (L-1, 2)
+        - headings: caps des tronçons en radians dans [0, 2pi[ (L-1,)
+    """
+    names: Tuple[str, ...]
+    xy: np.ndarray
+    segment_lengths: np.ndarray
+    cumulative: np.ndarray
+    directions: np.ndarray
+    headings: np.ndarray
+    index: Dict[str, int] = field(compare=False) # Nom de balise -> indice dans la route
+
+    @classmethod
+    def compile(cls, balises: List['Balise']) -> 'RouteGeometry':
+        xy = np.array([balise.getXY() for balise in balises], dtype=float).reshape(-1, 2)
+        delta = np.diff(xy, axis=0)
+        segment_lengths = np.sqrt(delta[:, 0]*delta[:, 0] + delta[:, 1]*delta[:, 1]) # cf. Point.distance_horizontale
+        with np.errstate(invalid='ignore', divide='ignore'):
+            directions = np.where(segment_lengths[:, None] > 0, delta / segment_lengths[:, None], 0.)
+        headings = np.arctan2(delta[:, 1], delta[:, 0]) % (2*np.pi) # cf. Aircraft.calculate_heading
+        cumulative = np.concatenate([[0.], np.cumsum(segment_lengths)])
+
+        names = tuple(balise.get_name() for balise in balises)
+        for array in (xy, segment_lengths, cumulative, directions, headings):
+            array.setflags(write=False) # Géométrie partagée par tous les avions de la route
+        return cls(names=names, xy=xy, segment_lengths=segment_lengths, cumulative=cumulative,
+                   directions=directions, headings=headings, index={name: i for i, name in enumerate(names)})
+
+    def __len__(self) -> int:
+        return len(self.names)
 
 class Airway:
     __registry = {}
+    __geometries: Dict[Tuple[str, ...], RouteGeometry] = {} # Cache de géométrie par suite de noms de balises
 
     def __init__(self, name: str, points: List[str]):
         self.__name   = name
@@ -48,4 +91,23 @@ class Airway:
         converted = [Balise.get_balise_by_name(name) for name in routes]
         if reverse:
             converted = list(reversed(converted))
-        return converted
\ No newline at end of file
+        return converted
+
+    @classmethod
+    def compile_geometry(cls) -> None:
+        """Précalcule la géométrie de toutes les airways enregistrées (et de leurs sens inverses).
+        A appeler une fois l'enregistrement des airways terminé (cf. model/configuration.py)."""
+        for airway in cls.__registry.values():
+            for reverse in (False, True):
+                cls.get_geometry(cls.transform(routes=airway.get_points(), reverse=reverse))
+
+    @classmethod
+    def get_geometry(cls, balises: List['Balise']) -> RouteGeometry:
+        """Renvoie la géométrie d'une route, compilée au premier appel pour les routes hors registre
+        (ex: plans de vol lus dans un fichier), l'espace aérien étant statique."""
+        key = tuple(balise.get_name() for balise in balises)
+        geometry = cls.__geometries.get(key)
+        if geometry is None:
+            geometry = RouteGeometry.compile(balises)
+            cls.__geometries[key] = geometry
+        return geometry
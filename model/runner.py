@@ -0,0 +1,92 @@
+from model.simulation import SimulationModel
+from model.conflict_manager import ConflictInformation
+from logging_config import setup_logging
+
+from dataclasses import dataclass
+from math import ceil
+from typing import List, Tuple, Callable, Iterator, Optional
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SimulationSnapshot:
+    """Etat de la simulation à un instant du temps virtuel (tableaux copiés, indépendants de la suite)"""
+    time: float                                # Temps virtuel de la simulation (s)
+    aircraft_ids: Tuple[int, ...]              # Identifiant de l'avion de chaque ligne
+    positions: np.ndarray                      # (N, 3) positions normalisées
+    headings: np.ndarray                       # (N,) caps en radians
+    finished: Tuple[int, ...]                  # Identifiants des avions arrivés à leur dernière balise
+    conflicts: List[ConflictInformation]       # Conflits connus du ConflictManager
+
+    def get_time(self) -> float: return self.time
+    def get_aircraft_ids(self) -> Tuple[int, ...]: return self.aircraft_ids
+    def get_positions(self) -> np.ndarray: return self.positions
+    def get_headings(self) -> np.ndarray: return self.headings
+    def get_finished(self) -> Tuple[int, ...]: return self.finished
+    def get_conflicts(self) -> List[ConflictInformation]: return self.conflicts
+
+
+class HeadlessRunner:
+    """Avance une simulation aussi vite que le permet le CPU, sans timer ni affichage.
+
+    Le temps est virtuel: la simulation avance par pas fixes de <timestep> secondes
+    (cf. SimulationModel.advance), de 0 jusqu'à <end_time> (par défaut la durée donnée
+    par le générateur de trafic) ou jusqu'à l'arrivée de tous les avions.
+    Un SimulationSnapshot est produit toutes les <snapshot_interval> secondes virtuelles:
+    par le générateur snapshots() ou par les callbacks passés à run().
+    """
+    logger = setup_logging("HeadlessRunner")
+
+    def __init__(self, simulation: SimulationModel, timestep: float = SimulationModel.INTERVAL/1000,
+                 snapshot_interval: float = 60., end_time: Optional[float] = None):
+        if timestep <= 0 or snapshot_interval <= 0:
+            error = f"{self.__class__.__name__} needs strictly positive timestep and snapshot_interval, got {timestep} and {snapshot_interval}"
+            raise ValueError(error)
+        self.__simulation = simulation
+        self.__timestep   = timestep
+        self.__steps_per_snapshot = max(1, round(snapshot_interval / timestep))
+        self.__end_time   = end_time
+
+    def get_simulation(self) -> SimulationModel: return self.__simulation
+    def get_timestep(self) -> float: return self.__timestep
+    def get_time(self) -> float: return self.__simulation.time_elapsed
+
+    def get_end_time(self) -> float:
+        """Fin du temps virtuel: celle donnée, sinon la durée du générateur de trafic, sinon l'infini (arrivée de tous les avions)"""
+        if self.__end_time is not None:
+            return self.__end_time
+        try:
+            return self.__simulation.get_simulation_time()
+        except AttributeError: # Pas de générateur de trafic
+            return float('inf')
+
+    def snapshot(self) -> SimulationSnapshot:
+        """Capture l'état courant de la simulation"""
+        aircrafts = list(self.__simulation.get_aircrafts().values())
+        return SimulationSnapshot(time=self.get_time(),
+                                  aircraft_ids=tuple(aircraft.get_id_aircraft() for aircraft in aircrafts),
+                                  positions=np.array([aircraft.get_position().getXYZ() for aircraft in aircrafts], dtype=float).reshape(-1, 3),
+                                  headings=np.array([aircraft.get_heading() for aircraft in aircrafts], dtype=float),
+                                  finished=tuple(aircraft.get_id_aircraft() for aircraft in aircrafts if aircraft.has_reached_final_point()),
+                                  conflicts=self.__simulation.conflict_manager.get_conflicts())
+
+    def snapshots(self) -> Iterator[SimulationSnapshot]:
+        """Générateur des états de la simulation: l'état initial puis un état par intervalle de temps virtuel"""
+        end_time = self.get_end_time()
+        yield self.snapshot()
+        while not self.__simulation.is_finished() and self.get_time() < end_time:
+            # Dernier intervalle tronqué pour ne pas dépasser la fin
+            remaining = ceil(round((end_time - self.get_time()) / self.__timestep, 6)) if end_time != float('inf') else self.__steps_per_snapshot
+            self.__simulation.advance(timestep=self.__timestep, steps=min(self.__steps_per_snapshot, remaining))
+            yield self.snapshot()
+
+    def run(self, callbacks: List[Callable[[SimulationSnapshot], None]] = ()) -> SimulationSnapshot:
+        """Déroule toute la simulation en appelant chaque callback sur chaque état, renvoie le dernier état"""
+        last = None
+        for snapshot in self.snapshots():
+            for callback in callbacks:
+                callback(snapshot)
+            last = snapshot
+        self.logger.info(f"Simulation terminée à t={last.get_time():.1f}s: {len(last.get_finished())} avions arrivés, {len(last.get_conflicts())} conflits")
+        return last
@@ -1,6 +1,7 @@
 from model.traffic.abstract.ATrafficGenerator import ATrafficGenerator
 from model.configuration import MAIN_SECTOR, SECONDARY_SECTOR
 from model.aircraft.aircraft import Aircraft
+from model.aircraft.fleet import FleetState
 from model.route import Airway
 from model.balise import Balise
 from model.sector import SectorType
@@ -35,6 +36,7 @@ class SimulationModel:
         self.routes: Dict[str, List['Balise']] = {}
         self.aircrafts: Dict[int, Aircraft]  = traffic_generator.generate_traffic() if traffic_generator else {}
         self.__aircraft_to_algo: Dict[int, Aircraft]  = {}
+        self.__fleet_state: FleetState = None # Etat vectorisé de la flotte pour l'avancement (cf. get_fleet_state)
         self.__traffic_generator = traffic_generator
 
         # Gestion de la simulation
@@ -69,6 +71,7 @@ class SimulationModel:
 
             # Generation du traffic
             self.aircrafts = traffic_generator.generate_traffic()
+            self.__fleet_state = None
             self.initialise_aircrafts()
             self.initialise_conflicts()
 
@@ -106,24 +109,16 @@ class SimulationModel:
             self.add_route(airway_name, route.get_transform_points())
 
     def initialise_aircrafts(self) -> None:
-        """Aircraft initialisation"""
+        """Aircraft initialisation (l'enregistrement dans le manager est fait en bloc par initialise_conflicts)"""
         for aircraft in self.aircrafts.values():
-            self.add_aircraft(aircraft, register_to_manager=True)
+            self.add_aircraft(aircraft)
+            self.__aircraft_to_algo[aircraft.get_id_aircraft()] = aircraft
     
     def initialise_conflicts(self) -> None:
-        """Conflict initialisation"""
-        for aircraft in self.aircrafts.values():
-            # Enregistrer les avions dans le manager
-            self.conflict_manager.register_aircraft(aircraft)
-        
-        for balise in self.balises.values():
-            # Enregistrer les balises dans le manager
-            self.conflict_manager.register_balise(balise)
-
-        for aircraft in self.aircrafts.values():
-            # Declencher la creation des conflicts
-            #aircraft.set_speed(aircraft.get_speed())
-            aircraft.set_commands(aircraft.get_commands())
+        """Conflict initialisation: enregistrement en bloc des avions et des balises
+           puis une seule passe de détection des conflits"""
+        self.conflict_manager.register_fleet(aircrafts=list(self.aircrafts.values()),
+                                             balises=list(self.balises.values()))
 
     def get_algorithm(self) -> 'AAlgorithm': return self._algorithm_manager.get_algorithm()
 
@@ -142,6 +137,7 @@ class SimulationModel:
 
     def add_aircraft(self, aircraft: Aircraft, register_to_manager: bool = False) -> None:
         self.aircrafts[aircraft.get_id_aircraft()] = aircraft
+        self.__fleet_state = None # Etat de la flotte à reconstruire
         if register_to_manager:
             self.conflict_manager.register_aircraft(aircraft)
             self.__aircraft_to_algo[aircraft.get_id_aircraft()] = aircraft
@@ -150,6 +146,7 @@ class SimulationModel:
         aircraft_key = aircraft.get_id_aircraft()
         if self.aircrafts.get(aircraft_key):
             del self.aircrafts[aircraft_key]
+            self.__fleet_state = None # Etat de la flotte à reconstruire
             deletion_okay = self.conflict_manager.delete_aircraft(aircraft)
             Aircraft.remove_aircraft_from_registry(aircraft)
             return deletion_okay
@@ -224,28 +221,42 @@ class SimulationModel:
     def run(self) -> None:
         """Met à jour la simulation."""
         dt = self.get_interval_timer() # converti en secondes
-        
-        for _ in range(self._speed_factor):
-            if not self.is_finished():
+        self.advance(timestep=dt, steps=self._speed_factor)
+
+    def advance(self, timestep: float, steps: int = 1) -> None:
+        """Avance la simulation de <steps> pas de <timestep> secondes (sans timer), arrêt anticipé si tous les avions sont arrivés"""
+        dt = timestep
+        # Avancement de toute la flotte par pas vectorisés, réécrite une seule fois par appel
+        fleet_state = self.get_fleet_state()
+        for _ in range(steps):
+            if not fleet_state.is_finished():
                 self.time_elapsed += dt
-                for aircraft in self.aircrafts.values():
-                    #self.logger.info(f"Avancement pour {aircraft.get_id_aircraft()} de {dt} seconds (elapsed: {self.time_elapsed})")
-                    aircraft.update(timestep=dt)
+                fleet_state.step(dt)
 
                 # Mise a jour du temps de simulation dans le manager de conflict (necessaire pour filtrer)
                 self.conflict_manager.set_time_simulation(self.time_elapsed)
+        fleet_state.store()
 
     def run_fast_simulation(self, elasped: float) -> None:
         """Met a jour la simulation en fonction du temps précis et non d'une courte durée d'avancement"""
         self.time_elapsed = elasped
         self.conflict_manager.set_time_simulation(self.time_elapsed)
         dt = self.get_interval_timer()
-        elasped_minus = elasped - dt # retirer le temps du timer car aircraft.update(dt) va incrémenter 
-        for aircraft in self.aircrafts.values():
-            # Préciser à l'avion à quelle heure il est
-            aircraft.set_time(elasped_minus)
-            # Incrément de sa position, cap et temps de vol
-            aircraft.update(dt)
+        elasped_minus = elasped - dt # retirer le temps du timer car step(dt) va incrémenter 
+        fleet_state = self.get_fleet_state()
+        # Préciser aux avions à quelle heure ils sont puis incrément de leur position, cap et temps de vol
+        fleet_state.set_time(elasped_minus)
+        fleet_state.step(dt)
+        fleet_state.store()
+
+    def get_fleet_state(self) -> FleetState:
+        """Etat vectorisé des avions de la simulation, reconstruit si la liste des avions a changé
+        (cf. add_aircraft, delete_aircraft) et relu si des avions ont été modifiés un par un"""
+        if self.__fleet_state is None or len(self.__fleet_state.get_aircrafts()) != len(self.aircrafts):
+            self.__fleet_state = FleetState(list(self.aircrafts.values()))
+        else:
+            self.__fleet_state.sync()
+        return self.__fleet_state
 
 
     def toggle_running(self) -> None:
@@ -297,8 +308,8 @@ class SimulationModel:
         return interval/1000 # converti en secondes
 
     def is_finished(self) -> bool:
-        """Renvoie True si tous les avions ont atteints leur destination finale"""
-        return all(a.has_reached_final_point() for a in self.get_aircrafts().values())
+        """Renvoie True si tous les avions ont atteints leur destination finale (compteur de FleetState, en O(1))"""
+        return self.get_fleet_state().is_finished()
     
     def calcul_number_of_conflicts(self):
         """Calcul le nombre total de conflits entre les avions de la simulation"""
@@ -2,6 +2,7 @@ import numpy as np
 from datetime import time
 from model.route import Airway
 from model.aircraft.aircraft import Aircraft
+from model.aircraft.fleet import FleetTiming
 from model.aircraft.speed import SpeedValue
 from typing import Dict, Tuple
 
@@ -82,9 +83,12 @@ class FishLawRoutesTrafficGeneratorDynamic(ATrafficGeneratorDynamic):
 
         for i, (speed, flight_plan, take_off_time) in enumerate(aircraft_data):
             adjusted_time = take_off_time - min_take_off_time  # Décalage au début de simulation
-            aircraft = Aircraft(speed=speed, flight_plan=flight_plan, take_off_time=adjusted_time)
+            aircraft = Aircraft(speed=speed, flight_plan=flight_plan, take_off_time=adjusted_time, estimate_times=False)
             aircrafts[aircraft.get_id_aircraft()] = aircraft
 
+        # Calcul des temps de passage de toute la flotte en une passe
+        FleetTiming.estimate_aircrafts(list(aircrafts.values()))
+
         # Met à jour la durée de simulation
         last_arrival = max(a.get_arrival_time_on_last_point() for a in aircrafts.values())
         self.set_simulation_duration(last_arrival)
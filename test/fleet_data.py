@@ -0,0 +1,29 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from model.configuration import BALISES
+from model.aircraft.aircraft import Aircraft
+from model.conflict_manager import ConflictManager
+from model.route import Airway
+from algorithm.data import SimulatedAircraftImplemented
+
+from typing import List, Tuple
+
+import gc
+import random
+
+
+def make_data(seed: int = 0, number_of_aircrafts: int = 12) -> Tuple[List[SimulatedAircraftImplemented], ConflictManager]:
+    """Flotte reproductible: mêmes ids (registre vidé), mêmes routes et décollages pour une même graine"""
+    gc.collect() # Les ConflictManager des appels précédents ne doivent plus observer les avions
+    Aircraft.reinititalise_registry()
+    random.seed(seed)
+    airways = list(Airway.get_available_airways().values())
+    aircrafts = [Aircraft(flight_plan=random.choice(airways).get_transform_points(),
+                          speed=random.choice([0.0005, 0.0007, 0.001]), take_off_time=random.uniform(0, 600))
+                 for _ in range(number_of_aircrafts)]
+    manager = ConflictManager(time_threshold=60)
+    manager.register_fleet(aircrafts=aircrafts, balises=BALISES)
+    Aircraft.register_observer(manager)
+    return [SimulatedAircraftImplemented(aircraft) for aircraft in aircrafts], manager
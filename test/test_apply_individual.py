@@ -0,0 +1,33 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from model.conflict_manager import ConflictStore
+from algorithm.concrete.genetic.genetique import AlgorithmGeneticBase
+from algorithm.objective_function.function import ObjectiveFunctionMaxConflict
+from algorithm.evaluation import Scenario
+from fleet_data import make_data
+
+
+def test_apply_individual_skips_unchanged_aircraft():
+    """Seuls les avions dont les commandes changent sont recalculés, les conflits restent ceux de l'individu"""
+    data, manager = make_data(seed=4)
+    genetic = AlgorithmGeneticBase(data=data, population_size=2)
+    scenario = Scenario.from_data(data)
+    individual, other = genetic.generate_initial_population(data)
+    genetic.apply_individual(individual)
+
+    offspring = [list(trajectory) for trajectory in individual]
+    offspring[0] = other[0]
+    flight_plans = [aircraft_sim.get_object().get_flight_plan_timed() for aircraft_sim in data]
+    genetic.apply_individual(offspring)
+    assert data[0].get_object().get_flight_plan_timed() is not flight_plans[0]
+    assert all(aircraft_sim.get_object().get_flight_plan_timed() is flight_plan for aircraft_sim, flight_plan in zip(data[1:], flight_plans[1:]))
+    assert all(aircraft_sim.get_data_storages() is trajectory for aircraft_sim, trajectory in zip(data, offspring))
+    assert scenario.evaluate(offspring, ObjectiveFunctionMaxConflict()).get_conflict_keys() == \
+           {ConflictStore.key_of(c) for c in manager.get_conflicts()}
+    del manager
+
+
+if __name__ == "__main__":
+    test_apply_individual_skips_unchanged_aircraft()
@@ -0,0 +1,34 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from algorithm.concrete.genetic.genetique import AlgorithmGeneticBase
+from algorithm.objective_function.function import ObjectiveFunctionConflictInternal
+from algorithm.cache import FitnessCache
+from model.aircraft.storage import DataStorage
+from fleet_data import make_data
+
+
+def test_fitness_cache_matches_uncached():
+    """Le cache des fitnesses ne change pas la solution du génétique et sert les individus déjà évalués"""
+    cache = FitnessCache(maxsize=2)
+    individuals = [[[DataStorage(id=0, speed=0.001, time=t)]] for t in (0., 10., 20.)]
+    keys = [cache.key("context", individual) for individual in individuals]
+    assert keys[0] == cache.key("context", [[DataStorage(id=0, speed=0.001, time=0.001)]]) != cache.key("other", individuals[0])
+    for key, fitness in zip(keys, (1., 2., 3.)):
+        cache.put(key, fitness)
+    assert cache.get(keys[0]) is None and cache.get(keys[2]) == 3. and cache.get_evictions() == 1
+
+    results = []
+    for cache_size in (0, 256):
+        data, manager = make_data(seed=2)
+        genetic = AlgorithmGeneticBase(data=data, population_size=10, generations=4, cache_size=cache_size)
+        genetic.set_objective_function(ObjectiveFunctionConflictInternal(nb_expected_conflict=3))
+        results.append((genetic.start(), genetic.get_best_fitness()))
+        del data, manager
+    assert results[0] == results[1]
+    assert genetic.get_cache_stats()["hits"] > 0
+
+
+if __name__ == "__main__":
+    test_fitness_cache_matches_uncached()
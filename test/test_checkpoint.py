@@ -0,0 +1,127 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from algorithm.concrete.genetic.genetique import AlgorithmGeneticBase
+from algorithm.concrete.recuit.etat import Etat
+from algorithm.concrete.recuit.recuit import AlgorithmRecuit
+from algorithm.objective_function.function import ObjectiveFunctionConflictInternal
+from algorithm.checkpoint import CheckpointWriter
+from fleet_data import make_data
+
+import tempfile
+
+
+def test_checkpoint_and_resume():
+    """Un algorithme repris continue à partir de son dernier point de reprise (génération ou palier de température)"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "genetic.ckpt")
+        data, manager = make_data(seed=10)
+        objective = ObjectiveFunctionConflictInternal(nb_expected_conflict=3)
+        genetic = AlgorithmGeneticBase(data=data, population_size=6, generations=3)
+        genetic.set_objective_function(objective)
+        genetic.set_checkpoint(path, interval=0.)
+        genetic.start()
+        snapshot = CheckpointWriter.load(path)
+        assert snapshot["step"] == 3 and snapshot["best_critere"] == genetic.get_best_critere()
+        assert len(snapshot["state"]["population"]) == 6
+
+        resumed = AlgorithmGeneticBase(data=data, population_size=6, generations=5)
+        resumed.resume(path)
+        assert resumed.get_objective_function().__class__ is objective.__class__
+        resumed.set_checkpoint(path)
+        best_individual = resumed.start()
+        assert CheckpointWriter.load(path)["step"] == 5
+        assert resumed.get_best_critere() <= snapshot["best_critere"]
+        assert resumed.evaluate_commands(best_individual).get_value() == resumed.get_best_critere()
+
+        recuit = AlgorithmRecuit(data, is_minimise=True, number_transitions=5, cooling_rate=0.5)
+        try:
+            recuit.resume(path)
+            assert False, "checkpoint of another algorithm"
+        except ValueError:
+            pass
+        recuit.set_objective_function(objective)
+        recuit.set_checkpoint(path)
+        recuit.start()
+        snapshot = CheckpointWriter.load(path)
+        assert snapshot["state"]["best_critere"] == recuit.get_best_critere()
+        resumed = AlgorithmRecuit(data, is_minimise=True, number_transitions=5, cooling_rate=0.5)
+        resumed.resume(path)
+        best_commands = resumed.start() # Tous les paliers sont faits: meilleur etat du point de reprise
+        assert best_commands == snapshot["state"]["best_vector"]
+        del manager
+
+
+class InterruptedRecuit(AlgorithmRecuit):
+    """Recuit arrete au palier de temperature <stop_at>, juste apres son point de reprise"""
+    def __init__(self, data, stop_at: int = None, **kwargs):
+        super().__init__(data, **kwargs)
+        self.stop_at = stop_at
+
+    def checkpoint(self, step, state, force=False):
+        written = super().checkpoint(step, state, force)
+        if step == self.stop_at:
+            self.stop()
+        return written
+
+
+def test_resumed_run_matches_uninterrupted():
+    """Un recuit ou un algorithme genetique interrompu puis repris fait les memes tirages que sans interruption:
+    les generateurs de l'algorithme, des voisins (Etat.generator) et des avions sont restaures, meme s'ils ont servi entre-temps"""
+    objective = ObjectiveFunctionConflictInternal(nb_expected_conflict=3)
+    parameters = dict(is_minimise=True, number_transitions=5, cooling_rate=0.7, heat_up_samples=20)
+    etat_state = Etat.generator.bit_generator.state
+
+    data, manager = make_data(seed=12)
+    recuit = InterruptedRecuit(data, **parameters)
+    recuit.set_objective_function(objective)
+    expected = recuit.start()
+    expected_critere = recuit.get_best_critere()
+    del manager
+
+    Etat.generator.bit_generator.state = etat_state
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "recuit.ckpt")
+        data, manager = make_data(seed=12)
+        interrupted = InterruptedRecuit(data, stop_at=3, **parameters)
+        interrupted.set_objective_function(objective)
+        interrupted.set_checkpoint(path, interval=0.)
+        interrupted.start()
+        assert CheckpointWriter.load(path)["step"] == 3 and interrupted.get_progress() < 100
+
+        Etat.generator.random(10) # Tirages d'autres algorithmes avant la reprise
+        for aircraft_sim in data:
+            aircraft_sim.initialize()
+        resumed = InterruptedRecuit(data, **parameters)
+        resumed.resume(path)
+        assert resumed.start() == expected and resumed.get_best_critere() == expected_critere
+        del manager
+
+    # Algorithme genetique: 3 generations puis reprise jusqu'a 5
+    data, manager = make_data(seed=3)
+    genetic = AlgorithmGeneticBase(data=data, population_size=6, generations=5)
+    genetic.set_objective_function(objective)
+    expected = genetic.start()
+    expected_critere = genetic.get_best_critere()
+    del manager
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "genetic.ckpt")
+        data, manager = make_data(seed=3)
+        interrupted = AlgorithmGeneticBase(data=data, population_size=6, generations=3)
+        interrupted.set_objective_function(objective)
+        interrupted.set_checkpoint(path, interval=0.)
+        interrupted.start()
+
+        for aircraft_sim in data:
+            aircraft_sim.initialize()
+        resumed = AlgorithmGeneticBase(data=data, population_size=6, generations=5)
+        resumed.resume(path)
+        assert resumed.start() == expected and resumed.get_best_critere() == expected_critere
+        del manager
+
+
+if __name__ == "__main__":
+    test_checkpoint_and_resume()
+    test_resumed_run_matches_uninterrupted()
@@ -0,0 +1,183 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from model.configuration import BALISES
+from model.aircraft.aircraft import Aircraft
+from model.aircraft.storage import DataStorage
+from model.conflict_manager import ConflictManager, ConflictInformation, ConflictStore
+from model.route import Airway
+
+import random
+
+
+def brute_force_conflicts(aircrafts, time_threshold):
+    """Toutes les paires (id, id, balise) en conflit, par comparaison exhaustive"""
+    pairs = set()
+    for i, one in enumerate(aircrafts):
+        for two in aircrafts[i + 1:]:
+            for balise_name, time_one in one.get_flight_plan_timed().items():
+                time_two = two.get_flight_plan_timed().get(balise_name)
+                if time_two is not None and abs(time_two - time_one) <= time_threshold:
+                    ids = sorted([one.get_id_aircraft(), two.get_id_aircraft()])
+                    pairs.add((ids[0], ids[1], balise_name))
+    return pairs
+
+
+def manager_conflicts(aircrafts):
+    """Les paires (id, id, balise) en conflit enregistrées sur les avions"""
+    pairs = set()
+    for aircraft in aircrafts:
+        for conflicts in aircraft.get_conflicts().get_all().values():
+            for conflict in conflicts or []:
+                ids = sorted([conflict.get_aircraft_one().get_id_aircraft(), conflict.get_aircraft_two().get_id_aircraft()])
+                pairs.add((ids[0], ids[1], conflict.get_location().get_name()))
+    return pairs
+
+
+def test_index_matches_brute_force():
+    """L'index trié par balise trouve les mêmes conflits que la comparaison de toutes les paires"""
+    random.seed(0)
+    manager = ConflictManager(time_threshold=60)
+    for balise in BALISES:
+        manager.register_balise(balise)
+
+    airways = list(Airway.get_available_airways().values())
+    aircrafts = []
+    for k in range(30):
+        aircraft = Aircraft(flight_plan=random.choice(airways).get_transform_points(),
+                            speed=random.choice([0.0005, 0.0007, 0.001]), take_off_time=random.uniform(0, 1000))
+        manager.register_aircraft(aircraft)
+        aircrafts.append(aircraft)
+    assert manager_conflicts(aircrafts) == brute_force_conflicts(aircrafts, 60)
+
+    # Modifications successives: seules les entrées de l'avion modifié sont réindexées
+    for _ in range(50):
+        aircraft = random.choice(aircrafts)
+        take_off_time = aircraft.get_take_off_time()
+        aircraft.load_commands([DataStorage(id=aircraft.get_id_aircraft(), time=take_off_time, speed=aircraft.get_speed()),
+                                DataStorage(id=aircraft.get_id_aircraft(), time=take_off_time + random.uniform(0, 1500),
+                                            speed=random.choice([0.0005, 0.0007, 0.001]))])
+        aircraft.calculate_estimated_times_commands()
+        aircraft.clear_conflicts()
+        manager.update_aircraft_conflicts(aircraft)
+    assert manager_conflicts(aircrafts) == brute_force_conflicts(aircrafts, 60)
+
+    # Un avion supprimé n'est plus comparé aux autres
+    removed = aircrafts.pop()
+    assert manager.delete_aircraft(removed)
+    assert all(aircraft_id != removed.get_id_aircraft()
+               for balise in BALISES for _, aircraft_id in manager.get_passages(balise.get_name()))
+
+
+def test_register_fleet_matches_brute_force():
+    """L'enregistrement en bloc trouve les mêmes conflits que l'enregistrement avion par avion"""
+    random.seed(1)
+    airways = list(Airway.get_available_airways().values())
+    aircrafts = [Aircraft(flight_plan=random.choice(airways).get_transform_points(),
+                          speed=random.choice([0.0005, 0.0007, 0.001]), take_off_time=random.uniform(0, 1000))
+                 for _ in range(30)]
+
+    manager = ConflictManager(time_threshold=60)
+    manager.register_fleet(aircrafts=aircrafts, balises=BALISES)
+    assert manager_conflicts(aircrafts) == brute_force_conflicts(aircrafts, 60)
+    assert {(min(c.get_aircraft_one().get_id_aircraft(), c.get_aircraft_two().get_id_aircraft()),
+             max(c.get_aircraft_one().get_id_aircraft(), c.get_aircraft_two().get_id_aircraft()),
+             c.get_location().get_name()) for c in manager.get_conflicts()} == brute_force_conflicts(aircrafts, 60)
+
+
+def test_conflict_store_indexes():
+    """Une seule entrée par (paire d'avions, balise), lisible par avion et par balise"""
+    route = list(Airway.get_available_airways().values())[0].get_transform_points()
+    one = Aircraft(flight_plan=route, speed=0.0005)
+    two = Aircraft(flight_plan=route, speed=0.0006)
+    balise = route[0]
+
+    store = ConflictStore()
+    conflict = ConflictInformation(one, two, 10., 20., balise)
+    store.add(conflict)
+    store.add(ConflictStore.reverse(conflict)) # Même clé: remplacement, pas de doublon
+    assert len(store) == 1
+    assert store.get_by_balise(balise.get_name()) == [ConflictStore.reverse(conflict)]
+    assert store.get_by_aircraft(one.get_id_aircraft()) == [conflict]
+    assert store.get_by_aircraft(two.get_id_aircraft()) == [ConflictStore.reverse(conflict)]
+
+    assert store.remove(ConflictStore.make_key(two.get_id_aircraft(), one.get_id_aircraft(), balise.get_name()))
+    assert len(store) == 0 and not store.has_aircraft(one.get_id_aircraft())
+    assert store.get_by_balise(balise.get_name()) == []
+
+
+def test_conflict_timeline_matches_filtering():
+    """Les requêtes sur l'index des intervalles de temps donnent le même résultat que le filtrage des listes"""
+    random.seed(2)
+    airways = list(Airway.get_available_airways().values())
+    aircrafts = [Aircraft(flight_plan=random.choice(airways).get_transform_points(),
+                          speed=random.choice([0.0005, 0.0007, 0.001]), take_off_time=random.uniform(0, 1000))
+                 for _ in range(30)]
+    manager = ConflictManager(time_threshold=60)
+    manager.register_fleet(aircrafts=aircrafts, balises=BALISES)
+
+    # Modifications: les intervalles des conflits remplacés ou supprimés sont réindexés
+    for aircraft in random.sample(aircrafts, 10):
+        aircraft.load_commands([DataStorage(id=aircraft.get_id_aircraft(), time=aircraft.get_take_off_time(), speed=aircraft.get_speed()),
+                                DataStorage(id=aircraft.get_id_aircraft(), time=aircraft.get_take_off_time() + 300., speed=0.0006)])
+        aircraft.calculate_estimated_times_commands()
+        aircraft.clear_conflicts()
+        manager.update_aircraft_conflicts(aircraft)
+
+    conflicts = manager.get_conflicts()
+    assert len(manager.get_conflict_store().get_timeline()) == len(conflicts) > 0
+    def start(c): return min(c.get_conflict_time_one(), c.get_conflict_time_two())
+    def end(c): return max(c.get_conflict_time_one(), c.get_conflict_time_two())
+    def keys(cs): return [ConflictStore.key_of(c) for c in cs]
+
+    for _ in range(50):
+        t0 = random.uniform(0, 4000)
+        t1 = t0 + random.uniform(0, 600)
+        expected = [c for c in conflicts if start(c) <= t1 and end(c) >= t0]
+        assert sorted(keys(manager.get_conflicts_within(t0, t1))) == sorted(keys(expected))
+
+        counts = {}
+        for c in expected:
+            counts[c.get_location().get_name()] = counts.get(c.get_location().get_name(), 0) + 1
+        assert manager.count_conflicts_by_balise(t0, t1) == counts
+
+        upcoming = sorted((c for c in conflicts if start(c) > t0), key=lambda c: (start(c), end(c), ConflictStore.key_of(c)))
+        assert keys(manager.get_next_conflicts(t0, 5)) == keys(upcoming[:5])
+
+        past, active, upcoming = manager.split_conflicts(t0)
+        assert len(past) + len(active) + len(upcoming) == len(conflicts)
+        assert all(end(c) < t0 for c in past) and all(start(c) <= t0 <= end(c) for c in active)
+
+
+def test_index_follows_passage_changes():
+    """Un gestionnaire observateur réindexe un avion à chaque changement de ses temps de passage,
+    même sans recalcul de ses conflits: les autres avions le trouvent à sa nouvelle place"""
+    random.seed(3)
+    manager = ConflictManager(time_threshold=60)
+    Aircraft.register_observer(manager)
+    airways = list(Airway.get_available_airways().values())
+    aircrafts = [Aircraft(flight_plan=random.choice(airways).get_transform_points(),
+                          speed=random.choice([0.0005, 0.0007, 0.001]), take_off_time=random.uniform(0, 1000))
+                 for _ in range(30)]
+    manager.register_fleet(aircrafts=aircrafts, balises=BALISES)
+
+    for _ in range(20):
+        moved, updated = random.sample(aircrafts, 2)
+        moved.load_commands([DataStorage(id=moved.get_id_aircraft(), time=random.uniform(0, 1000), speed=moved.get_speed())])
+        moved.calculate_estimated_times_commands() # Sans notification des conflits
+        for balise_name, passage_time in moved.get_flight_plan_timed().items():
+            assert (passage_time, moved.get_id_aircraft()) in manager.get_passages(balise_name)
+
+        manager.update_aircraft_conflicts(updated)
+        updated_id = updated.get_id_aircraft()
+        expected = {pair for pair in brute_force_conflicts(aircrafts, 60) if updated_id in pair[:2]}
+        assert {pair for pair in manager_conflicts([updated]) if updated_id in pair[:2]} == expected
+
+
+if __name__ == "__main__":
+    test_index_matches_brute_force()
+    test_register_fleet_matches_brute_force()
+    test_conflict_store_indexes()
+    test_conflict_timeline_matches_filtering()
+    test_index_follows_passage_changes()
@@ -0,0 +1,260 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from model.configuration import BALISES
+from model.aircraft.aircraft import Aircraft
+from model.aircraft.storage import DataStorage
+from model.aircraft.fleet import FleetTiming, FleetState
+from model.route import Airway
+from model.point import Point
+
+import numpy as np
+import time
+
+# Route de 20 balises parcourue du nord vers le sud
+ROUTE_20_BALISES = sorted(BALISES, key=lambda b: -b.getY())[:20]
+
+
+def stepping_estimated_times(aircraft: Aircraft):
+    """Ancien calcul des temps de passage par pas adaptatif (10s / 1s / 0.1s / 0.01s),
+    conservé comme référence. Renvoie (temps de passage, nombre d'itérations)"""
+    current_position = aircraft.get_position()
+    current_time = aircraft.get_take_off_time()
+    current_speed = aircraft.get_speed()
+    commands = aircraft.get_commands()
+    current_command_index = 0
+    current_command = commands[current_command_index] if commands else None
+    flight_plan_timed = {}
+    operations = 0
+
+    for balise in aircraft.get_flight_plan():
+        while True:
+            operations += 1
+            distance_to_balise = current_position.distance_horizontale(balise)
+            time_to_next_command = (current_command.time - current_time
+                                    if current_command and current_command.time > current_time
+                                    else float('inf'))
+            if distance_to_balise > 10 * aircraft.get_speed() and time_to_next_command > 10:
+                time_step = 10
+            elif distance_to_balise > aircraft.get_speed() or time_to_next_command > 1:
+                time_step = 1
+            elif distance_to_balise > 0.1 * aircraft.get_speed() or time_to_next_command > 0.1:
+                time_step = 0.1
+            else:
+                time_step = 0.01
+
+            if distance_to_balise <= current_speed * time_step:
+                current_time += distance_to_balise / current_speed
+                current_position = Point(balise.getX(), balise.getY(), current_position.getZ())
+                flight_plan_timed[balise.get_name()] = round(current_time, 2)
+                break
+            else:
+                current_time += time_step
+                proportion = (current_speed * time_step) / distance_to_balise
+                inter_x = current_position.getX() + proportion * (balise.getX() - current_position.getX())
+                inter_y = current_position.getY() + proportion * (balise.getY() - current_position.getY())
+                current_position = Point(inter_x, inter_y, current_position.getZ())
+
+            if current_command and current_time >= current_command.time:
+                current_speed = current_command.speed
+                current_command_index += 1
+                current_command = commands[current_command_index] if current_command_index < len(commands) else None
+    return flight_plan_timed, operations
+
+
+def analytic_operations(aircraft: Aircraft) -> int:
+    """Nombre d'itérations du calcul analytique: une par balise et une par borne de commande"""
+    return len(aircraft.get_flight_plan()) + len(aircraft.get_commands())
+
+
+def test_constant_speed_identical():
+    """A vitesse constante, les deux calculs donnent exactement les mêmes arrondis"""
+    for speed in [0.0005, 0.00075, 0.001]:
+        aircraft = Aircraft(flight_plan=ROUTE_20_BALISES, speed=speed, take_off_time=12.34)
+        reference, _ = stepping_estimated_times(aircraft)
+        assert aircraft.get_flight_plan_timed() == reference
+
+
+def test_commands_close_to_reference():
+    """Avec des changements de vitesse, l'ancien calcul dépasse les bornes des commandes d'au plus un pas"""
+    aircraft = Aircraft(flight_plan=ROUTE_20_BALISES, speed=0.001, take_off_time=0.)
+    commands = [DataStorage(id=aircraft.get_id_aircraft(), time=0., speed=0.001),
+                DataStorage(id=aircraft.get_id_aircraft(), time=300., speed=0.0006),
+                DataStorage(id=aircraft.get_id_aircraft(), time=900., speed=0.0008)]
+    aircraft.set_commands(commands, recalcul=False)
+    aircraft.calculate_estimated_times_commands()
+    reference, _ = stepping_estimated_times(aircraft)
+    for name, passage_time in aircraft.get_flight_plan_timed().items():
+        assert abs(passage_time - reference[name]) <= 1.
+
+
+def test_fleet_timing_matches_aircraft():
+    """La matrice de FleetTiming donne les mêmes temps que le calcul avion par avion"""
+    aircrafts = []
+    for k, airway in enumerate(Airway.get_available_airways().values()):
+        aircraft = Aircraft(flight_plan=airway.get_transform_points(), speed=0.0005 + 0.00002*k,
+                            take_off_time=10.*k, estimate_times=False)
+        commands = [DataStorage(id=aircraft.get_id_aircraft(), time=10.*k, speed=aircraft.get_speed()),
+                    DataStorage(id=aircraft.get_id_aircraft(), time=10.*k + 100. + k, speed=0.0008)]
+        aircraft.load_commands(commands[:1 + k % 2])
+        aircrafts.append(aircraft)
+
+    times = FleetTiming.estimate_aircrafts(aircrafts)
+    assert times.shape[0] == len(aircrafts)
+    for aircraft in aircrafts:
+        view = dict(aircraft.get_flight_plan_timed())
+        aircraft.calculate_estimated_times_commands()
+        assert view == aircraft.get_flight_plan_timed()
+
+
+def test_route_geometry_matches_balises():
+    """La géométrie précalculée des routes donne les mêmes distances et caps que les balises"""
+    for airway in Airway.get_available_airways().values():
+        balises = airway.get_transform_points()
+        geometry = Airway.get_geometry(balises)
+        assert geometry is Airway.get_geometry(list(balises)) # Compilée une seule fois
+        aircraft = Aircraft(flight_plan=balises, speed=0.0005, estimate_times=False)
+        for i, (one, two) in enumerate(zip(balises, balises[1:])):
+            assert geometry.segment_lengths[i] == one.distance_horizontale(two)
+            assert abs(geometry.headings[i] - aircraft.calculate_heading(one, two)) < 1e-12
+            assert abs(geometry.cumulative[i + 1] - geometry.cumulative[i] - geometry.segment_lengths[i]) < 1e-12
+
+
+def test_positions_at_matches_position_from_time():
+    """La recherche vectorisée des positions donne les mêmes positions que l'appel avion par avion"""
+    aircraft = Aircraft(flight_plan=ROUTE_20_BALISES, speed=0.001, take_off_time=50.)
+    aircraft.set_commands([DataStorage(id=aircraft.get_id_aircraft(), time=50., speed=0.001),
+                           DataStorage(id=aircraft.get_id_aircraft(), time=400., speed=0.0006)], recalcul=False)
+    aircraft.calculate_estimated_times_commands()
+    times = np.arange(0., aircraft.get_arrival_time_on_last_point() + 100., 7.3)
+
+    positions = aircraft.positions_at(times)
+    assert positions.shape == (len(times), 2)
+    for passage_time, (x, y) in zip(times, positions):
+        point = aircraft.get_position_from_time(float(passage_time))
+        assert abs(point.getX() - x) < 1e-12 and abs(point.getY() - y) < 1e-12
+
+
+def test_fleet_state_matches_update():
+    """L'avancement vectorisé de la flotte donne les mêmes positions, caps et fins de vol que Aircraft.update"""
+    airways = list(Airway.get_available_airways().values())
+    fleet = [Aircraft(flight_plan=airway.get_transform_points(), speed=0.0008, take_off_time=30.*k)
+             for k, airway in enumerate(airways)]
+    reference = [aircraft.deepcopy() for aircraft in fleet]
+
+    state = FleetState(fleet)
+    for _ in range(3000):
+        state.step(0.7)
+        for aircraft in reference:
+            aircraft.update(0.7)
+    state.store()
+    for aircraft, expected in zip(fleet, reference):
+        assert aircraft.get_time() == expected.get_time()
+        assert aircraft.get_position().getXYZ() == expected.get_position().getXYZ()
+        assert aircraft.get_heading() == expected.get_heading()
+        assert aircraft.has_reached_final_point() == expected.has_reached_final_point()
+
+
+def test_fleet_state_active_set():
+    """Seuls les avions en vol sont actifs; temps et fin de vol restent justes pour les autres"""
+    route = list(Airway.get_available_airways().values())[0].get_transform_points()
+    fleet = [Aircraft(flight_plan=route, speed=0.001, take_off_time=500.*k) for k in range(4)]
+    state = FleetState(fleet)
+    for _ in range(1000): # t = 1000s
+        state.step(1.)
+    state.store()
+
+    in_flight = [i for i, aircraft in enumerate(fleet)
+                 if aircraft.get_take_off_time() <= 1000. < aircraft.get_arrival_time_on_last_point()]
+    assert state.get_active_rows().tolist() == in_flight
+    assert all(aircraft.get_time() == 1000. for aircraft in fleet)
+    assert [aircraft.has_reached_final_point() for aircraft in fleet] == [1000. >= a.get_arrival_time_on_last_point() for a in fleet]
+    assert fleet[3].get_position().getXY() == fleet[3].get_start_position().getXY()
+
+    # Une copie fige le temps, une modification avion par avion détache l'avion de l'état
+    copy = fleet[1].deepcopy()
+    state.step(1.)
+    assert copy.get_time() == 1000. and fleet[1].get_time() == 1001.
+    fleet[1].update(1.)
+    state.step(1.)
+    assert fleet[1].get_time() == 1002.
+
+
+def test_fleet_state_rereads_modified_aircraft_only():
+    """Une recherche de position ne modifie aucune version; un changement de commandes
+    ne change que la version de l'avion modifié, seul relu par FleetState.sync"""
+    route = list(Airway.get_available_airways().values())[0].get_transform_points()
+    fleet = [Aircraft(flight_plan=route, speed=0.001, take_off_time=100.*k) for k in range(4)]
+    state = FleetState(fleet)
+    for _ in range(300):
+        state.step(1.)
+    state.store()
+
+    version, versions = Aircraft.get_kinematics_version(), [a.get_own_kinematics_version() for a in fleet]
+    fleet[0].get_position_from_time(150.)
+    fleet[2].positions_at(np.array([10., 200.]))
+    assert Aircraft.get_kinematics_version() == version
+    assert [a.get_own_kinematics_version() for a in fleet] == versions
+
+    fleet[2].load_commands([DataStorage(id=fleet[2].get_id_aircraft(), time=200., speed=0.001),
+                            DataStorage(id=fleet[2].get_id_aircraft(), time=400., speed=0.0006)])
+    fleet[2].calculate_estimated_times_commands()
+    changed = [a.get_own_kinematics_version() != v for a, v in zip(fleet, versions)]
+    assert changed == [False, False, True, False]
+
+    reference = fleet[2].deepcopy()
+    state.sync()
+    state.step(200.)
+    state.store()
+    reference.update(200.)
+    assert fleet[2].get_position().getXYZ() == reference.get_position().getXYZ()
+
+
+def benchmark(repeat: int = 200, rounds: int = 1):
+    """Compare les deux calculs sur une route de 20 balises.
+    Renvoie (facteur en itérations, facteur en temps)"""
+    aircraft = Aircraft(flight_plan=ROUTE_20_BALISES, speed=0.00075, take_off_time=0.)
+
+    stepping_duration = analytic_duration = float('inf') # Meilleure de plusieurs mesures: moins sensible a la charge
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            _, stepping_operations = stepping_estimated_times(aircraft)
+        stepping_duration = min(stepping_duration, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            aircraft.calculate_estimated_times_commands()
+        analytic_duration = min(analytic_duration, time.perf_counter() - start)
+
+    operations = analytic_operations(aircraft)
+    print(f"Route de {len(ROUTE_20_BALISES)} balises")
+    print(f"Pas adaptatif: {stepping_operations} itérations, {1000*stepping_duration/repeat:.3f} ms/appel")
+    print(f"Analytique   : {operations} itérations, {1000*analytic_duration/repeat:.3f} ms/appel")
+    print(f"Facteur: x{stepping_operations/operations:.1f} en itérations, x{stepping_duration/analytic_duration:.1f} en temps")
+    return stepping_operations / operations, stepping_duration / analytic_duration
+
+
+def test_iteration_ratio():
+    """Une itération par balise et par commande contre ~900 pas: le facteur en itérations est borné
+    par la longueur de la route (~43x pour 20 balises). Le facteur en temps, dépendant de la charge
+    de la machine, n'est vérifié que par le benchmark (__main__)"""
+    aircraft = Aircraft(flight_plan=ROUTE_20_BALISES, speed=0.00075, take_off_time=0.)
+    _, stepping_operations = stepping_estimated_times(aircraft)
+    aircraft.calculate_estimated_times_commands()
+    assert stepping_operations / analytic_operations(aircraft) >= 40.
+
+
+if __name__ == "__main__":
+    test_constant_speed_identical()
+    test_commands_close_to_reference()
+    test_fleet_timing_matches_aircraft()
+    test_route_geometry_matches_balises()
+    test_positions_at_matches_position_from_time()
+    test_fleet_state_matches_update()
+    test_fleet_state_active_set()
+    test_fleet_state_rereads_modified_aircraft_only()
+    test_iteration_ratio()
+    _, duration_ratio = benchmark(rounds=5)
+    assert duration_ratio >= 50., f"analytic computation only x{duration_ratio:.1f} faster"
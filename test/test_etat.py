@@ -0,0 +1,41 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from algorithm.concrete.recuit.etat import Etat
+from algorithm.objective_function.function import ObjectiveFunctionConflictInternal
+from fleet_data import make_data
+
+
+def test_etat_undo_and_restore_best():
+    """Un voisin rejeté est annulé et le meilleur état restauré, critère compris, sans recalculer les autres avions"""
+    data, manager = make_data(seed=8, number_of_aircrafts=20)
+    objective = ObjectiveFunctionConflictInternal(nb_expected_conflict=3)
+    etat = Etat(data)
+    etat.initialize_random()
+    state = objective.incremental_state(data)
+    etat.critere = state.get_value()
+    etat.save_best()
+    best_vector, best_critere = etat.get_best_vector(), etat.get_critere()
+
+    for k in range(30):
+        commands = [list(trajectory) for trajectory in etat.get_vector()]
+        moves = etat.generate_neighborhood(state)
+        if k % 3: # Rejet: seuls les avions du voisin retrouvent leurs commandes
+            etat.reject(state)
+            assert [aircraft_sim.get_data_storages() for aircraft_sim in data] == commands
+        else:
+            etat.accept(state.get_value())
+        assert etat.get_critere() == state.get_value() == objective.evaluate(data)
+        assert all(move.old_commands == tuple(commands[move.index]) for move in moves)
+
+    flight_plans = [aircraft_sim.get_object().get_flight_plan_timed() for aircraft_sim in data]
+    etat.restore_best(state)
+    assert etat.get_critere() == best_critere == state.get_value() == objective.evaluate(data)
+    assert [aircraft_sim.get_data_storages() for aircraft_sim in data] == best_vector
+    assert any(aircraft_sim.get_object().get_flight_plan_timed() is flight_plan for aircraft_sim, flight_plan in zip(data, flight_plans))
+    del manager
+
+
+if __name__ == "__main__":
+    test_etat_undo_and_restore_best()
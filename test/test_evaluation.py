@@ -0,0 +1,35 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from model.aircraft.aircraft import Aircraft
+from model.conflict_manager import ConflictStore
+from algorithm.concrete.genetic.genetique import AlgorithmGeneticBase
+from algorithm.objective_function.function import (ObjectiveFunctionConflictInternal, ObjectiveFunctionMaxConflict,
+                                                   ObjectiveFunctionMaxConflictMinVariation)
+from algorithm.evaluation import Scenario
+from fleet_data import make_data
+
+
+def test_scenario_matches_applied_commands():
+    """L'évaluation sur le scénario figé donne les mêmes conflits et valeurs que l'application
+    des commandes aux avions, sans modifier les avions ni le ConflictManager"""
+    data, manager = make_data(seed=3)
+    genetic = AlgorithmGeneticBase(data=data, population_size=8)
+    scenario = Scenario.from_data(data)
+    objectives = [ObjectiveFunctionMaxConflict(), ObjectiveFunctionConflictInternal(nb_expected_conflict=3),
+                  ObjectiveFunctionMaxConflictMinVariation()]
+
+    for individual in genetic.generate_initial_population(data):
+        version, conflicts = Aircraft.get_kinematics_version(), manager.get_conflicts()
+        results = [scenario.evaluate(individual, objective) for objective in objectives]
+        assert Aircraft.get_kinematics_version() == version and manager.get_conflicts() == conflicts
+
+        genetic.apply_individual(individual)
+        assert results[0].get_conflict_keys() == {ConflictStore.key_of(c) for c in manager.get_conflicts()}
+        assert [result.get_value() for result in results] == [objective.evaluate(data) for objective in objectives]
+    del manager
+
+
+if __name__ == "__main__":
+    test_scenario_matches_applied_commands()
@@ -0,0 +1,24 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from algorithm.objective_function.function import ObjectiveFunctionConflictInternal, ObjectiveFunctionMaxConflict
+from fleet_data import make_data
+
+
+def test_incremental_objectives_match_full_evaluation():
+    """Les mises à jour avion par avion donnent la même valeur qu'une évaluation complète"""
+    data, manager = make_data(seed=7, number_of_aircrafts=30)
+    objectives = [ObjectiveFunctionMaxConflict(), ObjectiveFunctionConflictInternal(nb_expected_conflict=3)]
+    states = [objective.incremental_state(data) for objective in objectives]
+    for k in range(40):
+        aircraft_sim = data[(7 * k) % len(data)]
+        for state in states: state.remove(aircraft_sim)
+        aircraft_sim.generate_neighbor()
+        for state in states: state.add(aircraft_sim)
+        assert [state.get_value() for state in states] == [objective.evaluate(data) for objective in objectives]
+    del manager
+
+
+if __name__ == "__main__":
+    test_incremental_objectives_match_full_evaluation()
@@ -0,0 +1,20 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from algorithm.concrete.recuit.recuit import AlgorithmRecuit
+
+import numpy as np
+
+
+def test_initial_temperature_estimation():
+    """La température estimée accepte la proportion demandée des écarts de l'échantillon"""
+    deltas = np.array([-1., 0., 0.5, 1., 2., 4.])
+    temperature = AlgorithmRecuit.temperature_for_acceptance(deltas, 0.8)
+    assert abs(np.minimum(1., np.exp(-deltas / temperature)).mean() - 0.8) < 1e-9
+    assert AlgorithmRecuit.temperature_for_acceptance(deltas, 0.2) == AlgorithmRecuit.INITIAL_TEMPERATURE
+    assert AlgorithmRecuit.temperature_for_acceptance(np.array([-1., 0.]), 0.8) is None # Repli sur la boucle de chauffe
+
+
+if __name__ == "__main__":
+    test_initial_temperature_estimation()
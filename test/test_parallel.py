@@ -0,0 +1,58 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from algorithm.concrete.genetic.genetique import AlgorithmGeneticBase
+from algorithm.objective_function.function import ObjectiveFunctionConflictInternal
+from algorithm.evaluation import Scenario
+from algorithm.parallel import ParallelEvaluator
+from fleet_data import make_data
+
+
+def test_parallel_fitnesses_match_serial():
+    """Le pool de processus donne les mêmes fitnesses que l'évaluation séquentielle, sans modifier les avions"""
+    data, manager = make_data()
+    objective = ObjectiveFunctionConflictInternal(nb_expected_conflict=3)
+    genetic = AlgorithmGeneticBase(data=data, population_size=12)
+    genetic.set_objective_function(objective)
+    population = genetic.generate_initial_population(data)
+
+    commands = [aircraft_sim.get_object().get_commands() for aircraft_sim in data]
+    evaluator = ParallelEvaluator(Scenario.from_data(data), objective, n_jobs=2)
+    try:
+        parallel = evaluator.evaluate(population)
+        assert evaluator.evaluate(population) == parallel
+    finally:
+        evaluator.close()
+    assert [aircraft_sim.get_object().get_commands() for aircraft_sim in data] == commands
+    assert genetic.calculate_fitnesses(population) == parallel
+    del manager
+
+
+def test_parallel_run_matches_serial():
+    """Avec des processus, l'évaluation ne modifie pas les avions et la meilleure fitness
+    est celle de l'évaluation séquentielle du meilleur individu"""
+    data, manager = make_data(seed=1)
+    genetic = AlgorithmGeneticBase(data=data, population_size=10, generations=3, n_jobs=2)
+    genetic.set_objective_function(ObjectiveFunctionConflictInternal(nb_expected_conflict=3))
+
+    commands = [aircraft_sim.get_object().get_commands() for aircraft_sim in data]
+    genetic.open_evaluator()
+    try:
+        genetic.calculate_fitnesses(genetic.generate_initial_population(data))
+    finally:
+        genetic.close_evaluator()
+    assert [aircraft_sim.get_object().get_commands() for aircraft_sim in data] == commands
+
+    best_individual = genetic.start()
+    assert isinstance(best_individual, list), best_individual
+    serial = AlgorithmGeneticBase(data=data, population_size=10, n_jobs=1)
+    serial.set_objective_function(ObjectiveFunctionConflictInternal(nb_expected_conflict=3))
+    assert serial.calculate_fitnesses([best_individual]) == [genetic.get_best_fitness()]
+    serial.reinitialize_data()
+    del data, manager, genetic
+
+
+if __name__ == "__main__":
+    test_parallel_fitnesses_match_serial()
+    test_parallel_run_matches_serial()
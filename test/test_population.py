@@ -0,0 +1,165 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from model.aircraft.storage import DataStorage
+from algorithm.population import Population
+from algorithm.concrete.genetic.genetique_vectorized import AlgorithmGeneticVectorized
+from algorithm.concrete.genetic.genetique_island import AlgorithmGeneticIsland
+from algorithm.concrete.genetic.optimizer_hyperband import HyperbandOptimizer
+from algorithm.concrete.genetic.genetique import AlgorithmGeneticBase
+from algorithm.interface.IAlgorithm import AlgorithmState
+from algorithm.concrete.genetic.genetique_window import OptimizedGeneticAlgorithm, WindowLayer, _run_window_layers
+from algorithm.evaluation import Scenario
+from algorithm.objective_function.function import ObjectiveFunctionConflictInternal
+from fleet_data import make_data
+
+import numpy as np
+import time
+
+
+def test_population_operators():
+    """Conversion aller-retour, croisement composé des commandes des parents, mutation sur la grille de vitesses"""
+    individuals = [[[DataStorage(id=0, speed=0.001, time=1.), DataStorage(id=0, speed=0.002, time=5.)],
+                    [DataStorage(id=1, speed=0.003, time=2.)]],
+                   [[DataStorage(id=0, speed=0.004, time=3.)],
+                    [DataStorage(id=1, speed=0.005, time=4.), DataStorage(id=1, speed=0.006, time=9., heading=1.5)]]]
+    population = Population.from_individuals(individuals, [0, 1])
+    assert population.to_individuals() == individuals
+    assert population.get_lengths().tolist() == [[2, 1], [1, 2]]
+
+    generator = np.random.default_rng(0)
+    children = population.crossover(np.array([0, 1] * 50), np.array([1, 0] * 50), 0.8, generator).to_individuals()
+    for child, first, second in zip(children, individuals * 50, individuals[::-1] * 50):
+        for trajectory, one, two in zip(child, first, second):
+            assert set(trajectory) <= set(one) | set(two)
+            assert [c.time for c in trajectory] == sorted(c.time for c in trajectory)
+    cut = population.crossover(np.zeros(50, dtype=int), np.ones(50, dtype=int), 1., np.random.default_rng(1)).to_individuals()
+    assert all(child[0] == individuals[0][0][:1] for child in cut) # Coupure dans [1, longueur - 1], comme AlgorithmGeneticBase
+
+    speeds = np.array([0.0005, 0.0007])
+    for mutant, individual in zip(population.mutate(1., speeds, generator).to_individuals(), individuals):
+        for trajectory, original in zip(mutant, individual):
+            assert len(trajectory) == len(original) and all(c.time >= 0 for c in trajectory)
+            assert all(c.speed in speeds or c.speed == o.speed for c, o in zip(trajectory, original))
+
+
+def test_vectorized_genetic_run():
+    """Le génétique vectorisé renvoie des commandes pour chaque avion, dont la fitness est la meilleure trouvée"""
+    data, manager = make_data(seed=5)
+    genetic = AlgorithmGeneticVectorized(data=data, population_size=12, generations=4)
+    genetic.set_objective_function(ObjectiveFunctionConflictInternal(nb_expected_conflict=3))
+    best_individual = genetic.start()
+    assert len(best_individual) == len(data) and all(isinstance(c, DataStorage) for t in best_individual for c in t)
+    assert genetic.evaluate_commands(best_individual).get_value() == genetic.get_best_fitness()
+    del manager
+
+
+def test_island_genetic_run():
+    """Le modèle d'îles renvoie le meilleur individu de toutes les îles et va jusqu'au bout des générations"""
+    data, manager = make_data(seed=6)
+    genetic = AlgorithmGeneticIsland(data=data, population_size=8, generations=5, n_islands=3,
+                                     migration_interval=2, migration_size=2, topology="random")
+    genetic.set_objective_function(ObjectiveFunctionConflictInternal(nb_expected_conflict=3))
+    targets = genetic.migration_targets()
+    assert sorted(targets) == [0, 1, 2] and all(i != target for i, target in enumerate(targets))
+
+    best_individual = genetic.start()
+    assert genetic.get_progress() == 100
+    assert genetic.evaluate_commands(best_individual).get_value() == genetic.get_best_critere()
+    del manager
+
+
+def test_hyperband_optimizer_resumes_promoted_trials():
+    """ASHA sur 2 processus: les meilleurs essais sont promus, leur AlgorithmGeneticBase reprend son point de reprise
+    jusqu'au dernier palier"""
+    data, manager = make_data(seed=9)
+    optimizer = HyperbandOptimizer(data=data, num_samples=4, max_epochs=4, grace_period=1, reduction_factor=2, n_jobs=2)
+    optimizer.set_objective_function(ObjectiveFunctionConflictInternal(nb_expected_conflict=3))
+    assert optimizer.get_rungs() == [1, 2, 4]
+
+    best_config = optimizer.start()
+    trials = optimizer.get_trials()
+    assert len(trials) == 4 and max(trial.generations for trial in trials) == 4
+    assert best_config in [trial.config for trial in trials]
+    assert optimizer.get_best_critere() == min(trial.fitness for trial in trials)
+    del manager
+
+
+def test_window_layers_in_parallel():
+    """Les layers des intervalles tournent dans des processus: meilleurs individus cohérents avec leur scénario"""
+    data, manager = make_data(seed=11)
+    objective = ObjectiveFunctionConflictInternal(nb_expected_conflict=3)
+    window, background = data[:4], data[4:]
+    layers = [WindowLayer(population=Population.from_individuals([[d.initialize() for d in window] for _ in range(6)],
+                                                                 [d.get_object().get_id_aircraft() for d in window]) if k == 0 else None,
+                          generations=2, population_size=6, mutation_rate=0.1, crossover_rate=0.8, objective=objective,
+                          is_minimise=True, generator=np.random.default_rng(k))
+              for k in range(2)]
+    scenario = Scenario.from_data(window, background)
+    population, best_fitnesses = _run_window_layers(scenario, layers, window[0].get_possible_speeds(), 4, np.random.default_rng(2))
+    fitnesses = [scenario.evaluate(individual, objective).get_value() for individual in population]
+    assert len(population) >= 6 and fitnesses[0] == best_fitnesses[0]
+    assert best_fitnesses[1] <= best_fitnesses[0] # La 2e layer part des meilleurs individus de la 1ere
+
+    genetic = OptimizedGeneticAlgorithm(data=data, population_size=6, generations=2, interval_value=4, window_jobs=2, number_of_layers=1)
+    genetic.set_simulation_duration(3600)
+    layer_algo = AlgorithmGeneticBase(data=data, population_size=6, generations=2)
+    layer_algo.set_objective_function(objective)
+    genetic.set_layers([layer_algo])
+    genetic.set_objective_function(objective)
+    best_individual = genetic.start()
+    assert isinstance(best_individual, list), best_individual
+    assert genetic.evaluate_commands(best_individual).get_value() == genetic.get_best_critere()
+    del manager
+
+
+def test_window_layers_same_with_any_number_of_processes():
+    """Pour une même graine, les populations des intervalles ne dépendent pas du nombre de processus"""
+    def interval_populations(window_jobs: int):
+        data, manager = make_data(seed=11)
+        objective = ObjectiveFunctionConflictInternal(nb_expected_conflict=3)
+        genetic = OptimizedGeneticAlgorithm(data=data, population_size=6, generations=2, interval_value=4, window_jobs=window_jobs, number_of_layers=2)
+        layers = [AlgorithmGeneticBase(data=data, population_size=6, generations=2) for _ in range(2)]
+        for layer_algo in layers:
+            layer_algo.set_objective_function(objective)
+        genetic.set_layers(layers)
+        genetic.set_state(AlgorithmState.STARTED)
+        genetic.set_start_time(time.time())
+        intervals, populations = genetic.split_intervals(), {}
+        genetic.run_windows_parallel(intervals, intervals, populations)
+        del manager
+        return {interval: [[[(c.time, c.speed) for c in trajectory] for trajectory in individual] for individual in population]
+                for interval, population in populations.items()}
+
+    serial = interval_populations(window_jobs=1)
+    assert len(serial) == 3 and serial == interval_populations(window_jobs=3)
+
+
+def test_window_layers_stop_at_timeout():
+    """Les processus des layers s'arretent au timeout, sans finir leurs generations"""
+    data, manager = make_data(seed=11)
+    objective = ObjectiveFunctionConflictInternal(nb_expected_conflict=3)
+    genetic = OptimizedGeneticAlgorithm(data=data, population_size=6, generations=2, interval_value=4, window_jobs=2, number_of_layers=1)
+    genetic.set_simulation_duration(3600)
+    genetic.set_timeout_value(1.)
+    layer_algo = AlgorithmGeneticBase(data=data, population_size=6, generations=10**6)
+    layer_algo.set_objective_function(objective)
+    genetic.set_layers([layer_algo])
+    genetic.set_objective_function(objective)
+
+    start = time.perf_counter()
+    genetic.start()
+    assert time.perf_counter() - start < 30.
+    assert genetic.get_progress() < 100
+    del manager
+
+
+if __name__ == "__main__":
+    test_population_operators()
+    test_vectorized_genetic_run()
+    test_island_genetic_run()
+    test_hyperband_optimizer_resumes_promoted_trials()
+    test_window_layers_in_parallel()
+    test_window_layers_same_with_any_number_of_processes()
+    test_window_layers_stop_at_timeout()
@@ -0,0 +1,113 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from model.aircraft.aircraft import Aircraft
+from model.simulation import SimulationModel
+from model.runner import HeadlessRunner
+from model.event_simulation import EventSimulation, EventType, SimulationEvent
+from model.route import Airway
+
+from typing import List
+
+
+def make_aircrafts() -> List[Aircraft]:
+    return [Aircraft(flight_plan=airway.get_transform_points(), speed=0.001, take_off_time=20.*k)
+            for k, airway in enumerate(Airway.get_available_airways().values())]
+
+
+def make_simulation(aircrafts: List[Aircraft]) -> SimulationModel:
+    simulation = SimulationModel()
+    for aircraft in aircrafts:
+        simulation.add_aircraft(aircraft)
+    simulation.initialise_conflicts()
+    return simulation
+
+
+def test_runner_matches_single_steps():
+    """Le runner en temps virtuel donne le même état qu'un pas de timer à la fois"""
+    aircrafts = make_aircrafts()
+    reference = make_simulation([aircraft.deepcopy() for aircraft in aircrafts])
+    runner_simulation = make_simulation(aircrafts)
+    runner = HeadlessRunner(runner_simulation, timestep=0.1, snapshot_interval=30., end_time=600.)
+
+    snapshots = list(runner.snapshots())
+    assert snapshots[0].get_time() == 0
+    assert all(one.get_time() < two.get_time() for one, two in zip(snapshots, snapshots[1:]))
+    assert abs(snapshots[-1].get_time() - 600.) < 1e-6
+
+    for _ in range(6000):
+        reference.advance(timestep=0.1)
+    for aircraft, expected in zip(runner_simulation.get_aircrafts().values(), reference.get_aircrafts().values()):
+        assert aircraft.get_position().getXYZ() == expected.get_position().getXYZ()
+        assert aircraft.get_heading() == expected.get_heading()
+
+
+def test_runner_stops_when_all_aircrafts_arrived():
+    """Sans fin imposée ni générateur de trafic, le runner s'arrête à l'arrivée du dernier avion"""
+    simulation = make_simulation(make_aircrafts())
+    collected = []
+    last = HeadlessRunner(simulation, snapshot_interval=120.).run(callbacks=[collected.append])
+    assert simulation.is_finished()
+    assert collected[-1] is last
+    assert set(last.get_finished()) == set(simulation.get_aircrafts())
+
+
+def test_event_simulation_jumps_between_events():
+    """Les évènements sortent dans l'ordre du temps, les conflits à leur conflict_time_one,
+    et l'état calculé à la demande est celui de la simulation avancée pas à pas"""
+    aircrafts = make_aircrafts()
+    reference = make_simulation([aircraft.deepcopy() for aircraft in aircrafts])
+    simulation = make_simulation(aircrafts)
+    events = EventSimulation(simulation)
+
+    conflicts = []
+    events.connect(EventType.CONFLICT, conflicts.append)
+    emitted = list(events.events(until=600.))
+    assert all(one.get_time() <= two.get_time() for one, two in zip(emitted, emitted[1:]))
+    assert events.get_time() == 600.
+    assert all(event.get_time() == event.get_conflict().get_conflict_time_one() for event in conflicts)
+    assert len([e for e in emitted if e.get_event_type() == EventType.TAKE_OFF]) == sum(a.get_take_off_time() <= 600. for a in aircrafts)
+
+    state = events.state_at(600.)
+    for _ in range(6000):
+        reference.advance(timestep=0.1)
+    for position, expected in zip(state.get_positions(), reference.get_aircrafts().values()):
+        assert tuple(position) == expected.get_position().getXYZ()
+    assert all(aircraft.get_time() == 0. for aircraft in aircrafts) # Les avions ne sont pas modifiés
+
+    events.run_until()
+    assert events.is_finished()
+    assert len(conflicts) == len([c for c in simulation.conflict_manager.get_conflicts()])
+
+
+def test_event_simulation_keeps_events_when_aircraft_modified():
+    """Un callback qui modifie un avion en cours de route ne fait perdre ni les évènements
+    ajoutés par schedule, ni les autres évènements encore en attente au même temps"""
+    aircrafts = make_aircrafts()
+    aircrafts[1].set_take_off_time(aircrafts[0].get_take_off_time()) # Deux décollages au même temps
+    simulation = make_simulation(aircrafts)
+    events = EventSimulation(simulation)
+    user_event = SimulationEvent(30., EventType.COMMAND, aircrafts[2].get_id_aircraft())
+    events.schedule(user_event)
+
+    delayed = aircrafts[-1]
+    new_take_off = delayed.get_take_off_time() + 5.
+    def delay_last_aircraft(event: SimulationEvent) -> None:
+        if event.get_aircraft_id() == aircrafts[0].get_id_aircraft():
+            delayed.set_take_off_time(new_take_off)
+    events.connect(EventType.TAKE_OFF, delay_last_aircraft)
+
+    emitted = list(events.events())
+    assert any(event is user_event for event in emitted)
+    take_offs = [event for event in emitted if event.get_event_type() == EventType.TAKE_OFF]
+    assert sorted(event.get_aircraft_id() for event in take_offs) == sorted(aircraft.get_id_aircraft() for aircraft in aircrafts) # Chacun une seule fois
+    assert take_offs[-1].get_time() == new_take_off
+    assert events.is_finished()
+
+
+if __name__ == "__main__":
+    test_runner_matches_single_steps()
+    test_runner_stops_when_all_aircrafts_arrived()
+    test_event_simulation_jumps_between_events()
+    test_event_simulation_keeps_events_when_aircraft_modified()
@@ -0,0 +1,45 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from algorithm.data import SimulatedAircraftImplemented, mutate_commands
+from algorithm.concrete.recuit.tempering import AlgorithmRecuitParallelTempering
+from algorithm.objective_function.function import ObjectiveFunctionConflictInternal
+from model.aircraft.storage import DataStorage
+from fleet_data import make_data
+
+from copy import deepcopy
+
+
+def test_parallel_tempering_run():
+    """L'echange de replicas renvoie le meilleur etat de toutes les chaines, evalue comme sur la flotte"""
+    data, manager = make_data(seed=7)
+    recuit = AlgorithmRecuitParallelTempering(data=data, is_minimise=True, number_transitions=40, n_replicas=3,
+                                              min_temperature=0.01, max_temperature=1., exchange_interval=10)
+    recuit.set_objective_function(ObjectiveFunctionConflictInternal(nb_expected_conflict=3))
+    assert all(abs(t - e) < 1e-12 for t, e in zip(recuit.get_temperatures(), [1., 0.1, 0.01]))
+
+    best_commands = recuit.start()
+    assert recuit.get_progress() == 100
+    assert recuit.evaluate_commands(best_commands).get_value() == recuit.get_best_critere()
+    del manager
+
+
+def test_tempering_neighbor_uses_generate_commands_operator():
+    """Le voisin des replicas est tiré par l'opérateur de generate_commands (cf. mutate_commands)"""
+    data, manager = make_data(seed=7)
+    aircraft_sim = data[0]
+    aircraft_sim.update_commands(aircraft_sim.initialize() + [DataStorage(id=aircraft_sim.get_object().get_id_aircraft(), speed=0.001, time=900.)])
+    commands = list(aircraft_sim.get_data_storages())
+    generator = deepcopy(aircraft_sim.get_object().get_random_generator())
+    expected = mutate_commands(commands, generator, aircraft_sim.get_possible_speeds(), aircraft_sim.PRECISION,
+                               SimulatedAircraftImplemented.NB_MAXIMUM_COMMANDS)
+    assert commands == aircraft_sim.get_data_storages() # Copie, la liste donnée n'est pas modifiée
+    assert aircraft_sim.generate_commands() == expected
+    assert all(command.speed in aircraft_sim.get_possible_speeds() for command in expected)
+    del manager
+
+
+if __name__ == "__main__":
+    test_parallel_tempering_run()
+    test_tempering_neighbor_uses_generate_commands_operator()
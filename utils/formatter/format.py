@@ -5,6 +5,7 @@ from typing_extensions import override
 from algorithm.data import DataStorage
 from model.aircraft.aircraft import Information
 from model.aircraft.aircraft import Aircraft
+from model.aircraft.fleet import FleetTiming
 from model.route import Airway
 
 from logging_config import setup_logging
@@ -46,7 +47,7 @@ class JSONFormat(AFormat):
         """
         # Sérialiser les commandes et l'historique pour un seul avion
         commands = obj.get_commands()
-        flight_plan_timed = obj.get_flight_plan_timed()
+        flight_plan_timed = dict(obj.get_flight_plan_timed())
 
         # Retourner les données sous forme de dictionnaire
         exported = {self.COMMAND_KEY: commands, 
@@ -103,9 +104,13 @@ class JSONFormat(AFormat):
             # Creation instance Aircraft enregistres
             aircraft = Aircraft(flight_plan=Airway.transform(list(flight_plan_timed.keys())),
                                 speed=commands[0].speed,
-                                id=id)
-            aircraft.set_commands(commands)
+                                id=id,
+                                estimate_times=False)
+            aircraft.load_commands(commands)
             aircrafts_dict[id] = aircraft
+
+        # Calcul des temps de passage de toute la flotte en une passe
+        FleetTiming.estimate_aircrafts(list(aircrafts_dict.values()))
         return aircrafts_dict
 
     def __control_keys(self, dictionnary: Dict, primary_key: str) -> None:
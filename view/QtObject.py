@@ -15,7 +15,7 @@ from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QTextEdit
 from PyQt5.QtWidgets import QPushButton
 from PyQt5.QtCore import QTimer
 
-from typing import List
+from typing import List, TYPE_CHECKING
 from typing_extensions import override
 
 from model.point import Point
@@ -25,6 +25,9 @@ from model.aircraft.aircraft import Aircraft
 from utils.conversion import sec_to_time
 from view.signal import SignalEmitter
 
+if TYPE_CHECKING:
+    from model.simulation import SimulationModel
+
 class QtSector(QGraphicsPolygonItem):
     def __init__(self, sector_name: str, parent: QGraphicsScene):
         super().__init__()
@@ -264,7 +267,7 @@ class QtAircraft(QGraphicsPolygonItem):
         return f"{self.__class__.__name__}(id={self.aircraft.get_id_aircraft()}, commands={self.aircraft.get_commands()})"
 
 class ConflictWindow(QWidget):
-    def __init__(self, interval: float, parent=None):
+    def __init__(self, interval: float, parent=None, simulation: 'SimulationModel' = None):
         super().__init__(parent)
         self.setWindowTitle("Conflits détectés")
 
@@ -285,6 +288,7 @@ class ConflictWindow(QWidget):
         layout.addWidget(self.close_button)
 
         self._current_balise: QtBalise = None
+        self._simulation = simulation # Si fournie, les conflits sont classés en cours / à venir / passés
 
         # Refresh part
         self._interval_msec = interval if interval > 10*1000 else 10*1000
@@ -307,6 +311,8 @@ class ConflictWindow(QWidget):
     @property
     def current_balise(self) -> QtBalise: return self._current_balise
 
+    def set_simulation(self, simulation: 'SimulationModel') -> None: self._simulation = simulation
+
     def update_conflicts(self, qtbalise: QtBalise) -> None:
         """Démarre ou redémarre le timer avec la nouvelle balise."""
         self._qtimer.stop()  # Stoppe le timer s'il était déjà en cours
@@ -320,15 +326,23 @@ class ConflictWindow(QWidget):
         if not qtbalise: return
 
         balise = qtbalise.get_balise()
-        conflicts = balise.get_conflicts()
-        if not conflicts:
+        if self._simulation is None:
+            sections = [(None, balise.get_conflicts())]
+        else:
+            # Index des intervalles de temps des conflits: pas de filtrage de toute la liste
+            past, active, upcoming = self._simulation.conflict_manager.split_conflicts(self._simulation.get_time_elapsed(),
+                                                                                       balise.get_name())
+            sections = [("En cours", active), ("À venir", upcoming), ("Passés", past)]
+        if not any(conflicts for _, conflicts in sections):
             self.conflict_display.setText("<b>Aucun conflit détecté.</b>")
         else:
             try:
                 text = f"<h3>Balise : {balise.get_name()}</h3><ul>"
-                for conflict in conflicts:
-
-                    text = self.add_conflict_text(conflict, text)
+                for title, conflicts in sections:
+                    if title is not None and conflicts:
+                        text += f"<h4>{title} ({len(conflicts)})</h4>"
+                    for conflict in conflicts:
+                        text = self.add_conflict_text(conflict, text)
 
                 self.conflict_display.setHtml(text)
             except KeyError:
@@ -101,7 +101,8 @@ class MainWindow(QMainWindow):
         # Fenêtre des conflits
         self.scroll_area_conflict_window = QScrollArea(container)
         self.conflict_window = ConflictWindow(interval=int(1000*self.simulation_controller.simulation.get_interval_timer()),
-                                              parent=self.scroll_area_conflict_window)
+                                              parent=self.scroll_area_conflict_window,
+                                              simulation=self.simulation_controller.simulation)
         
         self.scroll_area_conflict_window.setWidget(self.conflict_window)
         self.scroll_area_conflict_window.setWidgetResizable(True)
@@ -697,6 +698,7 @@ class MainWindow(QMainWindow):
             self.simulation_controller = self.create_simulation_controller()
             # Reconnecter
             self.simulation_controller.simulation.signal.simulation_conflicts.connect(self.update_number_of_conflicts)
+            self.conflict_window.set_simulation(self.simulation_controller.simulation)
 
             # Comme le traffic generator est le meme, pas besoin de remettre a jour le slider sur la valeur max
             self.simulation_controller.draw()